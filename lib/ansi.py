@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import os
+import sys
+
+# Same names and codes as colorama's Fore / Back / Style, so they can be used
+# without importing colorama (which costs more than the rest of the menu).
+
+
+class Fore:
+    BLACK = '\033[30m'
+    RED = '\033[31m'
+    GREEN = '\033[32m'
+    YELLOW = '\033[33m'
+    BLUE = '\033[34m'
+    MAGENTA = '\033[35m'
+    CYAN = '\033[36m'
+    WHITE = '\033[37m'
+    RESET = '\033[39m'
+    LIGHTBLACK_EX = '\033[90m'
+    LIGHTRED_EX = '\033[91m'
+    LIGHTGREEN_EX = '\033[92m'
+    LIGHTYELLOW_EX = '\033[93m'
+    LIGHTBLUE_EX = '\033[94m'
+    LIGHTMAGENTA_EX = '\033[95m'
+    LIGHTCYAN_EX = '\033[96m'
+    LIGHTWHITE_EX = '\033[97m'
+
+
+class Back:
+    BLACK = '\033[40m'
+    RED = '\033[41m'
+    GREEN = '\033[42m'
+    YELLOW = '\033[43m'
+    BLUE = '\033[44m'
+    MAGENTA = '\033[45m'
+    CYAN = '\033[46m'
+    WHITE = '\033[47m'
+    RESET = '\033[49m'
+    LIGHTBLACK_EX = '\033[100m'
+    LIGHTRED_EX = '\033[101m'
+    LIGHTGREEN_EX = '\033[102m'
+    LIGHTYELLOW_EX = '\033[103m'
+    LIGHTBLUE_EX = '\033[104m'
+    LIGHTMAGENTA_EX = '\033[105m'
+    LIGHTCYAN_EX = '\033[106m'
+    LIGHTWHITE_EX = '\033[107m'
+
+
+class Style:
+    BRIGHT = '\033[1m'
+    DIM = '\033[2m'
+    NORMAL = '\033[22m'
+    RESET_ALL = '\033[0m'
+
+
+def needs_colorama() -> bool:
+    """True when output needs colorama's stream wrapping: a Windows console
+    without VT support, or output that isn't a terminal (codes get stripped)."""
+    if not sys.stdout.isatty():
+        return True
+    if sys.platform == 'win32':
+        # Windows Terminal, VS Code, Warp and ConEmu understand ANSI natively
+        return not any(os.environ.get(v) for v in ('WT_SESSION', 'TERM_PROGRAM', 'WARP_IS_LOCAL_SHELL_SESSION', 'ConEmuANSI'))
+    return False
+
+
+def init():
+    """Set up colored output; only imports colorama when this terminal needs it."""
+    if needs_colorama():
+        import colorama
+        colorama.init()
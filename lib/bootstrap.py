@@ -1,16 +1,36 @@
 import os
-import subprocess
 import sys
-from pathlib import Path
 
-ROOT_DIR = Path(__file__).resolve().parent.parent
-PARTS_DIR = ROOT_DIR / "parts"
-INIT_MARKER = PARTS_DIR / ".init"
-VENV_DIR = ROOT_DIR / ".venv"
-VENV_PYTHON = VENV_DIR / "Scripts" / "python.exe" if sys.platform == "win32" else VENV_DIR / "bin" / "python"
+# Plain string paths: enough for the every-launch marker check, without importing pathlib
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+PARTS_PATH = os.path.join(ROOT_PATH, "parts")
+INIT_MARKER_PATH = os.path.join(PARTS_PATH, ".init")
+
+
+def _define_paths():
+    """Define ROOT_DIR, PARTS_DIR, INIT_MARKER, VENV_DIR and VENV_PYTHON (as Paths) in this module."""
+    from pathlib import Path
+    root = Path(ROOT_PATH)
+    venv = root / ".venv"
+    paths = {
+        "ROOT_DIR": root,
+        "PARTS_DIR": Path(PARTS_PATH),
+        "INIT_MARKER": Path(INIT_MARKER_PATH),
+        "VENV_DIR": venv,
+        "VENV_PYTHON": venv / "Scripts" / "python.exe" if sys.platform == "win32" else venv / "bin" / "python",
+    }
+    globals().update(paths)
+    return paths
+
+
+def __getattr__(name):
+    """The Path constants are built on first use (e.g. from lib.bootstrap import PARTS_DIR)."""
+    if name not in ("ROOT_DIR", "PARTS_DIR", "INIT_MARKER", "VENV_DIR", "VENV_PYTHON"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return _define_paths()[name]
 
 
-def _to_posix(p: Path) -> str:
+def _to_posix(p: "Path") -> str:
     """Convert a Windows path to POSIX format for bash (C:\\Users\\... -> /c/Users/...)."""
     s = p.as_posix()
     if len(s) >= 2 and s[1] == ":":
@@ -20,6 +40,7 @@ def _to_posix(p: Path) -> str:
 
 def _register_aliases():
     """Register metis, admin, puffin aliases in bashrc/zshrc using .venv python."""
+    from pathlib import Path
     venv_python = _to_posix(VENV_PYTHON)
     root = _to_posix(ROOT_DIR)
     aliases = {
@@ -52,15 +73,18 @@ def _register_windows_path():
         f"if ($dirs -contains $d) {{ Write-Host 'PATH exists:' $d }}"
         f"else {{ $dirs += $d; [Environment]::SetEnvironmentVariable('Path', ($dirs -join ';'), 'User'); Write-Host 'PATH added:' $d }}"
     )
+    import subprocess
     subprocess.run(["powershell", "-NoProfile", "-Command", ps_script])
     print("  PATH registered")
 
 
 def ensure_init():
     """Create .venv, install deps, and register aliases/PATH on first run. Write parts/.init marker on success."""
-    if INIT_MARKER.exists():
+    if os.path.exists(INIT_MARKER_PATH):
         return
 
+    import subprocess
+    _define_paths()
     print("=== First run: setting up environment ===\n")
 
     # 1) Create .venv and install colorama
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import os
+import json
+import threading
+from collections import namedtuple
+from .bootstrap import PARTS_PATH
+
+CACHE_DB = os.path.join(PARTS_PATH, "cache.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stamps (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    files TEXT NOT NULL,
+    took REAL NOT NULL
+);
+"""
+
+# Inputs of one task at check time. saved is the duration of the cached run when
+# nothing changed since it succeeded, None when the task has to run.
+Stamp = namedtuple('Stamp', ['key', 'fingerprint', 'files', 'saved'])
+
+
+def _digest(path):
+    import hashlib
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def input_files(patterns):
+    """Files matched by glob patterns (** spans directories), sorted and deduplicated."""
+    import glob
+    files = set()
+    for pattern in patterns:
+        files.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return sorted(files)
+
+
+class TaskCache:
+    """
+    Up-to-date check for tasks with declared inputs, stored in SQLite under parts/.
+
+    A task's fingerprint covers its command, the values of its env keys and the
+    content of its input files. File contents are hashed only when size or mtime
+    differ from the last successful run, so an unchanged tree costs one stat per file.
+
+    Usage:
+        cache = TaskCache()
+        stamp = cache.check('Build/codegen', 'make gen', ['proto/**/*.proto'], ['PROTOC'])
+        if stamp.saved is None:
+            ... run it, then on success: cache.store(stamp, took)
+
+    Errors (read-only disk, locked database) are swallowed: a broken cache only means re-running.
+    """
+
+    def __init__(self, path=CACHE_DB):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        import sqlite3
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=2)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _load(self, key):
+        import sqlite3
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT fingerprint, files, took FROM stamps WHERE key = ?", (key,)).fetchone()
+        except (sqlite3.Error, OSError):
+            return None
+        return row
+
+    def check(self, key, command, inputs=(), env=()) -> Stamp:
+        """Fingerprint the task's current inputs and compare with its last successful run."""
+        import hashlib
+        row = self._load(key)
+        known = json.loads(row[1]) if row else {}  # {path: [size, mtime_ns, digest]}
+        files = {}
+        h = hashlib.sha256()
+        h.update(json.dumps([command, list(inputs), {name: os.environ.get(name) for name in env}]).encode())
+        for path in input_files(inputs):
+            try:
+                st = os.stat(path)
+                prev = known.get(path)
+                if prev and prev[0] == st.st_size and prev[1] == st.st_mtime_ns:
+                    digest = prev[2]
+                else:
+                    digest = _digest(path)
+            except OSError:
+                continue  # vanished since the glob
+            files[path] = [st.st_size, st.st_mtime_ns, digest]
+            h.update(f'{path}\0{digest}\0'.encode())
+        fingerprint = h.hexdigest()
+        saved = row[2] if row and row[0] == fingerprint else None
+        stamp = Stamp(key, fingerprint, files, saved)
+        if saved is not None and files != known:
+            self.store(stamp, saved)  # same content, new mtimes: keep the fast path working
+        return stamp
+
+    def store(self, stamp: Stamp, took: float):
+        """Record a successful run with the inputs it started from."""
+        import sqlite3
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("INSERT OR REPLACE INTO stamps (key, fingerprint, files, took) VALUES (?, ?, ?, ?)",
+                             (stamp.key, stamp.fingerprint, json.dumps(stamp.files), took))
+                conn.commit()
+        except (sqlite3.Error, OSError):
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
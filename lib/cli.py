@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import os
+import sys
+import json
+
+USAGE_ERROR = 2
+
+
+def _parser(prog):
+    import argparse
+    p = argparse.ArgumentParser(
+        prog=f'{prog} run',
+        description='Run tasks without the menu (for CI, cron and scripts).')
+    p.add_argument('tasks', nargs='*', metavar='TASK',
+                   help="'Section/Task' or a task title; run in the given order")
+    p.add_argument('--set', dest='values', action='append', default=[], metavar='STEP=VALUE',
+                   help='answer a Modal step (repeatable)')
+    p.add_argument('--parallel', nargs='?', type=int, const=0, metavar='N',
+                   help='run independent tasks concurrently on N workers (default: CPU count)')
+    p.add_argument('--json', action='store_true',
+                   help='print the run log as JSON on stdout (task output goes to stderr)')
+    p.add_argument('--list', action='store_true', help='list the runnable tasks and Modal steps')
+    p.add_argument('--no-cache', action='store_true',
+                   help='run tasks with declared inputs even if they are up to date')
+    p.add_argument('--usage', action='store_true',
+                   help='add CPU, memory, block I/O and context switch columns to the table')
+    return p
+
+
+def _sections(tm):
+    sections = getattr(tm, '_sections', None)
+    if sections:
+        return [(sec.name, sec.tasks) for sec in sections]
+    return [('', tm.list)]
+
+
+def resolve(tm, name):
+    """The task for 'Section/Task' or a bare task title. Raises LookupError."""
+    for section, tasks in _sections(tm):
+        if section and name.startswith(section + '/') and name[len(section) + 1:] in tasks:
+            return tasks[name[len(section) + 1:]]
+    if name in tm.list:
+        return tm.list[name]
+    import difflib
+    known = [f'{section}/{title}' if section else title
+             for section, tasks in _sections(tm) for title, task in tasks.items() if task is not None]
+    close = difflib.get_close_matches(name, known, n=3)
+    raise LookupError(f"unknown task '{name}'" + (f" (did you mean: {', '.join(close)})" if close else ''))
+
+
+def modals_of(tasks):
+    """The Modals run by tasks, including those of MultiTask sub-tasks."""
+    from .task import Modal, MultiTask
+    modals = [t.cmd for t in tasks if isinstance(getattr(t, 'cmd', None), Modal)]
+    for sub in (s for t in tasks if isinstance(t, MultiTask) for s in t.tasks):
+        if isinstance(getattr(sub, 'cmd', None), Modal):
+            modals.append(sub.cmd)
+    return modals
+
+
+def prepare(tm, names, values):
+    """
+    The tasks for names, with their Modal steps preset from values ({step_title: label}).
+    Steps are answered up front so a bad value fails before anything runs.
+    Raises LookupError for an unknown task, ValueError for a missing or unknown value.
+    """
+    tasks = [resolve(tm, name) for name in names]
+    for modal in modals_of(tasks):
+        modal.preset(values)
+        modal.resolve_preset()
+    return tasks
+
+
+def dispatch(tm, argv, **kwargs):
+    """Exit status of the subcommand in argv[0] (run, daemon, client, attach, jobs)."""
+    if argv[0] == 'run':
+        return run_cli(tm, argv[1:], **kwargs)
+    from . import daemon
+    if argv[0] == 'daemon':
+        return daemon.daemon_main(tm, argv[1:], **kwargs)
+    return daemon.client_main(argv)
+
+
+def _list(tm, out):
+    from .task import Modal
+    for section, tasks in _sections(tm):
+        for title, task in tasks.items():
+            if task is None:
+                continue
+            out.write(f'{section}/{title}\n' if section else f'{title}\n')
+            cmd = getattr(task, 'cmd', None)
+            if isinstance(cmd, Modal):
+                for step_title, items, is_dynamic in cmd.steps:
+                    choices = '...' if is_dynamic else '|'.join(str(k) for k in items)
+                    out.write(f'    --set "{step_title}=<{choices}>"\n')
+
+
+def _log_json(log):
+    return {
+        'section': log.section,
+        'title': log.title,
+        'status': (log.status or 'ok') if log.is_success else (log.status or 'failed'),
+        'seconds': round(log.took, 3),
+        'saved_seconds': round(log.saved, 3),
+        'attempt': log.attempt,
+        'wait_seconds': round(log.wait, 3),
+        'selections': log.selections,
+        'usage': {k: round(v, 3) for k, v in log.usage._asdict().items()} if log.usage else None,
+    }
+
+
+def run_cli(tm, argv, **kwargs) -> int:
+    """
+    Headless entry point: `metis run Section/Task ... [--set Step=value] [--parallel N] [--json]`.
+
+    Tasks are looked up in the manager's sections, Modal steps are answered from
+    --set instead of popups and the terminal is never put in raw mode. Returns the
+    process exit status: 0 if every task succeeded, 1 if any failed or was skipped,
+    2 for usage errors (unknown task, missing or unknown step value).
+    """
+    import time
+    from .task import MultiTask, TaskLog, _print_table
+    from .scheduler import has_dependencies
+    args = _parser(os.path.basename(sys.argv[0]) or 'metis').parse_args(argv)
+    if args.list:
+        _list(tm, sys.stdout)
+        return 0
+    if not args.tasks:
+        sys.stderr.write('no tasks given (use --list to see them)\n')
+        return USAGE_ERROR
+
+    values = {}
+    for item in args.values:
+        step, sep, value = item.partition('=')
+        if not sep:
+            sys.stderr.write(f"--set expects STEP=VALUE, got '{item}'\n")
+            return USAGE_ERROR
+        values[step.strip()] = value
+
+    try:
+        tasks = prepare(tm, args.tasks, values)
+    except LookupError as e:
+        sys.stderr.write(f'{e.args[0]}\n')
+        return USAGE_ERROR
+    except ValueError as e:
+        sys.stderr.write(f'{e}\n')
+        return USAGE_ERROR
+
+    if args.parallel is not None:
+        tm.set_parallel(args.parallel or None)
+    if args.no_cache:
+        tm.set_cache(None)
+    if args.usage:
+        tm.set_usage()
+
+    start = time.perf_counter()
+    if not args.json:
+        status = tm.run_headless(tasks, **kwargs)
+        if tm.logs:
+            # Same total line as the menu: only when tasks may have overlapped
+            overlapped = len(tasks) > 1 and (tm.max_workers > 1 or has_dependencies(tasks))
+            _print_table(tm.logs, time.perf_counter() - start if overlapped else None, tm.show_usage)
+        return status
+
+    # JSON mode: keep stdout for the report; task output (including child processes) goes to stderr
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        status = tm.run_headless(tasks, **kwargs)
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+    report = [_log_json(log) for log in tm.logs]
+    logged = {log.title for log in tm.logs}
+    for task in tasks:
+        if not isinstance(task, MultiTask) and str(task) not in logged:
+            # Stopped before it started (an earlier task failed)
+            report.append(_log_json(TaskLog(task.section, str(task), 'not run', 'not run', False, '',
+                                            0.0, 0.0, attempt=0)))
+    json.dump({
+        'status': status,
+        'seconds': round(time.perf_counter() - start, 3),
+        'tasks': report,
+    }, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return status
@@ -0,0 +1,410 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import os
+import sys
+import json
+import socket
+import threading
+from collections import OrderedDict, deque
+from .bootstrap import PARTS_PATH
+
+# Resident mode: `metis daemon` keeps the task registry, Modal caches and run
+# history warm behind a Unix domain socket; `metis client` only draws the menu.
+# Tasks run inside the daemon, so they outlive the client and any client can
+# reattach to their output. Protocol: one JSON request line per connection,
+# answered by one or more JSON reply lines.
+
+SOCKET_PATH = os.path.join(PARTS_PATH, 'metis.sock')
+
+JOB_LINES = 5000  # output lines kept per job for reattaching clients
+KEEP_JOBS = 20  # finished jobs kept for attach / jobs
+
+USAGE_ERROR = 2
+
+
+class Job:
+    """One submitted run: its tasks, state and captured output (file-like, for OutputMux)."""
+
+    def __init__(self, job_id, names, answers):
+        self.id = job_id
+        self.names = names
+        self.answers = answers
+        self.state = 'queued'  # queued -> running -> done
+        self.status = None
+        self.logs = []
+        self.lines = deque(maxlen=JOB_LINES)
+        self.dropped = 0  # lines that fell out of the buffer
+        self._partial = ''
+        self._cond = threading.Condition()
+
+    def write(self, text):
+        with self._cond:
+            *lines, self._partial = (self._partial + text).split('\n')
+            self._append(lines)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False  # no progress line or colors meant for a terminal
+
+    def _append(self, lines):
+        for line in lines:
+            if len(self.lines) == self.lines.maxlen:
+                self.dropped += 1
+            self.lines.append(line)
+        self._cond.notify_all()
+
+    def set_running(self):
+        with self._cond:
+            self.state = 'running'
+
+    def finish(self, status, logs):
+        with self._cond:
+            if self._partial:
+                self._append([self._partial])
+                self._partial = ''
+            self.status = status
+            self.logs = logs
+            self.state = 'done'
+            self._cond.notify_all()
+
+    def follow(self):
+        """Yield the buffered output, then live lines until the job is done."""
+        pos = 0
+        while True:
+            with self._cond:
+                while pos == self.dropped + len(self.lines) and self.state != 'done':
+                    self._cond.wait()
+                start = max(pos, self.dropped)
+                batch = list(self.lines)[start - self.dropped:]
+                skipped = start - pos
+                pos = self.dropped + len(self.lines)
+                finished = self.state == 'done'
+            if skipped:
+                yield f'… {skipped} earlier lines dropped'
+            yield from batch
+            if finished:
+                return
+
+    def summary(self):
+        return {'job': self.id, 'tasks': self.names, 'state': self.state, 'status': self.status}
+
+
+class Daemon:
+    """Serves one task manager: answers menu queries and runs jobs one at a time."""
+
+    def __init__(self, tm, server, **kwargs):
+        import queue
+        self.tm = tm
+        self.server = server
+        self.kwargs = kwargs
+        self.jobs = OrderedDict()  # {job_id: Job}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._next_id = 1
+        threading.Thread(target=self._work, daemon=True).start()
+
+    def _work(self):
+        from contextlib import redirect_stdout
+        from .cli import resolve, modals_of
+        from .process import OutputMux
+        while True:
+            job = self._queue.get()
+            job.set_running()
+            tasks, status = [], 1
+            self.tm.logs = []
+            try:
+                tasks = [resolve(self.tm, name) for name in job.names]
+                for modal, values in _modal_answers(self.tm, job.names, job.answers):
+                    modal.preset(values)
+                    modal.resolve_preset()
+                # Child processes are piped through the mux; prints of Python tasks land in the job too
+                with OutputMux(self.tm.output_lines, out=job), redirect_stdout(job):
+                    status = self.tm.run_headless(tasks, **self.kwargs)
+            except Exception as e:
+                job.write(f'{type(e).__name__}: {e}\n')
+            finally:
+                for modal in modals_of(tasks):
+                    modal.preset(None)
+            job.finish(status, [log._asdict() for log in self.tm.logs])
+            with self._lock:
+                done = [j for j in self.jobs.values() if j.state == 'done']
+                for old in done[:-KEEP_JOBS]:
+                    del self.jobs[old.id]
+
+    def _task_info(self, name, task):
+        from .cli import modals_of
+        modals = []
+        for modal in modals_of([task]):
+            steps = [{'title': title, 'items': None if is_dynamic else [str(k) for k in items]}
+                     for title, items, is_dynamic in modal.steps]
+            modals.append({'name': modal.name, 'min_width': modal.min_width, 'steps': steps})
+        return {'title': str(task), 'name': name, 'modals': modals}
+
+    def op_list(self, req):
+        """Sections and tasks for the client's menu."""
+        from .cli import _sections
+        self.tm._refresh()
+        multi = {sec.name: sec.multi for sec in getattr(self.tm, '_sections', [])}
+        sections = []
+        for section, tasks in _sections(self.tm):
+            entries = []
+            for key, task in tasks.items():
+                if task is None or key.startswith('\x00sep'):
+                    entries.append(None)
+                else:
+                    entries.append(self._task_info(f'{section}/{key}' if section else key, task))
+            sections.append({'name': section, 'multi': multi.get(section, False), 'tasks': entries})
+        yield {'banner': self.tm._format_banner(), 'sections': sections,
+               'empty_text': dict(getattr(self.tm, '_empty_text', {}))}
+
+    def op_items(self, req):
+        """Labels of a dynamic Modal step, from the daemon's warm cache."""
+        from .cli import resolve, modals_of
+        modal = modals_of([resolve(self.tm, req['task'])])[req.get('modal', 0)]
+        step = req['step']
+        items = modal.step_items(step, modal.resolve_labels(req.get('values', {}), steps=step))
+        yield {'items': [str(k) for k in items]}
+
+    def op_run(self, req):
+        """Queue tasks (Modal steps answered by label, per task) and reply with the job id."""
+        names, answers = list(req['tasks']), dict(req.get('answers', {}))
+        # Validate now so the client gets the error; presetting waits for the job's turn
+        for modal, values in _modal_answers(self.tm, names, answers):
+            modal.resolve_labels(values)
+        with self._lock:
+            job = Job(self._next_id, names, answers)
+            self._next_id += 1
+            self.jobs[job.id] = job
+        self._queue.put(job)
+        yield {'job': job.id}
+
+    def op_attach(self, req):
+        """Stream a job's output (the latest job by default), then its result."""
+        with self._lock:
+            job_id = req.get('job') or (next(reversed(self.jobs)) if self.jobs else None)
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise LookupError(f'no job {job_id}' if job_id else 'no jobs yet')
+        yield job.summary()
+        for line in job.follow():
+            yield {'line': line}
+        yield {'done': job.status, 'logs': job.logs}
+
+    def op_jobs(self, req):
+        with self._lock:
+            yield {'jobs': [job.summary() for job in self.jobs.values()]}
+
+    def op_stop(self, req):
+        yield {'ok': True}
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+def _modal_answers(tm, names, answers):
+    """(modal, {step_title: label}) for each Modal of the named tasks. answers is
+    {name: [{step_title: label} per Modal of the task]}: two tasks asking the same
+    step are answered separately."""
+    from .cli import resolve, modals_of
+    pairs = []
+    for name in names:
+        given = answers.get(name, [])
+        for modal_index, modal in enumerate(modals_of([resolve(tm, name)])):
+            pairs.append((modal, given[modal_index] if modal_index < len(given) else {}))
+    return pairs
+
+
+def _handler():
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                req = json.loads(self.rfile.readline())
+                op = getattr(self.server.metis, f"op_{req.get('op')}", None)
+                if op is None:
+                    raise ValueError(f"unknown op {req.get('op')!r}")
+                for reply in op(req):
+                    self._send(reply)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client detached; the job keeps running
+            except LookupError as e:
+                self._send({'error': e.args[0]})
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self._send({'error': str(e)})
+
+        def _send(self, reply):
+            self.wfile.write(json.dumps(reply).encode() + b'\n')
+            self.wfile.flush()
+
+    return Handler
+
+
+def _connect():
+    """A socket connected to the daemon. Raises ConnectionError if none is running."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(SOCKET_PATH)
+    except OSError as e:
+        sock.close()
+        raise ConnectionError(f'no metis daemon at {SOCKET_PATH} (start one with: metis daemon)') from e
+    return sock
+
+
+def request(msg):
+    """Send one request to the daemon and yield its replies.
+    Raises ConnectionError if it isn't running, ValueError for an error reply."""
+    sock = _connect()
+    with sock, sock.makefile('rb') as replies:
+        sock.sendall(json.dumps(msg).encode() + b'\n')
+        for line in replies:
+            reply = json.loads(line)
+            if 'error' in reply:
+                raise ValueError(reply['error'])
+            yield reply
+
+
+def _call(msg):
+    return next(request(msg))
+
+
+def daemon_main(tm, argv, **kwargs) -> int:
+    """`metis daemon [--stop]`: serve tm on SOCKET_PATH until stopped (runs in the foreground)."""
+    if argv[:1] == ['--stop']:
+        try:
+            _call({'op': 'stop'})
+        except ConnectionError as e:
+            sys.stderr.write(f'{e}\n')
+            return 1
+        return 0
+    if not hasattr(socket, 'AF_UNIX'):
+        sys.stderr.write('metis daemon needs Unix domain sockets, which this platform lacks\n')
+        return USAGE_ERROR
+    try:
+        _connect().close()
+        sys.stderr.write(f'a metis daemon is already running at {SOCKET_PATH}\n')
+        return 1
+    except ConnectionError:
+        if os.path.exists(SOCKET_PATH):
+            os.unlink(SOCKET_PATH)  # left over from a daemon that didn't exit cleanly
+
+    import socketserver
+    tm.set_progress(False)
+    umask = os.umask(0o077)  # only this user may connect
+    try:
+        server = socketserver.ThreadingUnixStreamServer(SOCKET_PATH, _handler())
+    finally:
+        os.umask(umask)
+    server.daemon_threads = True
+    server.metis = Daemon(tm, server, **kwargs)
+    print(f'metis daemon listening on {SOCKET_PATH} (stop with: metis daemon --stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(SOCKET_PATH):
+            os.unlink(SOCKET_PATH)
+    return 0
+
+
+def _proxy_modal(name, modal_index, spec):
+    """A local Modal drawing the daemon's steps; dynamic items are fetched from the daemon."""
+    from .task import Modal
+    modal = Modal(spec['name'], min_width=spec['min_width'])
+    for step_index, step in enumerate(spec['steps']):
+        if step['items'] is not None:
+            modal.add_step(step['title'], {label: label for label in step['items']})
+            continue
+
+        def items_fn(selections, step_index=step_index):
+            labels = _call({'op': 'items', 'task': name, 'modal': modal_index, 'step': step_index,
+                            'values': selections})['items']
+            return {label: label for label in labels}
+        modal.add_dynamic_step(step['title'], items_fn)
+    return modal
+
+
+def _client() -> int:
+    """Draw the daemon's menu, submit the selection and follow its output."""
+    from .menu import sectioned_select, register_banner, raw_session
+    listing = _call({'op': 'list'})
+    if listing['banner'] is not None:
+        register_banner(listing['banner'])
+    sections, multi, entries = {}, {}, {}
+    for sec in listing['sections']:
+        items = {}
+        for n, entry in enumerate(sec['tasks']):
+            if entry is None:
+                items[f'\x00sep{n}'] = None
+            else:
+                items[entry['title']] = entry['name']
+                entries[entry['name']] = entry
+        sections[sec['name']] = items
+        multi[sec['name']] = sec['multi']
+
+    choice = sectioned_select(sections, multi=multi, empty_text=listing['empty_text'])
+    if not choice:
+        return 0
+    names = choice if isinstance(choice, list) else [choice]
+
+    answers = {}  # {name: [{step_title: label} per Modal]}, see _modal_answers
+    with raw_session():
+        for name in names:
+            for modal_index, spec in enumerate(entries[name]['modals']):
+                selections = _proxy_modal(name, modal_index, spec)._select()
+                if selections is None:
+                    return 0
+                answers.setdefault(name, []).append(selections)
+
+    job_id = _call({'op': 'run', 'tasks': names, 'answers': answers})['job']
+    return _attach(job_id)
+
+
+def _attach(job_id=None) -> int:
+    """Print a job's output as it arrives and its results table; Ctrl+C detaches."""
+    from .task import TaskLog, _print_table
+    try:
+        for reply in request({'op': 'attach', 'job': job_id}):
+            if 'line' in reply:
+                sys.stdout.write(reply['line'] + '\n')
+                sys.stdout.flush()
+            elif 'done' in reply:
+                _print_table([TaskLog(**log) for log in reply['logs']])
+                return reply['done']
+            else:
+                job_id = reply['job']
+    except KeyboardInterrupt:
+        sys.stdout.write(f'\ndetached; job {job_id} keeps running (metis attach {job_id})\n')
+    return 0
+
+
+def _jobs() -> int:
+    for job in _call({'op': 'jobs'})['jobs']:
+        status = '' if job['status'] is None else ('ok' if job['status'] == 0 else 'failed')
+        print(f"{job['job']:>4}  {job['state']:<8} {status:<7} {', '.join(job['tasks'])}")
+    return 0
+
+
+def client_main(argv) -> int:
+    """`metis client`, `metis attach [JOB]` and `metis jobs`, talking to a running daemon."""
+    try:
+        if argv[0] == 'jobs':
+            return _jobs()
+        if argv[0] == 'attach':
+            if len(argv) > 1 and not argv[1].isdigit():
+                sys.stderr.write(f"usage: metis attach [JOB], got '{argv[1]}'\n")
+                return USAGE_ERROR
+            return _attach(int(argv[1]) if len(argv) > 1 else None)
+        return _client()
+    except ConnectionError as e:
+        sys.stderr.write(f'{e}\n')
+        return 1
+    except ValueError as e:
+        sys.stderr.write(f'{e}\n')
+        return USAGE_ERROR
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import os
+import threading
+from .bootstrap import PARTS_PATH
+
+HISTORY_DB = os.path.join(PARTS_PATH, "history.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    section TEXT NOT NULL,
+    title TEXT NOT NULL,
+    selections TEXT NOT NULL,
+    exit_code INTEGER NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_title ON runs (title, selections, started);
+"""
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil
+    return sorted_values[int(rank) - 1]
+
+
+def _exit_code(res):
+    """A task's result as a stored exit code: 0 for None, 1 for what isn't a number
+    (a callable may return anything; the run failed either way)."""
+    try:
+        return int(res or 0)
+    except (TypeError, ValueError):
+        return 1
+
+
+class History:
+    """
+    Append-only record of every task run, stored in SQLite under parts/.
+
+    Usage:
+        h = History()
+        h.record('Build', 'cargo build', '', 0, time.time(), 12.3)
+        h.stats('cargo build')  # {'count': 1, 'p50': 12.3, 'p95': 12.3, 'max': 12.3, 'last': 12.3}
+        h.stats('cargo build', since=time.time() - 7 * 86400)  # last week only
+
+    Errors (read-only disk, locked database) are swallowed: history must never fail a run.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        import sqlite3
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=2)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def record(self, section, title, selections, exit_code, started, duration):
+        """Append one run. started is a time.time() timestamp, duration in seconds."""
+        import sqlite3
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT INTO runs (section, title, selections, exit_code, started, duration) VALUES (?, ?, ?, ?, ?, ?)",
+                    (section or '', title, selections or '', _exit_code(exit_code), started, duration))
+                conn.commit()
+        except (sqlite3.Error, OSError):
+            pass
+
+    def durations(self, title, selections=None, since=None, until=None, success_only=True):
+        """Durations of past runs of a task, oldest first.
+        selections: only runs with this Modal selection string (None = any)
+        """
+        query = "SELECT duration FROM runs WHERE title = ?"
+        args = [title]
+        if selections is not None:
+            query += " AND selections = ?"
+            args.append(selections)
+        if since is not None:
+            query += " AND started >= ?"
+            args.append(since)
+        if until is not None:
+            query += " AND started < ?"
+            args.append(until)
+        if success_only:
+            query += " AND exit_code = 0"
+        query += " ORDER BY started"
+        import sqlite3
+        try:
+            with self._lock:
+                return [row[0] for row in self._connect().execute(query, args)]
+        except (sqlite3.Error, OSError):
+            return []
+
+    def stats(self, title, selections=None, since=None, until=None):
+        """Duration statistics of a task: {'count', 'p50', 'p95', 'max', 'last'}, or None without history."""
+        values = self.durations(title, selections, since, until)
+        if not values:
+            return None
+        last = values[-1]
+        values.sort()
+        return {
+            'count': len(values),
+            'p50': _percentile(values, 50),
+            'p95': _percentile(values, 95),
+            'max': values[-1],
+            'last': last,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
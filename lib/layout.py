@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+from collections import namedtuple
+from .width import display_width
+
+# One menu section, measured once. items: keys in menu order; separators: True
+# where items[i] is a separator; selectable: indexes of the others; next / prev:
+# index the cursor moves to from each index going down / up (wrapping, skipping
+# separators); width: widest item in columns. source is the items object the
+# section was built from, size its length then, to notice in-place changes.
+SectionLayout = namedtuple('SectionLayout', ['name', 'source', 'size', 'items', 'separators', 'selectable',
+                                             'next', 'prev', 'width', 'multi'])
+
+
+def is_separator(item) -> bool:
+    """True for separator keys (empty string or Section.splitter()'s '\\x00sep' keys)."""
+    s = str(item)
+    return s == '' or s.startswith('\x00sep')
+
+
+def _moves(separators, step):
+    """Cursor target from each index moving by step, like repeating the move until
+    it lands on a selectable item (the index itself if there is none)."""
+    n = len(separators)
+    table = list(range(n))
+    target = None
+    order = range(n - 1, -1, -1) if step == 1 else range(n)
+    for _ in range(2):  # second pass wraps around the ends
+        for i in order:
+            if target is not None:
+                table[i] = target
+            if not separators[i]:
+                target = i
+    return tuple(table)
+
+
+def section_layout(name, items, multi=False) -> SectionLayout:
+    """Measure a section's items (a dict, list or set, as in sectioned_select)."""
+    t = type(items)
+    keys = tuple(items.keys()) if t is dict else tuple(items)
+    separators = tuple(is_separator(item) for item in keys)
+    return SectionLayout(
+        name=name,
+        source=items,
+        size=len(items),
+        items=keys,
+        separators=separators,
+        selectable=tuple(i for i, sep in enumerate(separators) if not sep),
+        next=_moves(separators, 1),
+        prev=_moves(separators, -1),
+        width=max((display_width(str(item)) for item in keys), default=0),
+        multi=bool(multi),
+    )
+
+
+class MenuLayout:
+    """
+    Immutable measurements of a sectioned menu: per-section item arrays, separator
+    masks, cursor move tables and widths, plus the menu width they add up to.
+
+    Changing a section gives a new MenuLayout that shares every other section, so
+    SectionedTaskManager keeps one up to date as sections are added and menu
+    entry / navigation are lookups instead of scans.
+
+    Usage:
+        layout = MenuLayout().add('Build', build.tasks, multi=True)
+        sec = layout.sections[0]
+        curr = sec.next[curr]      # Down, skipping separators
+        width = layout.width       # items and tabs, without the banner
+    """
+
+    __slots__ = ('sections', 'names', 'width', 'any_multi')
+
+    def __init__(self, sections=()):
+        sections = tuple(sections)
+        names = tuple(sec.name for sec in sections)
+        any_multi = any(sec.multi for sec in sections)
+        # Tab width: " name " per tab, " │ " separators, "│ " and " │" borders
+        tab_width = sum(display_width(name) + 2 for name in names) + (len(names) - 1) * 3 + 4
+        # Item width: "│ →·item │" = item + 6, with checkboxes "·[√]·" +11
+        item_width = max((sec.width for sec in sections), default=0) + (11 if any_multi else 6)
+        object.__setattr__(self, 'sections', sections)
+        object.__setattr__(self, 'names', names)
+        object.__setattr__(self, 'width', max(item_width, tab_width) if sections else 0)
+        object.__setattr__(self, 'any_multi', any_multi)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('MenuLayout is immutable')
+
+    def __len__(self):
+        return len(self.sections)
+
+    def add(self, name, items, multi=False) -> 'MenuLayout':
+        return MenuLayout(self.sections + (section_layout(name, items, multi),))
+
+    def replace(self, section_idx, items=None, multi=None) -> 'MenuLayout':
+        """Layout with one section measured again (after its items changed)."""
+        old = self.sections[section_idx]
+        sec = section_layout(old.name, old.source if items is None else items, old.multi if multi is None else multi)
+        return MenuLayout(self.sections[:section_idx] + (sec,) + self.sections[section_idx + 1:])
+
+    def sync(self, sections, multi=False) -> 'MenuLayout':
+        """
+        Layout for sections ({name: items}, multi as in sectioned_select), re-measuring
+        only sections that are new or whose items object or length changed.
+        Returns self when nothing did.
+        """
+        by_name = {sec.name: sec for sec in self.sections}
+        result = []
+        changed = len(sections) != len(self.sections)
+        for name, items in sections.items():
+            is_multi = multi.get(name, False) if isinstance(multi, dict) else bool(multi)
+            sec = by_name.get(name)
+            if sec is None or sec.source is not items or sec.size != len(items) or sec.multi != is_multi:
+                sec = section_layout(name, items, is_multi)
+                changed = True
+            result.append(sec)
+        if not changed and all(a is b for a, b in zip(result, self.sections)):
+            return self
+        return MenuLayout(result)
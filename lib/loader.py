@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class Result:
+    """
+    Outcome of a background call: the done() / result() / exception() /
+    add_done_callback() subset of concurrent.futures.Future, without importing
+    concurrent.futures (and logging with it) on the startup path.
+    """
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._value = None
+        self._error = None
+        self._callbacks = []
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """The call's return value (re-raises its exception), waiting up to timeout seconds."""
+        if not self._done.wait(timeout):
+            raise TimeoutError()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def exception(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError()
+        return self._error
+
+    def add_done_callback(self, fn):
+        """Call fn(result) when done (right away if it already is)."""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def _finish(self, value=None, error=None):
+        with self._lock:
+            self._value = value
+            self._error = error
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+
+
+def run_async(fn, *args) -> Result:
+    """Call fn(*args) on a daemon thread and return its Result.
+    Daemon threads never hold up exit, even if fn hangs on a slow remote."""
+    result = Result()
+
+    def work():
+        try:
+            value = fn(*args)
+        except BaseException as e:
+            result._finish(error=e)
+        else:
+            result._finish(value)
+
+    threading.Thread(target=work, daemon=True).start()
+    return result
+
+
+class AsyncCache:
+    """
+    Memoizes slow calls as Results: the first get() for a key starts the call in
+    the background, later ones (until ttl expires) share its result.
+
+    Entries are evicted least-recently-used beyond max_entries. Failed calls are
+    not cached, so the next get() retries.
+
+    Usage:
+        cache = AsyncCache(ttl=30)
+        future = cache.get(('branches', 'origin'), list_branches, 'origin')
+        cache.prefetch(('branches', 'upstream'), list_branches, 'upstream')
+    """
+
+    def __init__(self, ttl: float = 30, max_entries: int = 32, max_prefetch: int = 4):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (future, created)
+        self._lock = threading.Lock()
+        self._prefetch_slots = threading.BoundedSemaphore(max_prefetch)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        future, created = entry
+        failed = future.done() and future.exception() is not None
+        if failed or (self.ttl is not None and time.monotonic() - created > self.ttl):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return future
+
+    def _store(self, key, future):
+        self._entries[key] = (future, time.monotonic())
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def cached(self, key):
+        """The Result for key if it's cached (possibly still running), else None."""
+        with self._lock:
+            return self._lookup(key)
+
+    def get(self, key, fn, *args) -> Result:
+        """Result of fn(*args), started now unless key is cached."""
+        with self._lock:
+            future = self._lookup(key)
+            if future is None:
+                future = run_async(fn, *args)
+                self._store(key, future)
+            return future
+
+    def prefetch(self, key, fn, *args):
+        """Start fn(*args) for key in the background, unless it's cached or
+        max_prefetch calls are already in flight (fast scrolling starts no backlog)."""
+        with self._lock:
+            if self._lookup(key) is not None:
+                return
+            if not self._prefetch_slots.acquire(blocking=False):
+                return
+            future = run_async(fn, *args)
+            future.add_done_callback(lambda _: self._prefetch_slots.release())
+            self._store(key, future)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -5,12 +5,23 @@
 
 import os
 import sys
-from colorama import Fore, Back, Style, init
+import functools
+from .ansi import Fore, Back, Style, init
+from .render import Compositor, in_full_screen, screen_renderer
+from .width import display_width, ljust, truncate
+from .layout import MenuLayout, is_separator
+from .search import SearchIndex, SearchFilter
+
+_console_ready = False
 
 def _setup_windows_console():
-    """Enable UTF-8, VT processing, and proper font on Windows console."""
-    if sys.platform != 'win32':
+    """Enable UTF-8, VT processing, and proper font on Windows console.
+    Runs once, when the first menu opens (ctypes and console calls are skipped
+    for runs that never show a menu)."""
+    global _console_ready
+    if _console_ready or sys.platform != 'win32':
         return
+    _console_ready = True
     try:
         import ctypes
         from ctypes import wintypes, Structure, sizeof, byref
@@ -63,76 +74,20 @@ def _setup_windows_console():
     if hasattr(sys.stderr, 'reconfigure'):
         sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
-_setup_windows_console()
-
-# Key codes
-KEY_TAB = 9
-KEY_SHIFT_TAB = 15
-KEY_ENTER = 13
-KEY_LF = 10
-KEY_SPACE = 32
-KEY_ESC = 27
-KEY_CTRL_C = 3
-KEY_UP = 72
-KEY_DOWN = 80
-KEY_RIGHT = 77
-KEY_LEFT = 75
-KEY_HOME = 71
-KEY_END = 79
-
-# Cross-platform getch implementation
-try:
-    from msvcrt import getch  # Windows
-    def get_key():
-        ch = ord(getch())
-        if ch == 9:  # Tab
-            return KEY_TAB
-        return ch
-except ImportError:
-    def get_key():  # Unix/Linux/macOS
-        import tty, termios, select, os
-        fd = sys.stdin.fileno()
-        old_settings = termios.tcgetattr(fd)
-        try:
-            tty.setraw(fd)
-            ch = os.read(fd, 1).decode('utf-8')
-            if ch == '\x1b':  # ESC sequence for arrow keys
-                # Use select to check if more bytes are available (with short timeout)
-                # Arrow keys send \x1b followed by more bytes immediately
-                # Plain ESC key sends only \x1b
-                if select.select([fd], [], [], 0.1)[0]:
-                    next_ch = os.read(fd, 2).decode('utf-8')
-                    if next_ch == '[A':  # Up arrow
-                        return KEY_UP
-                    elif next_ch == '[B':  # Down arrow
-                        return KEY_DOWN
-                    elif next_ch == '[C':  # Right arrow
-                        return KEY_RIGHT
-                    elif next_ch == '[D':  # Left arrow
-                        return KEY_LEFT
-                    elif next_ch == '[H':  # Home
-                        return KEY_HOME
-                    elif next_ch == '[F':  # End
-                        return KEY_END
-                    elif next_ch == '[Z':  # Shift+Tab
-                        return KEY_SHIFT_TAB
-                    else:
-                        return KEY_ESC
-                else:
-                    # No more bytes available - it's a plain ESC key
-                    return KEY_ESC
-            elif ch == '\r':
-                return KEY_ENTER
-            elif ch == '\n':
-                return KEY_LF
-            elif ch == '\x03':  # Ctrl+C
-                return KEY_CTRL_C
-            elif ch == '\t':  # Tab
-                return KEY_TAB
-            else:
-                return ord(ch)
-        finally:
-            termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+from .term import (KEY_TAB, KEY_SHIFT_TAB, KEY_ENTER, KEY_LF, KEY_SPACE, KEY_ESC, KEY_CTRL_C, KEY_BACKSPACE,
+                   KEY_UP, KEY_DOWN, KEY_RIGHT, KEY_LEFT, KEY_HOME, KEY_END, KEY_PGUP, KEY_PGDN,
+                   KEY_REFRESH, KEY_RESIZE, raw_session, terminal)
+
+_term = raw_session()
+
+def _raw_input(fn):
+    """Run a menu function inside one raw-input session (entered once, not per key)."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _setup_windows_console()
+        with _term:
+            return fn(*args, **kwargs)
+    return wrapper
 
 class ECOLORS:
     HEADER = '\033[95m'
@@ -146,6 +101,8 @@ class ECOLORS:
     # Background colors
     BG_GREEN = '\033[42m'
     BG_RED = '\033[41m'
+    BG_YELLOW = '\033[43m'
+    BG_BLUE = '\033[44m'
 
 def walk_level(some_dir, target_list, file=False, level=0):
     some_dir = some_dir.rstrip(os.path.sep)
@@ -175,6 +132,38 @@ def up(curr, lst):
     else:
         return curr - 1
             
+def _viewport_rows(reserved):
+    """Rows left for list items in the terminal after `reserved` rows of chrome."""
+    return max(3, terminal().size.lines - reserved)
+
+def _scroll_window(curr, top, count, height):
+    """First visible index of a `height`-row window over `count` items that keeps curr visible."""
+    if count <= height:
+        return 0
+    if curr < top:
+        top = curr
+    elif curr >= top + height:
+        top = curr - height + 1
+    return max(0, min(top, count - height))
+
+def _scroll_indicator(arrow, hidden, inner_width):
+    """Dimmed '▲ n more' / '▼ n more' text (blank when nothing is hidden on that side)."""
+    text = f"{arrow} {hidden} more" if hidden else ''
+    return f"{Fore.LIGHTBLACK_EX}{text:^{inner_width}}{Style.RESET_ALL}"
+
+class _FilteredItems:
+    """Read-only list view of the items at `indexes` (position -> items[indexes[position]])."""
+    def __init__(self, items, indexes):
+        self.items = items
+        self.indexes = indexes
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, pos):
+        return self.items[self.indexes[pos]]
+
+@_raw_input
 def _menu_core(getin, multi=False):
     if len(getin) == 0: return [] if multi else None
 
@@ -182,11 +171,23 @@ def _menu_core(getin, multi=False):
     lst = list(getin.keys()) if t is dict else list(getin) if t is set else getin
     curr = 0
     selected = [False] * len(lst) if multi else None
-    max_len = max(len(item) for item in lst) + (12 if multi else 1)
+    max_len = max(display_width(str(item)) for item in lst) + (12 if multi else 1)
+    renderer = screen_renderer()
+    top = 0  # first visible item
 
     while True:
-        sys.stdout.write(max_len * '─' + '\n')
-        for idx, item in enumerate(lst):
+        # Only the window of items around curr is built; long lists get scroll indicators
+        rows = _viewport_rows(3)
+        start, end = 0, len(lst)
+        if len(lst) > rows:
+            rows -= 2
+            top = _scroll_window(curr, top, len(lst), rows)
+            start, end = top, top + rows
+        frame = [max_len * '─']
+        if end - start < len(lst):
+            frame.append(_scroll_indicator('▲', start, max_len))
+        for idx in range(start, end):
+            item = lst[idx]
             color = ''
             arrow = '→ ' if idx == curr else '  '
             chosen = ''
@@ -195,39 +196,46 @@ def _menu_core(getin, multi=False):
                 color = ECOLORS.OKGREEN if selected[idx] else ''
             if idx == curr:
                 color = ECOLORS.OKBLUE
-            sys.stdout.write(f"{color}{arrow}{chosen}{item} \n{Style.RESET_ALL}")
-        sys.stdout.write(max_len * '─' + '\n')
-
-        key_code = get_key()
-
-        if key_code == KEY_ENTER or key_code == KEY_LF:  # enter
-            if multi:
-                res = []
-                for i, sel in enumerate(selected):
-                    if sel:
-                        res.append(lst[i] if t is set else getin[lst[i]])
-                if not res: continue
-                print()
-                return res
-            else:
-                print()
-                if t is dict: return getin[lst[curr]]
-                if t is set: return lst[curr]
-                return getin[curr]
-        elif multi and key_code == KEY_SPACE:  # space
-            selected[curr] = not selected[curr]
-        elif key_code == KEY_UP:  # up arrow
-            curr = up(curr, lst)
-        elif key_code == KEY_DOWN:  # down arrow
-            curr = down(curr, lst)
-        elif key_code == KEY_HOME:  # home
-            curr = 0
-        elif key_code == KEY_END:  # end
-            curr = len(lst) - 1
-        elif key_code == KEY_ESC or key_code == KEY_CTRL_C:  # esc or ctrl+c
-            exit()
-            # return [] if multi else None
-        sys.stdout.write('\x1b[{0}A'.format(len(lst) + 2))
+            frame.append(f"{color}{arrow}{chosen}{item} {Style.RESET_ALL}")
+        if end - start < len(lst):
+            frame.append(_scroll_indicator('▼', len(lst) - end, max_len))
+        frame.append(max_len * '─')
+        renderer.render(frame)
+
+        for key_code in _term.keys():
+            if key_code == KEY_ENTER or key_code == KEY_LF:  # enter
+                if multi:
+                    res = []
+                    for i, sel in enumerate(selected):
+                        if sel:
+                            res.append(lst[i] if t is set else getin[lst[i]])
+                    if not res: continue
+                    print()
+                    return res
+                else:
+                    print()
+                    if t is dict: return getin[lst[curr]]
+                    if t is set: return lst[curr]
+                    return getin[curr]
+            elif multi and key_code == KEY_SPACE:  # space
+                selected[curr] = not selected[curr]
+            elif key_code == KEY_UP:  # up arrow
+                curr = up(curr, lst)
+            elif key_code == KEY_DOWN:  # down arrow
+                curr = down(curr, lst)
+            elif key_code == KEY_HOME:  # home
+                curr = 0
+            elif key_code == KEY_END:  # end
+                curr = len(lst) - 1
+            elif key_code == KEY_PGUP:
+                curr = max(0, curr - (end - start))
+            elif key_code == KEY_PGDN:
+                curr = min(len(lst) - 1, curr + (end - start))
+            elif key_code == KEY_RESIZE:
+                renderer.resized()  # the frame after this batch fits the new size
+            elif key_code == KEY_ESC or key_code == KEY_CTRL_C:  # esc or ctrl+c
+                sys.exit()  # the builtin exit() closes stdin, which the raw session restores
+                # return [] if multi else None
 
 def select(getin):
     return _menu_core(getin, multi=False)
@@ -244,6 +252,8 @@ _last_item_index = 0
 # Global to store the banner lines (registered separately)
 _banner_lines = []
 
+_LOADING = 'loading…'  # placeholder row of a popup whose items are still loading
+
 def get_last_menu_render():
     """Get the last rendered menu lines for use as popup background."""
     global _last_menu_render
@@ -294,13 +304,20 @@ def clear_banner():
     global _banner_lines
     _banner_lines = []
 
-def sectioned_select(sections, multi=False):
+@_raw_input
+def sectioned_select(sections, multi=False, index=None, refresh=None, empty_text=None, layout=None):
     """
     Sectioned menu with Tab navigation between sections.
 
     Args:
         sections: dict of {section_name: items} where items is dict/list/set
         multi: bool or dict of {section_name: bool} for per-section multi mode
+        index: SearchIndex of the item titles (built on first '/' if not given)
+        refresh: optional callable() -> bool, called when background data arrives
+                 (raw_session().wake()); True means sections/banner changed in place
+        empty_text: optional {section_name: text} shown instead of "(empty)", e.g. while loading
+        layout: MenuLayout of sections kept by the caller; only sections that changed
+                since it was built are measured again (all of them if not given)
 
     Returns:
         Selected item(s) from the chosen section
@@ -309,6 +326,8 @@ def sectioned_select(sections, multi=False):
         Tab / Right Arrow: Next section
         Shift+Tab / Left Arrow: Previous section
         Up/Down Arrow: Navigate items in current section
+        PgUp/PgDn: Move one screenful (long sections scroll with the cursor)
+        /: Filter items of all sections by typing (Backspace edits, Esc clears the filter)
         Enter: Select item
         Space: Toggle selection (multi mode)
         Esc/Ctrl+C: Exit
@@ -320,9 +339,9 @@ def sectioned_select(sections, multi=False):
     if not sections:
         return [] if multi else None
 
-    section_names = list(sections.keys())
+    layout = (layout or MenuLayout()).sync(sections, multi)
+    section_names = list(layout.names)
     _multi_map = multi if isinstance(multi, dict) else None
-    _any_multi = any(_multi_map.values()) if _multi_map else bool(multi)
 
     def is_multi(section_idx=None):
         if _multi_map:
@@ -332,28 +351,46 @@ def sectioned_select(sections, multi=False):
     # Restore last section, but clamp to valid range
     curr_section = min(_last_section_index, len(section_names) - 1)
     selected = {}  # {section_idx: [bool, ...]} for multi mode
-    prev_total_lines = 0  # Track previously drawn lines for clearing leftover lines
+    renderer = screen_renderer()  # Rewrites only changed rows (banner is drawn once)
+
+    scroll_tops = {}  # {section_idx: first visible item index}
+
+    query = None  # filter text while filtering, None otherwise
+    search = None  # SearchFilter of the current filter session
+    matches = {}  # {section_idx: [item index, ...]} matching the filter
+
+    def get_section_items(section_idx):
+        return layout.sections[section_idx].items
 
     def get_current_items():
-        items = sections[section_names[curr_section]]
-        t = type(items)
-        return list(items.keys()) if t is dict else list(items) if t is set else items
+        return get_section_items(curr_section)
+
+    def get_view_items():
+        """Items the cursor moves over: the whole section, or its matches while filtering."""
+        if query is None:
+            return get_current_items()
+        return _FilteredItems(get_current_items(), matches.get(curr_section, []))
+
+    def orig(pos):
+        """Index in the section of the item at cursor position pos."""
+        return pos if query is None else matches[curr_section][pos]
+
+    def visible_range(items):
+        """(start, end) of the items drawn this frame: all of them if they fit the terminal,
+        otherwise a window around curr_item (2 rows go to scroll indicators)."""
+        # banner + top border + tabs + separator + bottom border + line below the menu (+ filter row)
+        rows = _viewport_rows(len(_banner_lines) + 5 + (query is not None))
+        if len(items) <= rows:
+            return 0, len(items)
+        rows -= 2
+        top = _scroll_window(curr_item, scroll_tops.get(curr_section, 0), len(items), rows)
+        scroll_tops[curr_section] = top
+        return top, top + rows
 
     def get_max_width():
-        max_item_len = 0
-        for sec_items in sections.values():
-            t = type(sec_items)
-            lst = list(sec_items.keys()) if t is dict else list(sec_items) if t is set else sec_items
-            for item in lst:
-                if len(str(item)) > max_item_len:
-                    max_item_len = len(str(item))
-        # Tab width: " name " per tab, " │ " separators, "│ " and " │" borders
-        tab_width = sum(len(name) + 2 for name in section_names) + (len(section_names) - 1) * 3 + 4
-        # Item width: "│ →·item │" = item + 6, with checkboxes +10
-        item_width = max_item_len + (10 if _any_multi else 6)
         # Banner width: align banner box with menu box width
-        banner_width = max((len(line.rstrip()) for line in _banner_lines), default=0)
-        return max(item_width, tab_width, banner_width)
+        banner_width = max((display_width(line.rstrip()) for line in _banner_lines), default=0)
+        return max(layout.width, banner_width)
 
     def build_tabs_lines(width):
         """Build tab lines as strings instead of printing."""
@@ -368,38 +405,44 @@ def sectioned_select(sections, multi=False):
             tabs_plain.append(tab_text)
             if idx == curr_section:
                 tabs_colored.append(f"{Back.LIGHTBLUE_EX}{tab_text}{Style.RESET_ALL}")
+            elif query is not None and not matches.get(idx):
+                tabs_colored.append(f"{Fore.LIGHTBLACK_EX}{tab_text}{Style.RESET_ALL}")
             else:
                 tabs_colored.append(tab_text)
         line_plain = ' │ '.join(tabs_plain)
         line_colored = ' │ '.join(tabs_colored)
-        total_padding = width - len(line_plain) - 4
+        total_padding = width - display_width(line_plain) - 4
         left_pad = total_padding // 2
         right_pad = total_padding - left_pad
         lines.append(f"│ {' ' * left_pad}{line_colored}{' ' * right_pad} │")
+        if query is not None:
+            # Filter row: "│ /query▏        12 matches │"
+            inner_width = width - 4
+            count = f"{sum(len(m) for m in matches.values())} matches"
+            text = f"/{query}▏"[-max(1, inner_width - len(count) - 1):]
+            padding = ' ' * max(1, inner_width - display_width(text) - len(count))
+            lines.append(f"│ {ECOLORS.WARNING}{text}{Style.RESET_ALL}{padding}{Fore.LIGHTBLACK_EX}{count}{Style.RESET_ALL} │")
         lines.append(f"├{'─' * (width - 2)}┤")
         return lines
 
-    def draw_tabs(width):
-        for line in build_tabs_lines(width):
-            sys.stdout.write(line + '\n')
-
-    def is_separator(item):
-        """Check if item is a separator (empty string or special separator key)."""
-        s = str(item)
-        return s == '' or s.startswith('\x00sep')
-
     def build_items_lines(items, width):
         """Build item lines as strings instead of printing."""
         lines = []
         inner_width = width - 4  # space for "│ " and " │"
         if not items:
-            lines.append(f"│ (empty){' ' * (inner_width - 7)} │")
+            empty = '(no matches)' if query is not None else (empty_text or {}).get(section_names[curr_section], '(empty)')
+            lines.append(f"│ {ljust(truncate(empty, inner_width), inner_width)} │")
             return lines
 
         _cur_multi = is_multi()
-        sel_list = selected.get(curr_section, [False] * len(items)) if _cur_multi else None
-
-        for idx, item in enumerate(items):
+        sel_list = selected.get(curr_section) if _cur_multi else None
+
+        start, end = visible_range(items)
+        scrolling = end - start < len(items)
+        if scrolling:
+            lines.append(f"│ {_scroll_indicator('▲', start, inner_width)} │")
+        for idx in range(start, end):
+            item = items[idx]
             if is_separator(item):
                 line_len = inner_width - 4
                 lines.append(f"│ {'  '}{'─' * line_len}{'  '} │")
@@ -409,25 +452,33 @@ def sectioned_select(sections, multi=False):
             arrow = '→ ' if idx == curr_item else '  '
             chosen = ''
             if _cur_multi:
-                chosen = ' [√] ' if sel_list[idx] else ' [ ] '
-                color = ECOLORS.OKGREEN if sel_list[idx] else ''
+                is_chosen = sel_list[orig(idx)]
+                chosen = ' [√] ' if is_chosen else ' [ ] '
+                color = ECOLORS.OKGREEN if is_chosen else ''
             if idx == curr_item:
                 color = ECOLORS.OKBLUE
             content = f"{arrow}{chosen}{item}"
-            padding = ' ' * max(0, inner_width - len(content))
+            padding = ' ' * max(0, inner_width - display_width(content))
             lines.append(f"│ {color}{content}{Style.RESET_ALL}{padding} │")
+        if scrolling:
+            lines.append(f"│ {_scroll_indicator('▼', len(items) - end, inner_width)} │")
         return lines
 
-    def draw_items(items, width):
-        lines = build_items_lines(items, width)
-        for line in lines:
-            sys.stdout.write(line + '\n')
-        return len(lines)
+    def page(direction, items):
+        """Move the cursor by one screenful, landing on a selectable item."""
+        start, end = visible_range(items)
+        target = max(0, min(len(items) - 1, curr_item + direction * max(1, end - start - 1)))
+        if is_separator(items[target]):
+            target = find_next_selectable(target, direction, items)
+        return target
 
     def find_next_selectable(start, direction, items):
         """Find the next non-separator item in the given direction."""
         if not items:
             return start
+        if items is get_current_items():
+            sec = layout.sections[curr_section]
+            return (sec.next if direction > 0 else sec.prev)[start]
         count = len(items)
         pos = start
         for _ in range(count):
@@ -438,19 +489,71 @@ def sectioned_select(sections, multi=False):
 
     def find_first_selectable(items):
         """Find the first non-separator item."""
-        for i, item in enumerate(items):
-            if not is_separator(item):
+        if items is get_current_items():
+            selectable = layout.sections[curr_section].selectable
+            return selectable[0] if selectable else 0
+        for i in range(len(items)):
+            if not is_separator(items[i]):
                 return i
         return 0
 
-    def clear_lines(num_lines, width):
-        """Clear extra lines when switching to a section with fewer items."""
-        for _ in range(num_lines):
-            sys.stdout.write(' ' * width + '\n')
-
-    def get_total_lines(items):
-        # top border + tabs line + separator + items + bottom border
-        return 3 + max(len(items), 1) + 1
+    def init_selection():
+        """Initialize selection list for the current section if needed."""
+        if is_multi() and curr_section not in selected:
+            selected[curr_section] = [False] * len(get_current_items())
+
+    def next_section(direction):
+        """Index of the next section in direction (skipping sections without matches while filtering)."""
+        section = curr_section
+        for _ in range(len(section_names)):
+            section = (section + direction) % len(section_names)
+            if query is None or matches.get(section):
+                return section
+        return curr_section
+
+    def build_index():
+        built = SearchIndex()
+        for section_idx in range(len(section_names)):
+            built.add_section(section_idx, get_section_items(section_idx))
+        return built
+
+    def apply_filter(text):
+        """Set the filter text and move the cursor to a match (keeping the current item if it still matches)."""
+        nonlocal query, curr_section, curr_item
+        current = orig(curr_item) if get_view_items() else None
+        query = text
+        matches.clear()
+        for section_idx, item_idx in search.index.keys(search.update(text)):
+            matches.setdefault(section_idx, []).append(item_idx)
+        scroll_tops.clear()
+        if not matches.get(curr_section):
+            curr_section = next_section(1)
+        found = matches.get(curr_section, [])
+        curr_item = found.index(current) if current in found else 0
+        init_selection()
+
+    def reload():
+        """Pick up sections that changed in place (see refresh), keeping the cursor where it is."""
+        nonlocal layout, width, search, curr_item
+        layout = layout.sync(sections, multi)
+        width = get_max_width()
+        for section_idx, sel_list in selected.items():
+            sel_list.extend([False] * (len(get_section_items(section_idx)) - len(sel_list)))
+        if query is not None:
+            search = SearchFilter(index if index is not None else build_index())
+            apply_filter(query)
+        elif get_current_items():
+            curr_item = min(curr_item, len(get_current_items()) - 1)
+            if is_separator(get_current_items()[curr_item]):
+                curr_item = find_first_selectable(get_current_items())
+
+    def end_filter():
+        """Leave filter mode, keeping the cursor on the same item."""
+        nonlocal query, search, curr_item
+        curr_item = orig(curr_item) if get_view_items() else find_first_selectable(get_current_items())
+        query = search = None
+        matches.clear()
+        scroll_tops.clear()
 
     width = get_max_width()
 
@@ -462,12 +565,8 @@ def sectioned_select(sections, multi=False):
         curr_item = find_first_selectable(initial_items)
 
     while True:
-        items = get_current_items()
-        curr_total_lines = get_total_lines(items)
-
-        # Initialize selection list for this section if needed
-        if is_multi() and curr_section not in selected:
-            selected[curr_section] = [False] * len(items)
+        items = get_view_items()
+        init_selection()
 
         # Build and store menu lines for popup overlay support (including banner)
         menu_lines = []
@@ -477,85 +576,162 @@ def sectioned_select(sections, multi=False):
         # Include banner in saved state for proper popup positioning
         _last_menu_render = _banner_lines + menu_lines
 
-        # Draw the banner (if registered) and menu
-        # On first draw, include banner; on redraws (cursor moved up), skip banner
-        if prev_total_lines == 0 and _banner_lines:
-            for line in _banner_lines:
-                sys.stdout.write(line + '\n')
-        for line in menu_lines:
-            sys.stdout.write(line + '\n')
-
-        # Clear any extra lines from previous section if it was longer
-        extra_lines = prev_total_lines - curr_total_lines
-        if extra_lines > 0:
-            clear_lines(extra_lines, width)
-            # Move cursor back up after clearing
-            sys.stdout.write('\x1b[{0}A'.format(extra_lines))
-
-        key_code = get_key()
-
-        if key_code == KEY_ENTER or key_code == KEY_LF:
-            if not items or is_separator(items[curr_item]):
-                sys.stdout.write('\x1b[{0}A'.format(curr_total_lines))
+        # Draw the banner (if registered) and menu; unchanged rows are skipped
+        renderer.render(_last_menu_render)
+
+        for key_code in _term.keys():
+            if key_code == KEY_REFRESH:
+                if refresh is not None and refresh():
+                    reload()
+                    items = get_view_items()
+                continue
+            if key_code == KEY_RESIZE:
+                # Redrawn after this batch, with the item window fitted to the new height
+                renderer.resized()
+                scroll_tops.clear()
+                continue
+            if query is not None:
+                # Filter mode: text keys edit the filter, navigation keys work as usual
+                if key_code == KEY_ESC or (key_code == KEY_BACKSPACE and not query):
+                    end_filter()
+                    items = get_view_items()
+                    continue
+                if key_code == KEY_BACKSPACE:
+                    apply_filter(query[:-1])
+                    items = get_view_items()
+                    continue
+                if key_code < 0x110000 and chr(key_code).isprintable():
+                    apply_filter(query + chr(key_code))
+                    items = get_view_items()
+                    continue
+            elif key_code == ord('/'):
+                search = SearchFilter(index if index is not None else build_index())
+                apply_filter('')
+                items = get_view_items()
                 continue
-            if is_multi():
-                sel_list = selected.get(curr_section, [])
-                res = []
-                sec_items = sections[section_names[curr_section]]
-                t = type(sec_items)
-                for i, sel in enumerate(sel_list):
-                    if sel:
-                        res.append(items[i] if t is set else sec_items[items[i]] if t is dict else sec_items[i])
-                if not res:
-                    # Nothing toggled — use current cursor item
-                    res.append(items[curr_item] if t is set else sec_items[items[curr_item]] if t is dict else sec_items[curr_item])
-                print()
-                _last_section_index = curr_section
-                _last_item_index = curr_item
-                return res
-            else:
-                print()
-                _last_section_index = curr_section  # Save section before returning
-                _last_item_index = curr_item  # Save item position before returning
-                sec_items = sections[section_names[curr_section]]
-                t = type(sec_items)
-                if t is dict:
-                    return sec_items[items[curr_item]]
-                if t is set:
-                    return items[curr_item]
-                return sec_items[curr_item]
-        elif key_code == KEY_TAB or key_code == KEY_RIGHT:
-            curr_section = (curr_section + 1) % len(section_names)
-            _last_section_index = curr_section  # Save section on change
-            _last_item_index = 0  # Reset item position on section change
-            new_items = get_current_items()
-            curr_item = find_first_selectable(new_items)
-        elif key_code == KEY_SHIFT_TAB or key_code == KEY_LEFT:
-            curr_section = (curr_section - 1) % len(section_names)
-            _last_section_index = curr_section  # Save section on change
-            _last_item_index = 0  # Reset item position on section change
-            new_items = get_current_items()
-            curr_item = find_first_selectable(new_items)
-        elif is_multi() and key_code == KEY_SPACE and items and not is_separator(items[curr_item]):
-            selected[curr_section][curr_item] = not selected[curr_section][curr_item]
-        elif key_code == KEY_UP and items:
-            curr_item = find_next_selectable(curr_item, -1, items)
-        elif key_code == KEY_DOWN and items:
-            curr_item = find_next_selectable(curr_item, 1, items)
-        elif key_code == KEY_HOME and items:
-            curr_item = find_first_selectable(items)
-        elif key_code == KEY_END and items:
-            # Find last selectable
-            for i in range(len(items) - 1, -1, -1):
-                if not is_separator(items[i]):
-                    curr_item = i
-                    break
-        elif key_code == KEY_ESC or key_code == KEY_CTRL_C:
-            exit()
-
-        # Move cursor up to redraw
-        sys.stdout.write('\x1b[{0}A'.format(curr_total_lines))
-        prev_total_lines = curr_total_lines
+
+            if key_code == KEY_ENTER or key_code == KEY_LF:
+                if not items or is_separator(items[curr_item]):
+                    continue
+                all_items = get_current_items()
+                item_idx = orig(curr_item)
+                if is_multi():
+                    sel_list = selected.get(curr_section, [])
+                    res = []
+                    sec_items = sections[section_names[curr_section]]
+                    t = type(sec_items)
+                    for i, sel in enumerate(sel_list):
+                        if sel:
+                            res.append(all_items[i] if t is set else sec_items[all_items[i]] if t is dict else sec_items[i])
+                    if not res:
+                        # Nothing toggled — use current cursor item
+                        res.append(all_items[item_idx] if t is set else sec_items[all_items[item_idx]] if t is dict else sec_items[item_idx])
+                    print()
+                    _last_section_index = curr_section
+                    _last_item_index = item_idx
+                    return res
+                else:
+                    print()
+                    _last_section_index = curr_section  # Save section before returning
+                    _last_item_index = item_idx  # Save item position before returning
+                    sec_items = sections[section_names[curr_section]]
+                    t = type(sec_items)
+                    if t is dict:
+                        return sec_items[all_items[item_idx]]
+                    if t is set:
+                        return all_items[item_idx]
+                    return sec_items[item_idx]
+            elif key_code == KEY_TAB or key_code == KEY_RIGHT or key_code == KEY_SHIFT_TAB or key_code == KEY_LEFT:
+                direction = 1 if key_code == KEY_TAB or key_code == KEY_RIGHT else -1
+                curr_section = next_section(direction)
+                _last_section_index = curr_section  # Save section on change
+                _last_item_index = 0  # Reset item position on section change
+                # Later keys of the same batch act on the new section
+                items = get_view_items()
+                curr_item = find_first_selectable(items)
+                init_selection()
+            elif is_multi() and key_code == KEY_SPACE and items and not is_separator(items[curr_item]):
+                item_idx = orig(curr_item)
+                selected[curr_section][item_idx] = not selected[curr_section][item_idx]
+            elif key_code == KEY_UP and items:
+                curr_item = find_next_selectable(curr_item, -1, items)
+            elif key_code == KEY_DOWN and items:
+                curr_item = find_next_selectable(curr_item, 1, items)
+            elif key_code == KEY_HOME and items:
+                curr_item = find_first_selectable(items)
+            elif key_code == KEY_END and items:
+                # Find last selectable
+                if query is None:
+                    selectable = layout.sections[curr_section].selectable
+                    curr_item = selectable[-1] if selectable else curr_item
+                else:
+                    for i in range(len(items) - 1, -1, -1):
+                        if not is_separator(items[i]):
+                            curr_item = i
+                            break
+            elif key_code == KEY_PGUP and items:
+                curr_item = page(-1, items)
+            elif key_code == KEY_PGDN and items:
+                curr_item = page(1, items)
+            elif key_code == KEY_ESC or key_code == KEY_CTRL_C:
+                sys.exit()  # the builtin exit() closes stdin, which the raw session restores
+
+def _popup_box(title, lst, curr, inner_width, loading=False, top=0, rows=None):
+    """Lines of a popup box: title bar, then the items with curr highlighted (all grey while loading).
+    With rows, only items top..top+rows are shown, between '▲ n more' / '▼ n more' rows."""
+    # Box drawing characters (single-line for lighter appearance)
+    TL, TR, BL, BR = '┌', '┐', '└', '┘'
+    H, V = '─', '│'
+    LT, RT = '├', '┤'
+
+    # Colors
+    BC = Fore.LIGHTBLUE_EX  # Border color
+    BG = Back.BLACK  # Dark background for contrast
+
+    lines = []
+    # Top border
+    lines.append(f"{BG}{BC}{TL}{H * inner_width}{TR}{Style.RESET_ALL}")
+
+    # Title bar (truncate if needed, no bold)
+    display_title = truncate(title, inner_width-2)
+    title_padding = (inner_width - display_width(display_title)) // 2
+    title_line = ljust(' ' * title_padding + display_title, inner_width)
+    lines.append(f"{BG}{BC}{V}{Fore.WHITE}{title_line}{BC}{V}{Style.RESET_ALL}")
+
+    # Separator
+    lines.append(f"{BG}{BC}{LT}{H * inner_width}{RT}{Style.RESET_ALL}")
+
+    scrolling = rows is not None and rows < len(lst)
+    start, end = (top, min(len(lst), top + rows)) if scrolling else (0, len(lst))
+
+    def indicator(arrow, hidden):
+        text = f"{arrow} {hidden} more" if hidden else ''
+        return f"{BG}{BC}{V}{Fore.LIGHTBLACK_EX}{text:^{inner_width}}{BC}{V}{Style.RESET_ALL}"
+
+    # Items
+    if scrolling:
+        lines.append(indicator('▲', start))
+    for idx in range(start, end):
+        item = lst[idx]
+        # Truncate item if too long
+        max_item_display = inner_width - 4  # " › " or "   " takes 3, plus 1 padding
+        item_str = truncate(str(item), max_item_display, '..')
+
+        if loading:
+            color, arrow = Fore.LIGHTBLACK_EX, '   '
+        elif idx == curr:
+            color, arrow = Fore.LIGHTBLUE_EX, ' › '
+        else:
+            color, arrow = Fore.WHITE, '   '
+        content_padded = ljust(f"{arrow}{item_str}", inner_width)
+        lines.append(f"{BG}{BC}{V}{color}{content_padded}{BC}{V}{Style.RESET_ALL}")
+    if scrolling:
+        lines.append(indicator('▼', len(lst) - end))
+
+    # Bottom border
+    lines.append(f"{BG}{BC}{BL}{H * inner_width}{BR}{Style.RESET_ALL}")
+    return lines
+
 
 def restore_menu_with_popup(title, selected_item, items, width=None):
     """
@@ -568,11 +744,6 @@ def restore_menu_with_popup(title, selected_item, items, width=None):
         items: The items dict that was shown in the popup
         width: Optional width override
     """
-    import re
-
-    def strip_ansi(text):
-        return re.sub(r'\x1b\[[0-9;]*m', '', text)
-
     background_lines = get_last_menu_render()
     if not background_lines:
         return
@@ -587,11 +758,14 @@ def restore_menu_with_popup(title, selected_item, items, width=None):
             curr = i
             break
 
-    bg_width = max(len(strip_ansi(line)) for line in background_lines) if background_lines else 40
+    # Background is dimmed, except the row of the menu's own cursor
+    keep = {i for i, line in enumerate(background_lines) if '→' in line}
+    screen = Compositor(background_lines, style=Fore.LIGHTBLACK_EX, keep=keep)
+    bg_width = screen.width or 40
 
     # Calculate popup dimensions
-    max_item_len = max(len(str(item)) for item in lst)
-    title_len = len(title)
+    max_item_len = max(display_width(str(item)) for item in lst)
+    title_len = display_width(title)
     inner_width = max(max_item_len + 4, title_len + 2)
 
     if width is not None:
@@ -602,87 +776,15 @@ def restore_menu_with_popup(title, selected_item, items, width=None):
         inner_width = max_popup_width
 
     popup_width = inner_width + 2
-
-    # Box drawing characters
-    TL, TR, BL, BR = '┌', '┐', '└', '┘'
-    H, V = '─', '│'
-    LT, RT = '├', '┤'
-
-    # Colors
-    BC = Fore.LIGHTBLUE_EX
-    BG = Back.BLACK
-
-    # Build popup lines
-    popup_lines = []
-    popup_lines.append(f"{BG}{BC}{TL}{H * inner_width}{TR}{Style.RESET_ALL}")
-
-    display_title = title[:inner_width-2] if len(title) > inner_width-2 else title
-    title_padding = (inner_width - len(display_title)) // 2
-    title_line = ' ' * title_padding + display_title + ' ' * (inner_width - title_padding - len(display_title))
-    popup_lines.append(f"{BG}{BC}{V}{Fore.WHITE}{title_line}{BC}{V}{Style.RESET_ALL}")
-
-    popup_lines.append(f"{BG}{BC}{LT}{H * inner_width}{RT}{Style.RESET_ALL}")
-
-    for idx, item in enumerate(lst):
-        item_str = str(item)
-        max_item_display = inner_width - 4
-        if len(item_str) > max_item_display:
-            item_str = item_str[:max_item_display-2] + '..'
-
-        if idx == curr:
-            arrow = ' › '
-            content = f"{arrow}{item_str}"
-            content_padded = content + ' ' * (inner_width - len(content))
-            popup_lines.append(f"{BG}{BC}{V}{Fore.LIGHTBLUE_EX}{content_padded}{BC}{V}{Style.RESET_ALL}")
-        else:
-            content = f"   {item_str}"
-            content_padded = content + ' ' * (inner_width - len(content))
-            popup_lines.append(f"{BG}{BC}{V}{Fore.WHITE}{content_padded}{BC}{V}{Style.RESET_ALL}")
-
-    popup_lines.append(f"{BG}{BC}{BL}{H * inner_width}{BR}{Style.RESET_ALL}")
+    popup_lines = _popup_box(title, lst, curr, inner_width)
 
     # Calculate popup position
-    popup_height = len(popup_lines)
     popup_col = max(4, (bg_width - popup_width) // 2 + 22)
-    popup_row = max(1, (len(background_lines) - popup_height) // 2)
-
-    # Merge and display
-    result = []
-    total_needed = popup_row + len(popup_lines)
-    bg_copy = background_lines.copy()
-    while len(bg_copy) < total_needed:
-        bg_copy.append(' ' * bg_width)
-
-    for i in range(len(bg_copy)):
-        bg_line = bg_copy[i]
-        bg_plain = strip_ansi(bg_line)
-        if len(bg_plain) < bg_width:
-            bg_plain = bg_plain + ' ' * (bg_width - len(bg_plain))
-
-        is_selected_line = '→' in bg_plain
-
-        popup_idx = i - popup_row
-        if 0 <= popup_idx < len(popup_lines):
-            popup_line = popup_lines[popup_idx]
-            popup_plain_len = len(strip_ansi(popup_line))
-
-            left_bg = bg_plain[:popup_col]
-            right_start = popup_col + popup_plain_len
-            right_bg = bg_plain[right_start:bg_width]
-
-            if is_selected_line:
-                merged = f"{ECOLORS.OKBLUE}{left_bg}{Style.RESET_ALL}{popup_line}{ECOLORS.OKBLUE}{right_bg}{Style.RESET_ALL}"
-            else:
-                merged = f"{Fore.LIGHTBLACK_EX}{left_bg}{Style.RESET_ALL}{popup_line}{Fore.LIGHTBLACK_EX}{right_bg}{Style.RESET_ALL}"
-            result.append(merged)
-        else:
-            if is_selected_line:
-                result.append(bg_line)
-            else:
-                result.append(f"{Fore.LIGHTBLACK_EX}{bg_plain}{Style.RESET_ALL}")
+    popup_row = max(1, (len(background_lines) - len(popup_lines)) // 2)
+    screen.set_layer('popup', popup_row, popup_col, popup_lines)
 
     # Print the merged display
-    for line in result:
+    for line in screen.lines():
         sys.stdout.write(line + '\n')
     sys.stdout.flush()
 
@@ -703,19 +805,20 @@ def calc_popup_width(*item_sets):
         t = type(items)
         lst = list(items.keys()) if t is dict else list(items) if t is set else items
         for item in lst:
-            if len(str(item)) > max_len:
-                max_len = len(str(item))
+            max_len = max(max_len, display_width(str(item)))
     return max_len + 4  # +4 for arrow and padding
 
 
-def popup_select(title, items, background_lines=None, return_key=False, width=None, clear_on_select=False, keep_display=False, stack_display=False, no_restore_on_esc=False, row_offset=0, popup_col=None, initial_index=0):
+@_raw_input
+def popup_select(title, items, background_lines=None, return_key=False, width=None, clear_on_select=False, keep_display=False, stack_display=False, no_restore_on_esc=False, row_offset=0, popup_col=None, initial_index=0, on_highlight=None):
     """
     Display a popup dialog that overlays on top of existing content.
     The popup is drawn over the background, which is redrawn each frame.
 
     Args:
         title: The title to display in the popup header
-        items: dict {display_label: value} or list of items
+        items: dict {display_label: value} or list of items, or a loader.Result of them
+               (a loading placeholder is shown until it resolves; Esc still cancels)
         background_lines: list of strings representing the background (auto-detected if None)
         return_key: if True, return the key instead of value (for dict)
         width: optional fixed width for the popup
@@ -726,265 +829,189 @@ def popup_select(title, items, background_lines=None, return_key=False, width=No
         row_offset: additional row offset for popup position (for stacked modals)
         popup_col: absolute column position for popup (if None, auto-calculated)
         initial_index: initial cursor position (for restoring position when going back)
+        on_highlight: optional callable(key) called when the cursor lands on an item
+                      (e.g. to prefetch what the next step will need)
 
     Returns:
         Selected value (or key if return_key=True), or None if cancelled
     """
-    import re
+    global _last_menu_render
+    from .loader import Result
 
+    pending = items if isinstance(items, Result) else None
+    if pending is not None:
+        if pending.done():
+            items, pending = pending.result(), None
+        else:
+            items = [_LOADING]
     if not items:
         return None
 
-    t = type(items)
-    lst = list(items.keys()) if t is dict else list(items) if t is set else items
-    # Use initial_index but clamp to valid range
-    curr = min(initial_index, len(lst) - 1) if lst else 0
-
-    def strip_ansi(text):
-        """Remove ANSI escape codes from text for length calculation."""
-        return re.sub(r'\x1b\[[0-9;]*m', '', text)
-
     # Use last rendered menu as background if not provided
     if background_lines is None:
         background_lines = get_last_menu_render()
         if not background_lines:
             background_lines = [''] * 10
 
-    # Get the width of the background menu
-    bg_width = max(len(strip_ansi(line)) for line in background_lines) if background_lines else 40
-
-    # Calculate popup dimensions - fit within the menu
-    max_item_len = max(len(str(item)) for item in lst)
-    title_len = len(title)
-    inner_width = max(max_item_len + 4, title_len + 2)
-
-    # Apply explicit width if provided
-    if width is not None:
-        inner_width = width
-
-    # Ensure popup fits within menu (leave 4 chars margin on each side)
-    # Skip this constraint when popup_col is specified (popup is outside the menu)
-    if popup_col is None:
-        max_popup_width = bg_width - 8
-        if inner_width > max_popup_width:
-            inner_width = max_popup_width
-
-    popup_width = inner_width + 2  # +2 for borders
-
-    # Box drawing characters (single-line for lighter appearance)
-    TL, TR, BL, BR = '┌', '┐', '└', '┘'
-    H, V = '─', '│'
-    LT, RT = '├', '┤'
-
-    def build_popup_lines():
-        """Build the popup box lines."""
-        lines = []
-
-        # Colors
-        BC = Fore.LIGHTBLUE_EX  # Border color
-        BG = Back.BLACK  # Dark background for contrast
-
-        # Top border
-        lines.append(f"{BG}{BC}{TL}{H * inner_width}{TR}{Style.RESET_ALL}")
-
-        # Title bar (truncate if needed, no bold)
-        display_title = title[:inner_width-2] if len(title) > inner_width-2 else title
-        title_padding = (inner_width - len(display_title)) // 2
-        title_line = ' ' * title_padding + display_title + ' ' * (inner_width - title_padding - len(display_title))
-        lines.append(f"{BG}{BC}{V}{Fore.WHITE}{title_line}{BC}{V}{Style.RESET_ALL}")
-
-        # Separator
-        lines.append(f"{BG}{BC}{LT}{H * inner_width}{RT}{Style.RESET_ALL}")
-
-        # Items
-        for idx, item in enumerate(lst):
-            item_str = str(item)
-            # Truncate item if too long
-            max_item_display = inner_width - 4  # " › " or "   " takes 3, plus 1 padding
-            if len(item_str) > max_item_display:
-                item_str = item_str[:max_item_display-2] + '..'
-
-            if idx == curr:
-                arrow = ' › '
-                content = f"{arrow}{item_str}"
-                content_padded = content + ' ' * (inner_width - len(content))
-                lines.append(f"{BG}{BC}{V}{Fore.LIGHTBLUE_EX}{content_padded}{BC}{V}{Style.RESET_ALL}")
-            else:
-                content = f"   {item_str}"
-                content_padded = content + ' ' * (inner_width - len(content))
-                lines.append(f"{BG}{BC}{V}{Fore.WHITE}{content_padded}{BC}{V}{Style.RESET_ALL}")
-
-        # Bottom border
-        lines.append(f"{BG}{BC}{BL}{H * inner_width}{BR}{Style.RESET_ALL}")
-
-        return lines
-
-    def merge_popup_with_background(bg_lines, popup_lines, popup_row, popup_col):
-        """Merge popup on top of background, creating the overlay effect."""
-        result = []
-
-        # Ensure we have enough background lines
-        total_needed = popup_row + len(popup_lines)
-        while len(bg_lines) < total_needed:
-            bg_lines.append(' ' * bg_width)
-
-        for i in range(len(bg_lines)):
-            bg_line = bg_lines[i]
-            bg_plain = strip_ansi(bg_line)
-            # Pad to bg_width
-            if len(bg_plain) < bg_width:
-                bg_plain = bg_plain + ' ' * (bg_width - len(bg_plain))
-
-            # Check if this line contains the selected item (has >arrow)
-            is_selected_line = '→' in bg_plain
-
-            popup_idx = i - popup_row
-            if 0 <= popup_idx < len(popup_lines):
-                # This line has popup content - merge it
-                popup_line = popup_lines[popup_idx]
-                popup_plain_len = len(strip_ansi(popup_line))
-
-                # Get left portion of background
-                left_bg = bg_plain[:popup_col]
-
-                # Get right portion of background
-                right_start = popup_col + popup_plain_len
-                right_bg = bg_plain[right_start:bg_width]
-
-                # Background portions are always dimmed
-                # Each popup handles its own selection highlighting internally
-                left_colored = f"{Fore.LIGHTBLACK_EX}{left_bg}{Style.RESET_ALL}"
-                right_colored = f"{Fore.LIGHTBLACK_EX}{right_bg}{Style.RESET_ALL}"
-
-                # Popup line already has its own coloring (selected item is light blue)
-                merged = f"{left_colored}{popup_line}{right_colored}"
-                result.append(merged)
-            else:
-                # No popup on this line - dim everything in background
-                # Only the current (topmost) popup should show colors
-                result.append(f"{Fore.LIGHTBLACK_EX}{bg_plain}{Style.RESET_ALL}")
+    # Background parsed once and dimmed: only the current (topmost) popup shows colors.
+    # Each key press then recomposes just the popup rows that changed.
+    screen = Compositor(background_lines, style=Fore.LIGHTBLACK_EX)
 
-        return result
-
-    # Calculate popup position
-    popup_lines_built = build_popup_lines()
-    popup_height = len(popup_lines_built)
-    # Use absolute position if provided, otherwise center + shift right
-    if popup_col is None:
-        popup_col = max(4, (bg_width - popup_width) // 2 + 22)
-
-    # Position popup to overlap with middle of MENU portion (not banner)
-    # Banner is at the top, so offset popup_row by banner height
-    banner_height = len(_banner_lines)
-    menu_height = len(background_lines) - banner_height
-    popup_row = banner_height + max(1, (menu_height - popup_height) // 2) + row_offset
-
-    num_bg_lines = len(background_lines)
-
-    # Move cursor up to overwrite the menu area
-    # +1 accounts for the newline from sectioned_select's print() or previous popup's trailing newline
-    sys.stdout.write(f'\x1b[{num_bg_lines + 1}A')
+    # Get the width of the background menu
+    bg_width = screen.width if background_lines else 40
+    fixed_col = popup_col
 
-    first_draw = True
-    drawn_lines = 0
+    def layout(new_items):
+        """Set the items, cursor and popup geometry (again once pending items arrive)."""
+        nonlocal items, t, lst, curr, inner_width, popup_width, popup_row, popup_col
+        items = new_items
+        t = type(items)
+        lst = list(items.keys()) if t is dict else list(items) if t is set else items
+        # Use initial_index but clamp to valid range
+        curr = min(initial_index, len(lst) - 1) if lst else 0
+
+        # Calculate popup dimensions - fit within the menu
+        max_item_len = max(display_width(str(item)) for item in lst)
+        title_len = display_width(title)
+        inner_width = max(max_item_len + 4, title_len + 2)
+
+        # Apply explicit width if provided
+        if width is not None:
+            inner_width = width
+
+        # Ensure popup fits within menu (leave 4 chars margin on each side)
+        # Skip this constraint when popup_col is specified (popup is outside the menu)
+        if fixed_col is None:
+            max_popup_width = bg_width - 8
+            if inner_width > max_popup_width:
+                inner_width = max_popup_width
+
+        popup_width = inner_width + 2  # +2 for borders
+
+        # Use absolute position if provided, otherwise center + shift right
+        popup_col = fixed_col if fixed_col is not None else max(4, (bg_width - popup_width) // 2 + 22)
+
+        # Position popup to overlap with middle of MENU portion (not banner)
+        # Banner is at the top, so offset popup_row by banner height
+        banner_height = len(_banner_lines)
+        menu_height = len(background_lines) - banner_height
+        popup_row = banner_height + max(1, (menu_height - (len(lst) + 4)) // 2) + row_offset
+        fit()
+
+    def fit():
+        """Show only as many items as fit the terminal below the popup's top; the rest scroll."""
+        nonlocal rows, top
+        # Title bar, separator, borders and the line below the display take 5 rows
+        room = terminal().size.lines - popup_row - 5
+        rows = None if len(lst) <= room else max(1, room - 2)  # 2 rows for the scroll indicators
+        top = 0 if rows is None else _scroll_window(curr, top, len(lst), rows)
+
+    t = lst = curr = inner_width = popup_width = popup_row = rows = None
+    top = 0
+    layout(items)
+
+    if not in_full_screen():
+        # Step back over the newline from sectioned_select's print() or previous popup's
+        # trailing newline; the background is what's on screen right above the cursor
+        sys.stdout.write('\x1b[1A')
+    renderer = screen_renderer(background_lines)
+    highlighted = None
 
     while True:
-        popup_lines_built = build_popup_lines()
-
-        # Merge popup with background
-        display = merge_popup_with_background(
-            background_lines.copy(),
-            popup_lines_built,
-            popup_row,
-            popup_col
-        )
-
-        # Move cursor up if redrawing
-        if not first_draw:
-            sys.stdout.write(f'\x1b[{drawn_lines}A')
-        first_draw = False
-
-        # Draw merged content
-        for line in display:
-            sys.stdout.write('\x1b[2K')  # Clear line
-            sys.stdout.write(line + '\n')
-        sys.stdout.flush()
-
-        drawn_lines = len(display)
+        if pending is not None and pending.done():
+            pending, loaded = None, pending.result()
+            if not loaded:
+                # Nothing to choose from: same as cancelling
+                if no_restore_on_esc:
+                    _last_menu_render = screen.lines()
+                else:
+                    renderer.render(background_lines)
+                    sys.stdout.write('\n')
+                    sys.stdout.flush()
+                return None
+            layout(loaded)
+        if on_highlight is not None and pending is None and lst[curr] != highlighted:
+            highlighted = lst[curr]
+            on_highlight(highlighted)
+
+        if rows is not None:
+            top = _scroll_window(curr, top, len(lst), rows)
+        screen.set_layer('popup', popup_row, popup_col,
+                         _popup_box(title, lst, curr, inner_width, pending is not None, top, rows))
+
+        # Draw merged content (only rows that changed, usually the two arrow rows)
+        screen.draw(renderer)
+
+        if pending is not None:
+            # Loading: only Esc/Ctrl+C do anything; poll so the items show up as soon as they arrive
+            key_code = _term.read_key(timeout=0.05)
+            if key_code == KEY_RESIZE:
+                fit()
+                renderer.resized()
+            if key_code == KEY_ESC or key_code == KEY_CTRL_C:
+                if no_restore_on_esc:
+                    _last_menu_render = screen.lines()  # what's on screen, for the caller's cleanup
+                else:
+                    renderer.render(background_lines)
+                    sys.stdout.write('\n')
+                    sys.stdout.flush()
+                return None
+            continue
 
         # Get input
-        key_code = get_key()
-
-        if key_code == KEY_ENTER or key_code == KEY_LF:
-            if keep_display or stack_display:
-                # Keep display as-is, just add newline to position cursor below
-                sys.stdout.write('\n')
-                sys.stdout.flush()
-                if stack_display:
-                    # Save the current merged display as background for next popup
-                    global _last_menu_render
-                    _last_menu_render = display.copy()
-            elif clear_on_select:
-                # Clear all lines instead of restoring background
-                sys.stdout.write(f'\x1b[{drawn_lines}A')
-                for _ in range(drawn_lines):
-                    sys.stdout.write('\x1b[2K\n')
-                # Move cursor back to top
-                sys.stdout.write(f'\x1b[{drawn_lines}A')
-                sys.stdout.flush()
-            else:
-                # Restore background (main menu) so it stays visible
-                sys.stdout.write(f'\x1b[{drawn_lines}A')
-                for line in background_lines:
-                    sys.stdout.write('\x1b[2K' + line + '\n')
-                # Clear any extra lines if popup extended beyond background
-                extra = drawn_lines - num_bg_lines
-                if extra > 0:
-                    for _ in range(extra):
-                        sys.stdout.write('\x1b[2K\n')
-                    # Move cursor back up so it's just below the background
-                    sys.stdout.write(f'\x1b[{extra}A')
-                # Add newline to match sectioned_select behavior (for +1 offset if another popup follows)
-                sys.stdout.write('\n')
-                sys.stdout.flush()
-
-            if return_key:
+        for key_code in _term.keys():
+            if key_code == KEY_ENTER or key_code == KEY_LF:
+                if keep_display or stack_display:
+                    # Keep display as-is, just add newline to position cursor below
+                    sys.stdout.write('\n')
+                    sys.stdout.flush()
+                    if stack_display:
+                        # Save the current merged display as background for next popup
+                        _last_menu_render = screen.lines()
+                elif clear_on_select:
+                    # Clear all lines instead of restoring background, cursor back to top
+                    renderer.clear()
+                else:
+                    # Restore background (main menu) so it stays visible,
+                    # clearing any extra lines if popup extended beyond background
+                    renderer.render(background_lines)
+                    # Add newline to match sectioned_select behavior (for +1 offset if another popup follows)
+                    sys.stdout.write('\n')
+                    sys.stdout.flush()
+
+                if return_key:
+                    return lst[curr]
+                if t is dict:
+                    return items[lst[curr]]
                 return lst[curr]
-            if t is dict:
-                return items[lst[curr]]
-            return lst[curr]
 
-        elif key_code == KEY_UP:
-            curr = (curr - 1) % len(lst)
+            elif key_code == KEY_UP:
+                curr = (curr - 1) % len(lst)
 
-        elif key_code == KEY_DOWN:
-            curr = (curr + 1) % len(lst)
+            elif key_code == KEY_DOWN:
+                curr = (curr + 1) % len(lst)
 
-        elif key_code == KEY_HOME:
-            curr = 0
+            elif key_code == KEY_HOME:
+                curr = 0
 
-        elif key_code == KEY_END:
-            curr = len(lst) - 1
+            elif key_code == KEY_END:
+                curr = len(lst) - 1
 
-        elif key_code == KEY_ESC or key_code == KEY_CTRL_C:
-            if no_restore_on_esc:
-                # Caller will handle cleanup
+            elif key_code == KEY_RESIZE:
+                fit()
+                renderer.resized()
+
+            elif key_code == KEY_ESC or key_code == KEY_CTRL_C:
+                if no_restore_on_esc:
+                    # Caller will handle cleanup, given what's on screen
+                    _last_menu_render = screen.lines()
+                    return None
+                # Restore background, clearing any extra lines if popup extended beyond it
+                renderer.render(background_lines)
+                # Add newline to position cursor below the restored display
+                sys.stdout.write('\n')
+                sys.stdout.flush()
                 return None
-            # Move cursor up and restore background
-            sys.stdout.write(f'\x1b[{drawn_lines}A')
-            for line in background_lines:
-                sys.stdout.write('\x1b[2K' + line + '\n')
-            # Clear any extra lines if popup extended beyond background
-            extra = drawn_lines - len(background_lines)
-            for _ in range(extra):
-                sys.stdout.write('\x1b[2K\n')
-            # Move cursor back to bottom of background for next popup
-            if extra > 0:
-                sys.stdout.write(f'\x1b[{extra}A')
-            # Add newline to position cursor below the restored display
-            sys.stdout.write('\n')
-            sys.stdout.flush()
-            return None
 
 
 init()
\ No newline at end of file
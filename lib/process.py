@@ -0,0 +1,556 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import os
+import sys
+import threading
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from .ansi import Fore, Style
+
+# Longest partial line kept before it is flushed without a newline
+MAX_LINE_BYTES = 64 * 1024
+
+# Exit code of a command killed by its time limit (same as coreutils timeout)
+TIMEOUT_EXIT = 124
+# Exit code of a Python callable stopped with Ctrl+C (as a shell reports SIGINT)
+INTERRUPTED_EXIT = 130
+# Seconds a process group gets to exit before the next, harsher signal
+# (SIGTERM -> SIGKILL on timeout, SIGINT -> SIGTERM -> SIGKILL on cancel)
+KILL_GRACE = 2.0
+# Seconds a finished command's pipes get to reach EOF before they are closed
+# (a background child it started may hold them open indefinitely)
+DRAIN_GRACE = 1.0
+
+_TAG_COLORS = [Fore.CYAN, Fore.MAGENTA, Fore.YELLOW, Fore.GREEN, Fore.BLUE, Fore.LIGHTRED_EX]
+
+_local = threading.local()
+_active_mux = None
+_running = {}  # {pid: Popen} of spawned commands that haven't been waited for
+_cancel = threading.Event()
+_interruptible = 0  # depth of interruptible() blocks in the main thread
+
+# Resource usage of the commands a task waited for (their process trees included):
+# CPU seconds in user and kernel mode, peak RSS in KB, blocks read / written,
+# voluntary / involuntary context switches
+Usage = namedtuple('Usage', ['user', 'system', 'max_rss', 'inblock', 'oublock', 'nvcsw', 'nivcsw'])
+
+
+def shell_argv(cmd: str) -> list:
+    """Argument list running cmd through bash on Windows/MSYS, /bin/sh elsewhere."""
+    if sys.platform == 'win32':
+        import shutil
+        return [shutil.which('bash') or 'bash', '-c', cmd]
+    return ['/bin/sh', '-c', cmd]
+
+
+@contextmanager
+def tagged(tag: str):
+    """Label output of commands started by this thread (used as the line prefix)."""
+    prev = getattr(_local, 'tag', None)
+    _local.tag = tag
+    try:
+        yield
+    finally:
+        _local.tag = prev
+
+
+def current_tag() -> str:
+    return getattr(_local, 'tag', None) or 'task'
+
+
+def active_mux():
+    """The OutputMux capturing command output right now, or None (output goes to the terminal)."""
+    return _active_mux
+
+
+class _Limit:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expired = False  # set once a command was killed for running too long
+
+
+@contextmanager
+def time_limit(seconds):
+    """Limit each command started by this thread to seconds of wall-clock time
+    (None: no limit). Yields the limit; its expired flag tells whether one was killed."""
+    prev = getattr(_local, 'limit', None)
+    _local.limit = limit = _Limit(seconds)
+    try:
+        yield limit
+    finally:
+        _local.limit = prev
+
+
+def current_limit():
+    limit = getattr(_local, 'limit', None)
+    return limit if limit is not None and limit.seconds else None
+
+
+class _Meter:
+    def __init__(self):
+        self.usage = None  # Usage once a command was waited for
+
+    def add(self, ru):
+        rss = ru.ru_maxrss // 1024 if sys.platform == 'darwin' else ru.ru_maxrss  # bytes there, KB elsewhere
+        new = Usage(ru.ru_utime, ru.ru_stime, rss, ru.ru_inblock, ru.ru_oublock, ru.ru_nvcsw, ru.ru_nivcsw)
+        if self.usage is not None:
+            old = self.usage
+            new = Usage(*(max(a, b) if f == 'max_rss' else a + b for f, a, b in zip(Usage._fields, old, new)))
+        self.usage = new
+
+
+@contextmanager
+def measured():
+    """Add up the resource usage of commands this thread waits for (os.wait4, so
+    concurrent tasks don't mix). Yields the meter; its usage stays None where
+    the OS doesn't report it (Windows) or when no command ran."""
+    prev = getattr(_local, 'meter', None)
+    _local.meter = meter = _Meter()
+    try:
+        yield meter
+    finally:
+        _local.meter = prev
+
+
+def group_kwargs() -> dict:
+    """Popen arguments starting the child in its own process group, so it can be killed with its children."""
+    import subprocess
+    if sys.platform == 'win32':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    if sys.version_info >= (3, 11):
+        return {'process_group': 0}
+    return {'preexec_fn': os.setpgrp}
+
+
+def spawn(argv: list, **kwargs):
+    """Start argv in its own process group and track it until wait() returns."""
+    import subprocess
+    proc = subprocess.Popen(argv, **group_kwargs(), **kwargs)
+    _running[proc.pid] = proc
+    return proc
+
+
+def signal_group(proc, sig):
+    """Send sig to proc's process group. Windows has no groups to signal:
+    SIGINT becomes CTRL_BREAK_EVENT, anything else kills the tree with taskkill."""
+    import signal
+    if sys.platform == 'win32':
+        if sig == signal.SIGINT:
+            try:
+                proc.send_signal(signal.CTRL_BREAK_EVENT)
+            except OSError:
+                pass
+        else:
+            import subprocess
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(proc.pid)], capture_output=True)
+        return
+    try:
+        os.killpg(proc.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _reap(proc, block=True, flags=0):
+    """Wait for proc with os.wait4 and add its rusage to this thread's meter.
+    Returns the raw wait status (None while it runs, with block=False); the exit
+    code is set on proc once it exited."""
+    if proc.returncode is not None:
+        return None
+    if not hasattr(os, 'wait4'):
+        proc.wait() if block else proc.poll()
+        return None
+    try:
+        pid, status, ru = os.wait4(proc.pid, flags | (0 if block else os.WNOHANG))
+    except ChildProcessError:
+        proc.poll()  # reaped elsewhere
+        return None
+    if pid == 0:
+        return None
+    if os.WIFSTOPPED(status):
+        return status
+    meter = getattr(_local, 'meter', None)
+    if meter is not None:
+        meter.add(ru)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return status
+
+
+def _poll(proc):
+    _reap(proc, block=False)
+    return proc.returncode
+
+
+def _group_alive(pgid) -> bool:
+    if sys.platform == 'win32':
+        return False
+    try:
+        os.killpg(pgid, 0)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+
+def kill_group(proc, grace: float = KILL_GRACE):
+    """Stop proc and everything left in its process group: SIGTERM, then SIGKILL after grace seconds."""
+    import signal, time
+    signal_group(proc, signal.SIGTERM)
+    deadline = time.monotonic() + grace
+    while (_poll(proc) is None or _group_alive(proc.pid)) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    if sys.platform != 'win32':
+        signal_group(proc, signal.SIGKILL)
+    _reap(proc)
+
+
+def wait(proc, limit=None) -> int:
+    """Exit code of a spawned proc. When limit runs out first, the process group
+    is killed, limit.expired set and TIMEOUT_EXIT returned."""
+    import time
+    deadline = time.monotonic() + limit.seconds if limit is not None else None
+    try:
+        if deadline is None:
+            _reap(proc)
+        while _poll(proc) is None:
+            if time.monotonic() >= deadline:
+                kill_group(proc)
+                limit.expired = True
+                return TIMEOUT_EXIT
+            time.sleep(0.05)
+        res = proc.returncode
+    except KeyboardInterrupt:
+        kill_group(proc)  # its own process group doesn't get the terminal's Ctrl+C
+        raise
+    finally:
+        _running.pop(proc.pid, None)
+    if cancel_requested():
+        kill_group(proc)  # what it left running (background jobs of a shell ignore SIGINT)
+    return res
+
+
+@contextmanager
+def _foreground(proc):
+    """Hand the terminal to proc's process group while it runs, like a shell's foreground
+    job. Yields whether it did: only the main thread of a foreground process can."""
+    if sys.platform == 'win32' or threading.current_thread() is not threading.main_thread():
+        yield False
+        return
+    try:
+        fd = sys.stdin.fileno()
+        owner = os.isatty(fd) and os.tcgetpgrp(fd) == os.getpgrp()
+    except (OSError, ValueError):
+        owner = False
+    if not owner:
+        yield False
+        return
+    import signal
+    # Taking the terminal back as a background process would stop us with SIGTTOU
+    old = signal.signal(signal.SIGTTOU, signal.SIG_IGN)
+    try:
+        try:
+            os.tcsetpgrp(fd, proc.pid)
+            handed = True
+        except OSError:
+            handed = False  # already exited
+        yield handed
+    finally:
+        os.tcsetpgrp(fd, os.getpgrp())
+        signal.signal(signal.SIGTTOU, old)
+
+
+def _wait_foreground(proc, limit=None) -> int:
+    """wait() for a proc that owns the terminal: a Ctrl+Z there would stop it and leave
+    the launcher waiting forever, so stopped children are continued right away."""
+    import signal, time
+    deadline = time.monotonic() + limit.seconds if limit is not None else None
+    try:
+        while True:
+            status = _reap(proc, block=deadline is None, flags=os.WUNTRACED)
+            if proc.returncode is not None:
+                return proc.returncode
+            if status is not None:  # stopped
+                signal_group(proc, signal.SIGCONT)
+            elif time.monotonic() >= deadline:
+                kill_group(proc)
+                limit.expired = True
+                return TIMEOUT_EXIT
+            else:
+                time.sleep(0.05)
+    finally:
+        _running.pop(proc.pid, None)
+
+
+def run_foreground(argv: list) -> int:
+    """
+    Run argv on the terminal in its own process group and return its exit code,
+    under this thread's time limit.
+
+    The group owns the terminal while it runs, so Ctrl+C reaches only the command.
+    If it dies of that Ctrl+C, the run is cancelled (see cancellable) and whatever
+    it left running in its group is killed.
+    """
+    import signal
+    proc = spawn(argv)
+    limit = current_limit()
+    with _foreground(proc) as owns_terminal:
+        res = _wait_foreground(proc, limit) if owns_terminal else wait(proc, limit)
+    if owns_terminal and res in (-signal.SIGINT, 128 + signal.SIGINT):
+        _cancel.set()
+    if owns_terminal and cancel_requested():
+        kill_group(proc)
+    return res
+
+
+class _Canceller:
+    """Ctrl+C handler escalating SIGINT -> SIGTERM -> SIGKILL to every running command's
+    process group: the next step follows after KILL_GRACE seconds, or at the next Ctrl+C."""
+
+    def __init__(self):
+        import signal
+        self.steps = [sig for sig in (signal.SIGINT, signal.SIGTERM, getattr(signal, 'SIGKILL', None)) if sig]
+        self.step = 0
+        self.presses = 0
+        self.timer = None
+        self.lock = threading.RLock()  # a second Ctrl+C can interrupt the handler itself
+
+    def press(self, signum=None, frame=None):
+        _cancel.set()
+        # A Python callable in the main thread only stops by raising into it: right away
+        # if no command is running, else at the second Ctrl+C (signum: not the timer)
+        interrupt = _interruptible and signum is not None and (not _running or self.presses)
+        with self.lock:
+            if signum is not None:
+                self.presses += 1
+            self.stop()
+            if self.step < len(self.steps):
+                sig = self.steps[self.step]
+                self.step += 1
+                for proc in list(_running.values()):
+                    signal_group(proc, sig)
+                if self.step < len(self.steps):
+                    self.timer = threading.Timer(KILL_GRACE, self.press)
+                    self.timer.daemon = True
+                    self.timer.start()
+        if interrupt:
+            raise KeyboardInterrupt
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+@contextmanager
+def cancellable():
+    """
+    Make Ctrl+C cancel the commands started inside instead of raising KeyboardInterrupt
+    (main thread only, see interruptible() for callables). Commands get SIGINT, then
+    SIGTERM and SIGKILL if they linger; callers check cancel_requested() to start nothing new.
+    """
+    _cancel.clear()
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    import signal
+    canceller = _Canceller()
+    old = signal.signal(signal.SIGINT, canceller.press)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, old)
+        canceller.stop()
+
+
+@contextmanager
+def interruptible():
+    """
+    Let Ctrl+C raise KeyboardInterrupt inside, under cancellable(): for a Python callable
+    running in the main thread, which no signal to a process group reaches. Raised at
+    the first Ctrl+C while no command is running, else at the second.
+    """
+    global _interruptible
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    _interruptible += 1
+    try:
+        yield
+    finally:
+        _interruptible -= 1
+
+
+def cancel_requested() -> bool:
+    """True once the current run was cancelled with Ctrl+C."""
+    return _cancel.is_set()
+
+
+class _Job:
+    """Output of one task (all runs with the same tag share it)."""
+    def __init__(self, tag, color, buffer_lines):
+        self.tag = tag
+        self.color = color
+        self.lines = deque(maxlen=buffer_lines)  # ring buffer of recent lines
+
+
+class _Run:
+    """Pipe state of one running process."""
+    def __init__(self, job):
+        self.job = job
+        self.partial = {}  # {stream_name: bytes} incomplete last line per stream
+        self.open_streams = 2
+        self.done = threading.Event()
+
+
+class OutputMux:
+    """
+    Runs shell commands with piped stdout/stderr and prints their lines tagged
+    with the task title, so several tasks can share one terminal.
+
+    A single reader thread multiplexes every pipe with selectors (one thread per
+    pipe on Windows, where select() doesn't support pipes). Each task keeps only
+    its last buffer_lines lines in memory.
+
+    Usage:
+        with OutputMux():
+            run tasks concurrently; run_shell_command routes through the mux
+    """
+
+    def __init__(self, buffer_lines: int = 200, out=None):
+        self.buffer_lines = buffer_lines
+        self.out = out or sys.stdout
+        self._jobs = {}  # {tag: _Job}
+        self._lock = threading.Lock()
+        self._tag_width = 0
+        self._selector = None
+        self._thread = None
+        self._wake_r = self._wake_w = None
+        self._pending = deque()  # (pipe, run, stream_name) waiting to be registered
+        self._dropped = deque()  # runs whose pipes are to be closed before EOF
+        self._closing = False
+
+    def __enter__(self):
+        global _active_mux
+        if sys.platform != 'win32':
+            import selectors
+            self._selector = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = os.pipe()
+            self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+            self._thread = threading.Thread(target=self._select_loop, daemon=True)
+            self._thread.start()
+        _active_mux = self
+        return self
+
+    def __exit__(self, *exc):
+        global _active_mux
+        _active_mux = None
+        if self._thread is not None:
+            self._closing = True
+            os.write(self._wake_w, b'\0')
+            self._thread.join()
+            self._selector.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+        return False
+
+    def run(self, argv: list, tag: str = None) -> int:
+        """Run argv with captured output and return its exit code."""
+        run = _Run(self._job(tag or current_tag()))
+        import subprocess
+        limit = current_limit()
+        proc = spawn(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        for name, pipe in (('out', proc.stdout), ('err', proc.stderr)):
+            if self._selector is not None:
+                self._pending.append((pipe, run, name))
+                os.write(self._wake_w, b'\0')
+            else:
+                threading.Thread(target=self._pipe_loop, args=(pipe, run, name), daemon=True).start()
+        res = wait(proc, limit)
+        if not run.done.wait(DRAIN_GRACE) and self._selector is not None:
+            # Something the command left running still holds its pipes: stop reading them
+            # (the reader threads used on Windows are left to finish on their own)
+            self._dropped.append(run)
+            os.write(self._wake_w, b'\0')
+            run.done.wait()
+        return res
+
+    def tail(self, tag: str) -> list:
+        """Last buffered lines of a task (oldest first)."""
+        job = self._jobs.get(tag)
+        return list(job.lines) if job else []
+
+    def _job(self, tag):
+        with self._lock:
+            job = self._jobs.get(tag)
+            if job is None:
+                color = _TAG_COLORS[len(self._jobs) % len(_TAG_COLORS)]
+                job = self._jobs[tag] = _Job(tag, color, self.buffer_lines)
+                self._tag_width = max(self._tag_width, len(tag))
+            return job
+
+    def _select_loop(self):
+        import selectors
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    os.read(self._wake_r, 512)
+                    while self._pending:
+                        pipe, run, name = self._pending.popleft()
+                        self._selector.register(pipe, selectors.EVENT_READ, (run, name))
+                    while self._dropped:
+                        self._drop(self._dropped.popleft())
+                    continue
+                run, name = key.data
+                data = os.read(key.fd, 65536)
+                if data:
+                    self._feed(run, name, data)
+                else:
+                    self._selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                    self._close_stream(run, name)
+            if self._closing and len(self._selector.get_map()) <= 1:
+                return
+
+    def _drop(self, run):
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None and key.data[0] is run:
+                self._selector.unregister(key.fileobj)
+                key.fileobj.close()
+                self._close_stream(run, key.data[1])
+
+    def _pipe_loop(self, pipe, run, name):
+        while True:
+            data = pipe.read1(65536)
+            if not data:
+                break
+            self._feed(run, name, data)
+        pipe.close()
+        self._close_stream(run, name)
+
+    def _feed(self, run, name, data):
+        buf = run.partial.get(name, b'') + data
+        *lines, rest = buf.split(b'\n')
+        if len(rest) > MAX_LINE_BYTES:
+            lines.append(rest)
+            rest = b''
+        run.partial[name] = rest
+        for line in lines:
+            self._emit(run.job, line)
+
+    def _close_stream(self, run, name):
+        rest = run.partial.pop(name, b'')
+        if rest:
+            self._emit(run.job, rest)
+        with self._lock:
+            run.open_streams -= 1
+            if run.open_streams == 0:
+                run.done.set()
+
+    def _emit(self, job, raw):
+        # Progress bars rewrite the line with \r; keep only what would be visible
+        text = raw.rstrip(b'\r').rsplit(b'\r', 1)[-1].decode('utf-8', 'replace')
+        job.lines.append(text)
+        with self._lock:
+            self.out.write(f"{job.color}{job.tag:<{self._tag_width}} │{Style.RESET_ALL} {text}\n")
+            self.out.flush()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from .ansi import Style
+from .menu import ECOLORS
+from .term import terminal_size
+from .width import truncate
+
+_current = None
+
+
+def _fmt(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 3600:
+        return f"{seconds // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _selection_key(task):
+    """Selection string the task's Modal used last time (same format as TaskLog.selections)."""
+    from .task import Modal
+    cmd = getattr(task, 'cmd', None)
+    if isinstance(cmd, Modal) and cmd.last_selections:
+        return ' / '.join(str(v) for v in cmd.last_selections.values())
+    return None
+
+
+def _flatten(tasks):
+    """Expand MultiTasks into their sub-tasks, which are what actually runs and gets timed."""
+    flat = []
+    for task in tasks:
+        subtasks = getattr(task, 'tasks', None)
+        if isinstance(subtasks, list):
+            flat.extend(_flatten(subtasks))
+        else:
+            flat.append(task)
+    return flat
+
+
+class Progress:
+    """
+    Live status line pinned to the bottom row of the terminal while tasks run:
+    elapsed time, expected remaining time and the running task(s).
+
+    Expected durations are the p50 of past runs from History (per title, and per
+    last Modal selection when there is history for it). Without history the line
+    is a plain elapsed timer and no estimate work is done.
+
+    The line lives outside a scroll region (DECSTBM), so child output scrolls
+    above it untouched. It is only drawn while a command is running (show/hide),
+    never while a Modal popup owns the screen.
+
+    foreground: also draw it while a command owns the terminal (serial runs). Off by
+    default: the ticker's cursor saves and scroll region interleave with the escapes
+    of full-screen programs such as vim, less or top.
+    """
+
+    def __init__(self, tasks, history=None, out=None, interval: float = 0.5, foreground: bool = False):
+        self.tasks = _flatten(tasks)
+        self.foreground = foreground
+        self.history = history
+        self.out = out or sys.stdout
+        self.interval = interval
+        self.start = time.perf_counter()
+        self._expected = None  # {title: seconds}, computed on first show
+        self._running = {}  # {title: perf_counter start}
+        self._finished = set()
+        self._visible = 0
+        self._rows = 0
+        self._lock = threading.Lock()
+        self._toggle = threading.Lock()  # serializes show/hide (not _lock: the ticker draws under it)
+        self._wake = None  # stop event of the running ticker
+        self._thread = None
+
+    # Task notifications -------------------------------------------------
+
+    def started(self, task):
+        with self._lock:
+            self._running[str(task)] = time.perf_counter()
+
+    def finished(self, task):
+        with self._lock:
+            self._running.pop(str(task), None)
+            self._finished.add(str(task))
+
+    # Estimates -------------------------------------------------------------
+
+    def _estimates(self):
+        if self._expected is None:
+            self._expected = {}
+            if self.history is not None:
+                for task in self.tasks:
+                    stats = None
+                    key = _selection_key(task)
+                    if key:
+                        stats = self.history.stats(str(task), selections=key)
+                    if stats is None:
+                        stats = self.history.stats(str(task))
+                    if stats is not None:
+                        self._expected[str(task)] = stats['p50']
+        return self._expected
+
+    def remaining(self):
+        """Expected seconds left, or None when any unfinished task has no history."""
+        expected = self._estimates()
+        now = time.perf_counter()
+        total = 0.0
+        with self._lock:
+            for task in self.tasks:
+                title = str(task)
+                if title in self._finished:
+                    continue
+                if title not in expected:
+                    return None
+                left = expected[title]
+                if title in self._running:
+                    left = max(0.0, left - (now - self._running[title]))
+                total += left
+            # Concurrent tasks overlap; assume the running ones share the wall clock
+            workers = max(1, len(self._running))
+        return total / workers
+
+    def line(self, width: int) -> str:
+        elapsed = time.perf_counter() - self.start
+        with self._lock:
+            running = ', '.join(self._running)
+        done = len(self._finished)
+        text = f" {done}/{len(self.tasks)}  elapsed {_fmt(elapsed)}"
+        remaining = self.remaining() if self.history is not None else None
+        if remaining is not None:
+            text += f"  ~{_fmt(remaining)} left"
+        if running:
+            text += f"  ▶ {running}"
+        text = truncate(text, width - 1)
+        return f"{ECOLORS.OKBLUE}{text}{Style.RESET_ALL}"
+
+    # Drawing ---------------------------------------------------------------
+
+    def show(self):
+        """Reserve the bottom row and start refreshing it (nested calls are counted)."""
+        with self._toggle:
+            self._visible += 1
+            if self._visible > 1:
+                return
+            size = terminal_size()
+            self._rows = size.lines
+            # Scroll once so the cursor isn't on the reserved row, then limit scrolling above it
+            self.out.write(f"\n\x1b[1A\x1b7\x1b[1;{self._rows - 1}r\x1b8")
+            self._draw()
+            self._wake = threading.Event()
+            self._thread = threading.Thread(target=self._tick, args=(self._wake,), daemon=True)
+            self._thread.start()
+
+    def hide(self):
+        with self._toggle:
+            self._visible -= 1
+            if self._visible > 0:
+                return
+            self._wake.set()
+            self._thread.join()
+            self._thread = self._wake = None
+            self.out.write(f"\x1b7\x1b[r\x1b[{self._rows};1H\x1b[2K\x1b8")
+            self.out.flush()
+
+    def _draw(self):
+        width = terminal_size().columns
+        self.out.write(f"\x1b7\x1b[{self._rows};1H\x1b[2K{self.line(width)}\x1b8")
+        self.out.flush()
+
+    def _tick(self, wake):
+        while not wake.wait(self.interval):
+            self._draw()
+
+
+@contextmanager
+def tracking(progress):
+    """Make progress the current run's tracker (None disables tracking)."""
+    global _current
+    prev = _current
+    _current = progress
+    try:
+        yield progress
+    finally:
+        _current = prev
+
+
+def current():
+    return _current
+
+
+@contextmanager
+def visible(foreground: bool = False):
+    """Show the current progress line (if any) for the duration of a running command.
+    foreground: the command owns the terminal (shown only if the line allows it)."""
+    progress = _current
+    if progress is None or (foreground and not progress.foreground):
+        yield
+        return
+    progress.show()
+    try:
+        yield
+    finally:
+        progress.hide()
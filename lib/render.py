@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import sys
+from contextlib import contextmanager
+from .width import ZWJ, char_width, clip, display_width
+from .term import terminal
+
+_first_frame_hooks = []
+
+
+def on_first_frame(fn):
+    """Call fn() once, right after the first frame of the process is on screen
+    (used to time startup, see metis.py --startup-profile)."""
+    _first_frame_hooks.append(fn)
+
+
+class FrameRenderer:
+    """
+    Draws a block of lines in place and, on later frames, rewrites only the rows
+    that changed since the previous frame.
+
+    Cursor convention (same as writing every line followed by '\\n'): before the
+    first frame the cursor is at the start of the block's first row, and after
+    every render it is at the start of the row just below the block.
+
+    Each frame is emitted with a single write() call. Lines are clipped to the
+    terminal width, since a wrapped line would throw the relative moves off.
+
+    absolute: the block starts at the top-left corner of the screen (see
+    full_screen()) and rows are addressed by number, so nothing that scrolled
+    can throw them off. Rows below the screen are dropped, and the cursor is left
+    below the block but above the last row, so a caller's '\n' can't scroll.
+
+    Usage:
+        r = FrameRenderer()
+        r.render(lines)        # first frame: all rows
+        r.render(new_lines)    # usually only the rows whose cursor arrow moved
+    """
+
+    def __init__(self, out=None, prev=None, absolute=False):
+        self.out = out or sys.stdout
+        # Lines currently on screen; pass prev when the block is already drawn
+        self.prev = list(prev) if prev else []
+        self.clip = out is None and terminal().isatty
+        self.absolute = absolute
+
+    def _clip(self, line):
+        return clip(line, terminal().size.columns) if self.clip else line
+
+    def render(self, lines):
+        """Draw lines, touching only rows that differ from the previous frame."""
+        if self.clip:
+            columns = terminal().size.columns
+            lines = [clip(line, columns) for line in lines]
+        if self.absolute:
+            lines = lines[:terminal().size.lines]
+        prev = self.prev
+        buf = []
+        pos = -1 if self.absolute else len(prev)  # cursor row, relative to the top of the block
+
+        # Rows that already exist on screen: move there and overwrite in place
+        for i in range(min(len(lines), len(prev))):
+            if lines[i] != prev[i]:
+                pos = self._move(buf, pos, i)
+                buf.append(f'\r{lines[i]}\x1b[K')
+
+        if len(lines) < len(prev):
+            # Frame got shorter: blank the leftover rows
+            for i in range(len(lines), len(prev)):
+                pos = self._move(buf, pos, i)
+                buf.append('\r\x1b[2K')
+            pos = self._move(buf, pos, len(lines))
+        elif self.absolute:
+            for i in range(len(prev), len(lines)):
+                pos = self._move(buf, pos, i)
+                buf.append(f'\r{lines[i]}\x1b[K')
+        else:
+            # Rows below the previous frame are appended with newlines (may scroll)
+            pos = self._move(buf, pos, len(prev))
+            for line in lines[len(prev):]:
+                buf.append(f'\r{line}\x1b[K\n')
+        self._park(buf, len(lines))
+
+        self.prev = list(lines)
+        self.out.write(''.join(buf))
+        self.out.flush()
+        if _first_frame_hooks:
+            hooks = _first_frame_hooks[:]
+            del _first_frame_hooks[:]
+            for fn in hooks:
+                fn()
+
+    def resized(self):
+        """The terminal was resized. If the block may have wrapped or scrolled out of
+        view, relative moves can't find it anymore: clear the screen and draw the
+        next frame in full from the top-left corner. Otherwise keep drawing in place."""
+        size = terminal().size
+        if self.absolute:
+            # How terminals reflow the alternate screen varies: always start over
+            self.out.write('\x1b[2J')
+            self.out.flush()
+            self.prev = []
+        elif self.prev and (len(self.prev) >= size.lines or max(display_width(line) for line in self.prev) > size.columns):
+            self.out.write('\x1b[H\x1b[J')
+            self.out.flush()
+            self.prev = []
+
+    def clear(self):
+        """Blank the whole block and leave the cursor at its first row."""
+        self.render([])
+
+    def _move(self, buf, pos, row):
+        """Append a relative cursor move from row pos to row (within the drawn block)."""
+        if self.absolute:
+            if row != pos:
+                buf.append(f'\x1b[{row + 1};1H')
+        elif row < pos:
+            buf.append(f'\x1b[{pos - row}A')
+        elif row > pos:
+            buf.append(f'\x1b[{row - pos}B')
+        return row
+
+    def _park(self, buf, height):
+        """Append the move that leaves the cursor below a block of height rows."""
+        if self.absolute:
+            buf.append(f'\x1b[{max(1, min(height + 1, terminal().size.lines - 1))};1H')
+        else:
+            buf.append('\r')
+
+    def update(self, rows):
+        """Rewrite the given rows ({index: line}) of the block on screen. Unlike render(),
+        the other rows aren't compared, so the cost follows the number of rows given."""
+        prev = self.prev
+        buf = []
+        pos = -1 if self.absolute else len(prev)
+        for i in sorted(rows):
+            line = self._clip(rows[i])
+            if line != prev[i]:
+                pos = self._move(buf, pos, i)
+                buf.append(f'\r{line}\x1b[K')
+                prev[i] = line
+        if not buf:
+            return
+        if not self.absolute:
+            self._move(buf, pos, len(prev))
+        self._park(buf, len(prev))
+        self.out.write(''.join(buf))
+        self.out.flush()
+
+
+# Full-screen session (see full_screen()): whether one is open, and the renderer of
+# the alternate screen while that is shown (None while the normal screen is)
+_full_screen = False
+_screen = None
+
+
+@contextmanager
+def full_screen(enabled: bool = True):
+    """
+    Draw menus on the alternate screen buffer for the duration, rows positioned
+    absolutely from the top-left corner, and give the user's screen and scrollback
+    back on exit.
+
+    The alternate screen is shown on the first menu frame. Menus and popups then
+    share one renderer (screen_renderer()), so a frame rewrites only the rows that
+    differ from whatever was drawn last, instead of clearing the screen. Task output
+    goes to the normal screen (main_screen()), where it stays after exit.
+    Does nothing unless the terminal has an alternate screen.
+    """
+    global _full_screen
+    if not enabled or _full_screen or not terminal().alt_screen:
+        yield
+        return
+    _full_screen = True
+    try:
+        yield
+    finally:
+        main_screen()
+        _full_screen = False
+
+
+def in_full_screen() -> bool:
+    return _full_screen
+
+
+def screen_renderer(prev=None) -> FrameRenderer:
+    """The renderer for a menu frame. In a full-screen session, the alternate screen's
+    (shown again if task output was), which knows what is on screen; otherwise a new
+    one for a block showing prev."""
+    global _screen
+    if not _full_screen:
+        return FrameRenderer(prev=prev)
+    if _screen is None:
+        sys.stdout.write('\x1b[?1049h\x1b[H')  # comes up blank
+        _screen = FrameRenderer(absolute=True)
+    return _screen
+
+
+def main_screen():
+    """Show the normal screen, with the cursor where output left it (before running
+    a task in a full-screen session). Does nothing while it is shown."""
+    global _screen
+    if _screen is not None:
+        sys.stdout.write('\x1b[?1049l')
+        sys.stdout.flush()
+        _screen = None
+
+
+_SGR = None
+RESET = '\x1b[0m'
+
+
+def parse_cells(line: str) -> list:
+    """
+    Cells of a line drawn with SGR color escapes: one (char, style) pair per
+    screen column, style being the escapes in effect for it ('' after a reset).
+    A wide character is followed by a ('', style) filler cell; combining marks
+    join the cell before them.
+    """
+    global _SGR
+    if _SGR is None:
+        import re
+        _SGR = re.compile(r'(\x1b\[[0-9;]*m)')
+    cells = []
+    style = ''
+    for i, part in enumerate(_SGR.split(line)):
+        if i % 2:
+            style = '' if part in (RESET, '\x1b[m') else style + part
+        elif part.isascii():
+            cells.extend((ch, style) for ch in part)
+        else:
+            for ch in part:
+                w = 0 if cells and cells[-1][0].endswith(ZWJ) else char_width(ch)
+                if w == 0 and cells:
+                    cells[-1] = (cells[-1][0] + ch, cells[-1][1])
+                elif w:
+                    cells.append((ch, style))
+                    if w == 2:
+                        cells.append(('', style))
+    return cells
+
+
+def render_cells(cells) -> str:
+    """A line drawing cells: one escape sequence per run of equally styled cells."""
+    out = []
+    current = ''
+    for ch, style in cells:
+        if style != current:
+            if style.startswith(current):
+                out.append(style[len(current):])  # only what was added on top
+            else:
+                out.append(RESET + style)
+            current = style
+        out.append(ch)
+    if current:
+        out.append(RESET)
+    return ''.join(out)
+
+
+class Compositor:
+    """
+    A screen made of a background cell grid and overlay layers stacked by z-order
+    (a popup over the menu, another popup over that one).
+
+    The background is parsed into cells once. Setting a layer marks only the rows
+    whose layer content changed, and only those are recomposed and drawn, so moving
+    the cursor in a popup costs a couple of rows, whatever the screen size.
+
+    style: replaces the colors of the background (e.g. dim it under a popup);
+    rows listed in keep keep their own colors.
+
+    Usage:
+        screen = Compositor(menu_lines, style=Fore.LIGHTBLACK_EX)
+        screen.set_layer('popup', row, col, popup_lines)
+        screen.draw(renderer)      # every row the first time
+        screen.set_layer('popup', row, col, popup_lines_after_key)
+        screen.draw(renderer)      # just the rows that changed
+    """
+
+    BLANK = (' ', '')
+
+    def __init__(self, background, style=None, keep=()):
+        self.background = []
+        for i, line in enumerate(background):
+            cells = parse_cells(line)
+            if style is not None and i not in keep:
+                cells = [(ch, style) for ch, _ in cells]
+            self.background.append(cells)
+        self.width = max((len(cells) for cells in self.background), default=0)
+        self.layers = {}  # {name: (z, row, col, [cells per row], [line per row])}
+        self._lines = [None] * len(self.background)
+        self._dirty = set(range(len(self.background)))
+
+    @property
+    def height(self) -> int:
+        return len(self._lines)
+
+    def set_layer(self, name, row: int, col: int, lines: list, z: int = 0):
+        """Place lines (with SGR escapes) with their top-left cell at (row, col), replacing
+        the layer of that name. Rows whose content didn't change are left alone."""
+        old = self.layers.get(name)
+        if old is not None and old[:3] == (z, row, col):
+            _, _, _, old_cells, old_lines = old
+            cells = []
+            for i, line in enumerate(lines):
+                if i < len(old_lines) and line == old_lines[i]:
+                    cells.append(old_cells[i])
+                else:
+                    cells.append(parse_cells(line))
+                    self._dirty.add(row + i)
+            self._dirty.update(range(row + len(lines), row + len(old_lines)))
+        else:
+            cells = [parse_cells(line) for line in lines]
+            if old is not None:
+                self._dirty.update(range(old[1], old[1] + len(old[4])))
+            self._dirty.update(range(row, row + len(lines)))
+        self.layers[name] = (z, row, col, cells, list(lines))
+        if row + len(lines) > len(self._lines):
+            self._lines.extend([None] * (row + len(lines) - len(self._lines)))
+
+    def _compose(self, r):
+        if r < len(self.background):
+            row = self.background[r]
+            cells = row + [self.BLANK] * (self.width - len(row))
+        else:
+            cells = [self.BLANK] * self.width
+        for z, top, col, layer, _ in sorted(self.layers.values(), key=lambda l: l[0]):
+            if top <= r < top + len(layer):
+                over = layer[r - top]
+                end = col + len(over)
+                if end > len(cells):
+                    cells.extend([self.BLANK] * (end - len(cells)))
+                # A wide character cut in half by the layer's edge becomes a blank
+                if 0 < col < len(cells) and cells[col][0] == '':
+                    cells[col - 1] = (' ', cells[col - 1][1])
+                if end < len(cells) and cells[end][0] == '':
+                    cells[end] = (' ', cells[end][1])
+                cells[col:end] = over
+        return render_cells(cells)
+
+    def _recompose(self):
+        """Rows changed since the last call, recomposed."""
+        dirty = [r for r in self._dirty if r < len(self._lines)]
+        for r in dirty:
+            self._lines[r] = self._compose(r)
+        self._dirty.clear()
+        return dirty
+
+    def lines(self) -> list:
+        """Every row of the screen."""
+        self._recompose()
+        return list(self._lines)
+
+    def draw(self, renderer):
+        """Bring a FrameRenderer showing this screen up to date, writing only changed rows."""
+        dirty = self._recompose()
+        if len(renderer.prev) != len(self._lines):
+            renderer.render(self._lines)
+        else:
+            renderer.update({r: self._lines[r] for r in dirty})
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import os
+import threading
+
+# Seconds between admission re-checks while tasks wait for load or memory to drop
+ADMIT_POLL = 1.0
+
+
+def load_average():
+    """1-minute load average, or None where the OS doesn't report one."""
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+def memory_available():
+    """Memory available to new processes in MB (MemAvailable in /proc/meminfo), or None off Linux."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _needs(task):
+    # MultiTasks take nothing themselves: their sub-tasks are admitted one by one
+    return (getattr(task, 'cpus', 0) or 0, getattr(task, 'memory', 0) or 0, getattr(task, 'locks', None) or ())
+
+
+class Capacity:
+    """
+    Admission control for tasks running concurrently: a task starts only when its
+    CPU slots, memory and named locks are free.
+
+    cpus: CPU slots to fill (default: CPU count). With load_aware, the taken slots
+    are the busier of ours in use and the 1-minute load average (which includes
+    our own tasks), and a task's memory must also fit in what /proc/meminfo
+    reports as available.
+    memory: MB to hand out in total (default: no budget beyond the live check).
+    A task asking for more than everything still runs, alone.
+
+    Usage:
+        cap = Capacity(cpus=8, memory=16000)
+        if cap.try_acquire(task):
+            ... run task, then cap.release(task)
+    """
+
+    def __init__(self, cpus: int = None, memory: int = None, load_aware: bool = True):
+        self.cpus = cpus or os.cpu_count() or 1
+        self.memory = memory
+        self.load_aware = load_aware
+        self._used_cpus = 0
+        self._used_memory = 0
+        self._locks = set()
+        self._holders = 0
+        self._lock = threading.Lock()
+
+    def _fits(self, cpus, memory, locks):
+        if self._holders == 0:
+            return True  # never block the only task, whatever it asks for
+        if self._locks.intersection(locks):
+            return False
+        taken = self._used_cpus
+        if self.load_aware:
+            load = load_average()
+            if load is not None:
+                taken = max(taken, load)  # the busier of our slots and the machine
+        if cpus and taken + cpus > self.cpus:
+            return False
+        if memory:
+            if self.memory is not None and self._used_memory + memory > self.memory:
+                return False
+            if self.load_aware:
+                available = memory_available()
+                if available is not None and memory > available:
+                    return False
+        return True
+
+    def try_acquire(self, task) -> bool:
+        """Take the task's resources if they are free. Returns whether it may start."""
+        cpus, memory, locks = _needs(task)
+        with self._lock:
+            if not self._fits(cpus, memory, locks):
+                return False
+            self._used_cpus += cpus
+            self._used_memory += memory
+            self._locks.update(locks)
+            self._holders += 1 if (cpus or memory or locks) else 0
+            return True
+
+    def release(self, task):
+        cpus, memory, locks = _needs(task)
+        with self._lock:
+            self._used_cpus -= cpus
+            self._used_memory -= memory
+            self._locks.difference_update(locks)
+            self._holders -= 1 if (cpus or memory or locks) else 0
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import time
+from .resources import ADMIT_POLL
+
+
+def _deps(task):
+    return getattr(task, 'depends_on', None) or []
+
+
+def has_dependencies(tasks):
+    """True if any task depends on another task of the same selection."""
+    titles = {str(t) for t in tasks}
+    return any(dep in titles for t in tasks for dep in _deps(t))
+
+
+def build_graph(tasks):
+    """Build the dependency graph of a selection.
+
+    Dependencies on titles outside the selection are ignored (treated as already satisfied).
+    Returns (order, upstream, downstream) where order is a topological order of task indexes.
+    Raises ValueError on a dependency cycle.
+    """
+    index = {str(t): i for i, t in enumerate(tasks)}
+    upstream = [set() for _ in tasks]
+    downstream = [set() for _ in tasks]
+    for i, task in enumerate(tasks):
+        for dep in _deps(task):
+            j = index.get(dep)
+            if j is not None and j != i:
+                upstream[i].add(j)
+                downstream[j].add(i)
+
+    # Kahn's algorithm, keeping selection order among ready nodes
+    indegree = [len(u) for u in upstream]
+    ready = [i for i in range(len(tasks)) if indegree[i] == 0]
+    order = []
+    while ready:
+        i = ready.pop(0)
+        order.append(i)
+        for j in sorted(downstream[i]):
+            indegree[j] -= 1
+            if indegree[j] == 0:
+                ready.append(j)
+    if len(order) != len(tasks):
+        cycle = [str(tasks[i]) for i in range(len(tasks)) if i not in order]
+        raise ValueError(f"dependency cycle between: {', '.join(cycle)}")
+    return order, upstream, downstream
+
+
+def _critical_path(order, downstream):
+    """Length of the longest chain starting at each node (in nodes)."""
+    length = [1] * len(order)
+    for i in reversed(order):
+        if downstream[i]:
+            length[i] = 1 + max(length[j] for j in downstream[i])
+    return length
+
+
+def run_graph(tasks, max_workers, should_stop=None, on_skip=None, task_kwargs=None, capacity=None):
+    """Run tasks on a bounded worker pool, honoring depends_on between them.
+
+    tasks: list of callables (Task / MultiTask), called with **task_kwargs
+    max_workers: maximum number of tasks running at the same time
+    should_stop: callable() -> bool, checked before each new task is started
+    on_skip: callable(task, failed_task), called for every task skipped because
+             something upstream of it failed
+    capacity: resources.Capacity admitting tasks by their cpus / memory / locks;
+              a ready task that doesn't fit lets smaller ones behind it start first
+
+    Independent branches keep running when a task fails; only its downstream is skipped.
+    Ready tasks on the longest remaining chain are started first.
+    Returns the first non-zero result in completion order, or 0.
+    """
+    task_kwargs = task_kwargs or {}
+    order, upstream, downstream = build_graph(tasks)
+    priority = _critical_path(order, downstream)
+    rank = {i: n for n, i in enumerate(order)}
+
+    waiting = [len(u) for u in upstream]
+    ready = [i for i in order if waiting[i] == 0]
+    skipped = set()
+    running = {}
+    first_failure = 0
+
+    def skip_downstream(i):
+        stack = list(downstream[i])
+        while stack:
+            j = stack.pop()
+            if j in skipped:
+                continue
+            skipped.add(j)
+            if on_skip:
+                on_skip(tasks[j], tasks[i])
+            stack.extend(downstream[j])
+
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while ready or running:
+            # Fill free worker slots, longest chain first
+            ready.sort(key=lambda i: (-priority[i], rank[i]))
+            stopping = should_stop and should_stop()
+            while ready and len(running) < max_workers and not stopping:
+                pick = next((n for n, i in enumerate(ready)
+                             if capacity is None or capacity.try_acquire(tasks[i])), None)
+                if pick is None:
+                    break  # nothing fits until a task finishes or the load drops
+                i = ready.pop(pick)
+                running[pool.submit(tasks[i], **task_kwargs)] = i
+            if not running:
+                if ready and not stopping:
+                    time.sleep(ADMIT_POLL)  # capacity held elsewhere (an enclosing MultiTask's graph)
+                    continue
+                break
+
+            # Re-check admission now and then: load and free memory change without completions
+            blocked = capacity is not None and ready and len(running) < max_workers
+            done, _ = wait(running, timeout=ADMIT_POLL if blocked else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                if capacity is not None:
+                    capacity.release(tasks[i])
+                res = future.result()
+                if res != 0:
+                    if first_failure == 0:
+                        first_failure = res if res is not None else 1
+                    skip_downstream(i)
+                    continue
+                for j in downstream[i]:
+                    waiting[j] -= 1
+                    if waiting[j] == 0 and j not in skipped:
+                        ready.append(j)
+
+    return first_failure
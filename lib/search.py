@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _uses_grams(query):
+    """True when SearchIndex.search can narrow query with trigram postings."""
+    return any(len(term) >= 3 for term in query.split())
+
+
+class SearchIndex:
+    """
+    Lowercase + trigram index of item titles across menu sections.
+
+    Entries are (section_idx, item_idx) pairs, where item_idx is the item's
+    position in the section (separators take a position but are not indexed).
+    A query matches a title when every whitespace-separated term of it is a
+    substring of the title, case-insensitively.
+
+    Usage:
+        index = SearchIndex()
+        index.add_section(0, ['cargo check', 'cargo build'])
+        index.keys(index.search('build'))  # [(0, 1)]
+    """
+
+    def __init__(self):
+        self._keys = []  # entry -> (section_idx, item_idx)
+        self._titles = []  # entry -> lowercase title
+        self._grams = {}  # trigram -> set of entries
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add_section(self, section_idx, titles, start=0):
+        """Index the titles of one section, in order.
+        start: item index of the first title (to append items to an indexed section)
+        """
+        for item_idx, title in enumerate(titles, start):
+            title = str(title)
+            if title == '' or title.startswith('\x00'):  # separators
+                continue
+            entry = len(self._keys)
+            lower = title.lower()
+            self._keys.append((section_idx, item_idx))
+            self._titles.append(lower)
+            for gram in _trigrams(lower):
+                self._grams.setdefault(gram, set()).add(entry)
+
+    def clear(self):
+        self._keys = []
+        self._titles = []
+        self._grams = {}
+
+    def keys(self, entries):
+        """(section_idx, item_idx) of each entry."""
+        return [self._keys[e] for e in entries]
+
+    def search(self, query, candidates=None):
+        """Entries matching query, in index order.
+        candidates: only check these entries (e.g. the result of a shorter query)
+        """
+        terms = query.lower().split()
+        if not terms:
+            return list(range(len(self._keys))) if candidates is None else list(candidates)
+        if candidates is None:
+            # Narrow with the postings of the longest term; shorter terms are checked directly
+            longest = max(terms, key=len)
+            if len(longest) >= 3:
+                postings = sorted((self._grams.get(g, set()) for g in _trigrams(longest)), key=len)
+                found = set(postings[0])
+                for posting in postings[1:]:
+                    found &= posting
+                    if not found:
+                        break
+                candidates = sorted(found)
+            else:
+                candidates = range(len(self._keys))
+        titles = self._titles
+        return [e for e in candidates if all(term in titles[e] for term in terms)]
+
+
+class SearchFilter:
+    """
+    Type-to-filter state over a SearchIndex.
+
+    Each result is remembered with its query, so typing one more character only
+    rescans the previous (smaller) result, and Backspace returns to an earlier
+    result without searching at all.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._stack = [('', None)]  # (query, entries); None = everything
+
+    def update(self, query):
+        """Entries matching query."""
+        query = query.lower()
+        # Drop results of queries that aren't a prefix of the new one
+        while len(self._stack) > 1 and not query.startswith(self._stack[-1][0]):
+            self._stack.pop()
+        base_query, base = self._stack[-1]
+        if query == base_query:
+            return base if base is not None else self.index.search(query)
+        if not _uses_grams(base_query) and _uses_grams(query):
+            base = None  # a short query's result is a scan of nearly everything: the postings narrow better
+        entries = self.index.search(query, base)
+        self._stack.append((query, entries))
+        return entries
@@ -4,28 +4,66 @@
 # https://github.com/ooroogi/metis
 
 import time
-from typing import Any
-from .menu import select, multi_select, sectioned_select, ECOLORS, Style, popup_select, get_last_menu_render, set_last_menu_render, register_banner, get_banner_lines, get_last_section_index
+from collections import namedtuple
+from .menu import select, multi_select, sectioned_select, ECOLORS, Style, popup_select, get_last_menu_render, set_last_menu_render, register_banner, get_banner_lines, get_last_section_index, raw_session
+from .scheduler import run_graph, has_dependencies
+from .process import INTERRUPTED_EXIT, OutputMux, active_mux, cancellable, cancel_requested, interruptible, measured, run_foreground, shell_argv, tagged, time_limit
+from .history import History
+from .cache import TaskCache
+from .resources import Capacity
+from .loader import AsyncCache, Result, run_async
+from .search import SearchIndex
+from .layout import MenuLayout
+from .render import full_screen, in_full_screen, main_screen, screen_renderer
+from .width import display_width, ljust
+from . import progress
 import os, sys
-import subprocess
 
 
 def run_shell_command(cmd: str) -> int:
-    """Run a shell command using bash on Windows/MSYS, os.system elsewhere."""
-    if sys.platform == 'win32':
-        # Use bash explicitly on Windows (Git Bash/MSYS)
-        import shutil
-        git_bash = shutil.which('bash')
-        if git_bash is None:
-            git_bash = 'bash'
-        return subprocess.call([git_bash, '-c', cmd])
-    else:
-        return os.system(cmd)
+    """Run a shell command using bash on Windows/MSYS, /bin/sh elsewhere.
+
+    The command runs in its own process group, so a timeout or Ctrl+C stops it
+    together with its children. While tasks run concurrently (an OutputMux is
+    active), output is captured through pipes and printed tagged with the task
+    title; otherwise the command owns the terminal until it exits.
+    """
+    mux = active_mux()
+    if mux is not None:
+        with progress.visible():
+            return mux.run(shell_argv(cmd))
+    with progress.visible(foreground=True):
+        return run_foreground(shell_argv(cmd))
 
 
 # Special return code to indicate task was cancelled (skip logging)
 TASK_CANCELLED = -999
 
+# First arguments that run a subcommand (see lib/cli.py) instead of the menu
+CLI_COMMANDS = ('run', 'daemon', 'client', 'attach', 'jobs')
+
+# One row of the results table. Still a tuple, so log[:5] / log[5] keep working.
+# saved: for cached tasks, the duration of the run whose result was reused
+# attempt: 1 for the first run of a task, counting up with each retry
+# usage: process.Usage of its commands, None when nothing was measured
+# wait: for retried attempts, the backoff slept before the next one (not part of took)
+TaskLog = namedtuple('TaskLog', ['section', 'title', 'status', 'duration', 'is_success', 'selections', 'took', 'saved', 'attempt', 'usage', 'wait'],
+                     defaults=(0.0, 1, None, 0.0))
+
+# TaskLog.status of a task that never ran because a task it depends on failed
+STATUS_SKIPPED = 'skipped'
+# TaskLog.status of a task skipped because its inputs didn't change since it last succeeded
+STATUS_CACHED = 'cached'
+# TaskLog.status of a failed attempt that was retried (took includes the backoff wait)
+STATUS_RETRIED = 'retried'
+# TaskLog.status of a final attempt killed by its timeout
+STATUS_TIMEOUT = 'timeout'
+# TaskLog.status of a task stopped with Ctrl+C
+STATUS_CANCELLED = 'cancelled'
+
+# Retry backoff: Task.backoff seconds, doubled per attempt up to this
+MAX_BACKOFF = 60.0
+
 def _format_duration(seconds: float) -> str:
     """Format duration in a human-readable way."""
     if seconds < 60:
@@ -41,10 +79,34 @@ def _format_duration(seconds: float) -> str:
         return f"{hours}h {mins}m {secs:.0f}s"
 
 
-def _print_table(logs: list):
+def _format_kb(kb: int) -> str:
+    if kb < 1024:
+        return f"{kb}K"
+    if kb < 1024 * 1024:
+        return f"{kb / 1024:.1f}M"
+    return f"{kb / (1024 * 1024):.2f}G"
+
+
+# Optional results table columns: (header, cell of a TaskLog with usage)
+_USAGE_COLUMNS = [
+    ('User', lambda log: f"{log.usage.user:.2f}s"),
+    ('Sys', lambda log: f"{log.usage.system:.2f}s"),
+    # CPU time over wall time: near 100% per core is CPU-bound, near 0% waits on I/O or the network
+    ('CPU%', lambda log: f"{(log.usage.user + log.usage.system) / log.took * 100:.0f}%"
+                         if log.took > 0 else ''),
+    ('Max RSS', lambda log: _format_kb(log.usage.max_rss)),
+    ('Blk in/out', lambda log: f"{log.usage.inblock}/{log.usage.oublock}"),
+    ('Ctx vol/inv', lambda log: f"{log.usage.nvcsw}/{log.usage.nivcsw}"),
+]
+
+
+def _print_table(logs: list, elapsed: float = None, usage: bool = False):
     """Print logs as a formatted table.
 
-    logs: list of tuples (section, title, status, duration, is_success, selections)
+    logs: list of TaskLog tuples (section, title, status, duration, is_success, selections, took)
+    elapsed: wall-clock time of the whole run; when given, a summary line with the
+             time saved against running the same tasks one after another is printed
+    usage: add CPU, memory, block I/O and context switch columns (see process.Usage)
     """
     if not logs:
         return
@@ -55,14 +117,15 @@ def _print_table(logs: list):
         title = log[1]
         selections = log[5] if len(log) > 5 and log[5] else ''
         if selections:
-            display_titles.append(f"{title} - {selections}")
-        else:
-            display_titles.append(title)
+            title = f"{title} - {selections}"
+        if log[2] == STATUS_RETRIED or (len(log) > 8 and log[8] > 1):
+            title = f"{title} #{log[8]}"
+        display_titles.append(title)
 
     # Calculate column widths
-    section_width = max(len(log[0]) for log in logs)
+    section_width = max(display_width(log[0]) for log in logs)
     section_width = max(section_width, 7)  # minimum "Section"
-    task_width = max(len(t) for t in display_titles)
+    task_width = max(display_width(t) for t in display_titles)
     task_width = max(task_width, 4)  # minimum "Task"
     status_width = 6  # "Status" header
     duration_width = max(len(log[3]) for log in logs)
@@ -79,37 +142,86 @@ def _print_table(logs: list):
     c2 = status_width + 2
     c3 = duration_width + 2
 
+    # Optional columns, appended after Duration
+    extra = []
+    if usage and any(len(log) > 9 and log[9] for log in logs):
+        for header, cell in _USAGE_COLUMNS:
+            cells = [cell(TaskLog(*log)) if len(log) > 9 and log[9] else '' for log in logs]
+            extra.append((header, cells, max(len(header), *(len(c) for c in cells))))
+
+    def border(left, mid, right):
+        return left + mid.join(h * (w + 2) for _, _, w in extra) + right if extra else right
+
     # Print table
     print()
     # Top border
-    print(f"{tl}{h * c0}{tm}{h * c1}{tm}{h * c2}{tm}{h * c3}{tr}")
+    print(f"{tl}{h * c0}{tm}{h * c1}{tm}{h * c2}{tm}{h * c3}{border(tm, tm, tr)}")
     # Header
-    print(f"{v} {'Section':<{section_width}} {v} {'Task':<{task_width}} {v} {'Status':<{status_width}} {v} {'Duration':>{duration_width}} {v}")
+    print(f"{v} {'Section':<{section_width}} {v} {'Task':<{task_width}} {v} {'Status':<{status_width}} {v} {'Duration':>{duration_width}} {v}"
+          + ''.join(f" {header:>{w}} {v}" for header, _, w in extra))
     # Header separator
-    print(f"{lm}{h * c0}{cross}{h * c1}{cross}{h * c2}{cross}{h * c3}{rm}")
+    print(f"{lm}{h * c0}{cross}{h * c1}{cross}{h * c2}{cross}{h * c3}{border(cross, cross, rm)}")
     # Data rows — group by section, show divider between every row
     for i, log in enumerate(logs):
         section, _, status, duration, is_success = log[:5]
         display_title = display_titles[i]
-        bg_color = ECOLORS.BG_GREEN if is_success else ECOLORS.BG_RED
+        if status in (STATUS_SKIPPED, STATUS_CANCELLED):
+            bg_color = ECOLORS.BG_YELLOW
+        elif status == STATUS_CACHED:
+            bg_color = ECOLORS.BG_BLUE
+        else:
+            bg_color = ECOLORS.BG_GREEN if is_success else ECOLORS.BG_RED
         status_box = f"  {bg_color}  {Style.RESET_ALL}  "  # 2 spaces + 2 colored chars + 2 spaces = 6 chars
         # Show section name only on first row of each group
         prev_section = logs[i - 1][0] if i > 0 else None
         section_label = section if section != prev_section else ''
-        print(f"{v} {section_label:<{section_width}} {v} {display_title:<{task_width}} {v} {status_box} {v} {duration:>{duration_width}} {v}")
+        print(f"{v} {ljust(section_label, section_width)} {v} {ljust(display_title, task_width)} {v} {status_box} {v} {duration:>{duration_width}} {v}"
+              + ''.join(f" {cells[i]:>{w}} {v}" for _, cells, w in extra))
         # Row divider (except after last row)
         if i < len(logs) - 1:
             next_section = logs[i + 1][0]
             if section != next_section:
                 # Section boundary — full divider
-                print(f"{lm}{h * c0}{cross}{h * c1}{cross}{h * c2}{cross}{h * c3}{rm}")
+                print(f"{lm}{h * c0}{cross}{h * c1}{cross}{h * c2}{cross}{h * c3}{border(cross, cross, rm)}")
             else:
                 # Same section — skip section column divider
-                print(f"{v} {' ' * section_width} {lm}{h * c1}{cross}{h * c2}{cross}{h * c3}{rm}")
+                print(f"{v} {' ' * section_width} {lm}{h * c1}{cross}{h * c2}{cross}{h * c3}{border(cross, cross, rm)}")
     # Bottom border
-    print(f"{bl}{h * c0}{bm}{h * c1}{bm}{h * c2}{bm}{h * c3}{br}")
+    print(f"{bl}{h * c0}{bm}{h * c1}{bm}{h * c2}{bm}{h * c3}{border(bm, bm, br)}")
+    if elapsed is not None:
+        serial = sum(log[6] for log in logs if len(log) > 6)
+        saved = max(0.0, serial - elapsed)
+        print(f"  Total {_format_duration(elapsed)} (serial {_format_duration(serial)}, saved {_format_duration(saved)})")
+    cached = [log for log in logs if log[2] == STATUS_CACHED]
+    if cached:
+        saved = sum(log[7] for log in cached)
+        print(f"  Cached {len(cached)} task{'s' if len(cached) > 1 else ''} (saved {_format_duration(saved)})")
+    retried = [log for log in logs if log[2] == STATUS_RETRIED]
+    if retried:
+        lost = sum(log[6] + (log[10] if len(log) > 10 else 0.0) for log in retried)
+        print(f"  Retried {len(retried)} time{'s' if len(retried) > 1 else ''} (lost {_format_duration(lost)})")
     print()
 
+def _print_tail(title: str, lines: list):
+    """Print the last captured output lines of a task in a box."""
+    if not lines:
+        return
+    width = max(max(display_width(line) for line in lines), display_width(title) + 2)
+    print()
+    print(f"┌─ {title} {'─' * (width - display_width(title) - 1)}┐")
+    for line in lines:
+        print(f"│ {ljust(line, width)} │")
+    print(f"└{'─' * (width + 2)}┘")
+
+
+def _backoff_delay(base, attempt):
+    """Seconds to wait after a failed attempt: base doubled per attempt (capped), with jitter
+    so tasks failing together don't retry in lockstep."""
+    import random
+    delay = min(MAX_BACKOFF, base * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+
 class Task:
     title = ''
     cmd = ''
@@ -117,65 +229,183 @@ class Task:
     stop_on_error = True
     tm = None
     section = ''
-
-    def __init__(self, title, cmd, param=None, stop_on_error=True):
+    depends_on = []
+    inputs = []
+    env = []
+    timeout = None
+    retries = None
+    retry_on = None
+    backoff = None
+    cpus = 1
+    memory = None
+    locks = []
+
+    def __init__(self, title, cmd, param=None, stop_on_error=True, depends_on=None, inputs=None, env=None,
+                 timeout=None, retries=None, retry_on=None, backoff=None, cpus=1, memory=None, locks=None):
+        """
+        inputs: glob patterns ('src/**/*.rs') of the files the task reads, and
+        env: names of the environment variables it depends on. With either given,
+        the task is skipped (logged as cached) while its command, inputs and env
+        are unchanged since it last succeeded. Modal tasks always run.
+
+        timeout: seconds each shell command of the task may run before its process
+        group is killed (exit code 124). retries: extra attempts after a failure,
+        only for exit codes in retry_on if given, waiting backoff seconds (default 1)
+        doubled per attempt with jitter. A Modal is retried with the same selections.
+        Unset policies are taken from the Section.
+
+        cpus, memory (MB) and locks (names such as 'docker' or 'db') are what the
+        task needs while running concurrently: it waits until the manager's
+        Capacity has them free. cpus and memory only count after
+        TaskManager.set_capacity; locks always do.
+        """
         self.title = title
         self.cmd = cmd
         self.param = param
         self.stop_on_error = stop_on_error
         self.section = ''
+        # Titles of tasks that must succeed before this one runs (when selected together)
+        self.depends_on = list(depends_on) if depends_on else []
+        self.inputs = list(inputs) if inputs else []
+        self.env = list(env) if env else []
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_on = set(retry_on) if retry_on else None
+        self.backoff = backoff
+        self.cpus = cpus
+        self.memory = memory
+        self.locks = list(locks) if locks else []
 
     def set_tm(self, tm):
         if self.tm is not None:
             exit(1)
         self.tm = tm
-        if len(self.title) > self.tm.title_max_length:
-            self.tm.title_max_length = len(self.title)
+        if display_width(self.title) > self.tm.title_max_length:
+            self.tm.title_max_length = display_width(self.title)
 
     def __call__(self, **kwargs):
-        if self.stop_on_error and self.tm.is_error_occurred:
+        # The graph scheduler skips only the downstream of a failure itself
+        if self.stop_on_error and self.tm.is_error_occurred and not self.tm.isolate_failures:
             return
         start = time.perf_counter()
         res = 0
-        if isinstance(self.cmd, str):
-            res = run_shell_command(self.cmd)
-        else:
-            res = self.cmd(**kwargs)
+        stamp = self._check_cache()
+        if stamp is not None and stamp.saved is not None:
+            took = time.perf_counter() - start
+            duration = f'{_format_duration(took)} (saved {_format_duration(stamp.saved)})'
+            self.tm.logs.append(TaskLog(self.section, self.title, STATUS_CACHED, duration, True, '', took, stamp.saved))
+            tracker = progress.current()
+            if tracker is not None:
+                tracker.finished(self)
+            return 0
+        if not isinstance(self.cmd, Modal):
+            main_screen()  # a Modal leaves the menu screen once its popups are done
+        tracker = progress.current()
+        if tracker is not None:
+            tracker.started(self)
+        attempt = 1
+        try:
+            while True:
+                started = time.time()
+                start = time.perf_counter()
+                with tagged(self.title), time_limit(self.timeout) as limit, measured() as meter:
+                    if isinstance(self.cmd, str):
+                        res = run_shell_command(self.cmd)
+                    else:
+                        try:
+                            with interruptible():
+                                if attempt > 1 and isinstance(self.cmd, Modal):
+                                    res = self.cmd.run_command(self.cmd.last_selections)  # no popups again
+                                else:
+                                    res = self.cmd(**kwargs)
+                                    if isinstance(self.cmd, Modal) and self.cmd.command_started is not None:
+                                        # Time the command, not the user answering the popups
+                                        started += self.cmd.command_started - start
+                                        start = self.cmd.command_started
+                        except KeyboardInterrupt:
+                            res = INTERRUPTED_EXIT  # logged as cancelled (cancel_requested() is set)
+                if res == 0 or res == TASK_CANCELLED or cancel_requested() or not self._should_retry(res, attempt):
+                    break
+                delay = _backoff_delay(self.backoff if self.backoff is not None else 1.0, attempt)
+                self._log(STATUS_RETRIED, res, started, time.perf_counter() - start, limit.expired, attempt, delay, meter.usage)
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            if tracker is not None:
+                tracker.finished(self)
 
         # If task was cancelled (e.g., user pressed Esc in popup), skip logging
         if res == TASK_CANCELLED:
             return TASK_CANCELLED
 
         took = time.perf_counter() - start
-        msg = ''
         if res != 0:
             if self.stop_on_error:
                 self.tm.is_error_occurred = True
 
+        status = STATUS_CANCELLED if res != 0 and cancel_requested() else STATUS_TIMEOUT if limit.expired else ''
+        self._log(status, res, started, took, limit.expired, attempt, usage=meter.usage)
+        if stamp is not None and res == 0:
+            self.tm.cache.store(stamp, took)
+        return res
+
+    def _should_retry(self, res, attempt):
+        return attempt <= (self.retries or 0) and (not self.retry_on or res in self.retry_on)
+
+    def _log(self, status, res, started, took, timed_out, attempt, wait=0.0, usage=None):
+        """Add one attempt to the results table and the history."""
         # Get selections from Modal if applicable
         selections = ''
         if isinstance(self.cmd, Modal) and self.cmd.last_selections:
             selections = ' / '.join(str(v) for v in self.cmd.last_selections.values())
-
-        self.tm.logs.append((self.section, self.title, msg, _format_duration(took), res == 0, selections))
-        return res
+        duration = _format_duration(took) + (' (cancelled)' if status == STATUS_CANCELLED else
+                                             ' (timeout)' if timed_out else '')
+        self.tm.logs.append(TaskLog(self.section, self.title, status, duration, res == 0, selections,
+                                    took, 0.0, attempt, usage, wait))
+        if self.tm.history is not None:
+            self.tm.history.record(self.section, self.title, selections, res, started, took)
+
+    def _check_cache(self):
+        """Stamp of the current inputs, or None if this task isn't cacheable."""
+        if not (self.inputs or self.env) or self.tm.cache is None or isinstance(self.cmd, Modal):
+            return None
+        if isinstance(self.cmd, str):
+            command = self.cmd
+        else:
+            # A callable's code isn't fingerprinted: list its source file in inputs
+            command = f'{getattr(self.cmd, "__module__", "")}.{getattr(self.cmd, "__qualname__", repr(self.cmd))}'
+        return self.tm.cache.check(f'{self.section}/{self.title}', command, self.inputs, self.env)
 
     def __str__(self):
         return self.title
 
 class MultiTask:
+    """
+    Runs several tasks as one menu entry.
+
+    Without depends_on between the sub-tasks they run as a chain that stops at the
+    first failure. If any sub-task depends on a sibling, the group is scheduled as a
+    graph instead: independent branches run concurrently (up to parallel workers,
+    default TaskManager.max_workers) and only the downstream of a failure is skipped.
+    """
     title = ''
     tasks = []
     param = None
     tm = None
+    section = ''
+    depends_on = []
 
-    def __init__(self, title, tasks):
+    def __init__(self, title, tasks, parallel: int = None, depends_on=None):
         self.title = title
         self.tasks = tasks
+        self.parallel = parallel
+        self.section = ''
+        self.depends_on = list(depends_on) if depends_on else []
 
     def set_tm(self, tm):
         if self.tm is not None:
             exit(1)
+        self.tm = tm
         for task in self.tasks:
             task.set_tm(tm)
 
@@ -183,10 +413,15 @@ class MultiTask:
         return self.title
 
     def __call__(self, **kwargs):
+        if has_dependencies(self.tasks):
+            workers = self.parallel or self.tm.max_workers
+            return self.tm.run_graph(self.tasks, workers, **kwargs)
         for task in self.tasks:
             res = task(**kwargs)
             if res != 0:
                 return res
+            if cancel_requested():
+                return 1
         return 0
 
 class TaskManager:
@@ -198,6 +433,17 @@ class TaskManager:
     persistent = False
     _rebuild_fn = None
     banner = None
+    max_workers = 1
+    isolate_failures = False
+    output_lines = 200  # lines of captured output kept per task while running concurrently
+    failed_tail_lines = 20
+    history = None
+    cache = None
+    capacity = None
+    show_progress = True
+    progress_foreground = False
+    show_usage = False
+    fullscreen = False
 
     def __init__(self):
         self.list = {}
@@ -207,14 +453,68 @@ class TaskManager:
         self.banner = None
         self.persistent = False
         self._rebuild_fn = None
+        self.max_workers = 1
+        self.isolate_failures = False
+        self.history = History()
+        self.cache = TaskCache()
+        # Until set_capacity(), only locks are enforced: set_parallel alone decides how many run
+        self.capacity = Capacity(cpus=float('inf'), load_aware=False)
+        self._banner_fields = {}  # {name: (Result, placeholder)}
 
     def set_banner(self, banner: str):
-        """Set a banner to display before each menu."""
+        """Set a banner to display before each menu.
+        With banner fields (add_banner_field), banner is a str.format template
+        such as '│ {branch:<20} │' (literal braces must then be doubled).
+        """
         self.banner = banner
         # Register banner with menu system for proper state management
-        register_banner(banner)
+        register_banner(self._format_banner())
         return self
 
+    def add_banner_field(self, name: str, fn, placeholder: str = '…'):
+        """Fill the banner's {name} field with fn(), computed in the background.
+        The menu is drawn right away with placeholder and updated when fn returns
+        (a failing fn leaves the field empty, and a banner line whose fields are all
+        empty is left out). Returns self for chaining.
+        """
+        future = run_async(fn)
+        self._banner_fields[name] = (future, placeholder)
+        future.add_done_callback(lambda _: raw_session().wake())
+        if self.banner is not None:
+            register_banner(self._format_banner())
+        return self
+
+    def _format_banner(self):
+        if not self._banner_fields or self.banner is None:
+            return self.banner
+        values = {}
+        for name, (future, placeholder) in self._banner_fields.items():
+            if not future.done():
+                values[name] = placeholder
+            elif future.exception() is not None:
+                values[name] = ''
+            else:
+                values[name] = str(future.result())
+        # Leave out lines whose fields all came back empty (e.g. no git branch)
+        import string
+        lines = []
+        for line in self.banner.split('\n'):
+            fields = {name for _, name, _, _ in string.Formatter().parse(line) if name}
+            if fields and all(values.get(name) == '' for name in fields):
+                continue
+            lines.append(line.format_map(values))
+        return '\n'.join(lines)
+
+    def _refresh(self):
+        """Apply background results that have arrived. Returns True if the menu changed."""
+        if not self._banner_fields or self.banner is None:
+            return False
+        text = self._format_banner()
+        if text.rstrip('\n').split('\n') == get_banner_lines():
+            return False
+        register_banner(text)
+        return True
+
     def add(self, task):
         self.list[str(task)] = task
         task.set_tm(self)
@@ -227,7 +527,102 @@ class TaskManager:
         self.persistent = True
         self._rebuild_fn = rebuild_fn
 
+    def set_history(self, history):
+        """Use another History store (e.g. History(path)), or None to stop recording runs."""
+        self.history = history
+        return self
+
+    def set_cache(self, cache):
+        """Use another TaskCache (e.g. TaskCache(path)), or None to always run tasks with inputs."""
+        self.cache = cache
+        return self
+
+    def set_capacity(self, cpus: int = None, memory: int = None, load_aware: bool = True):
+        """Admit concurrent tasks only while their cpus / memory / locks fit (see resources.Capacity),
+        on top of the set_parallel limit. Without it only locks are enforced.
+        cpus defaults to the CPU count; load_aware=False ignores load average and free memory."""
+        self.capacity = Capacity(cpus, memory, load_aware)
+        return self
+
+    def set_progress(self, enabled: bool = True, foreground: bool = False):
+        """Show a live elapsed / ETA line at the bottom of the terminal while tasks run
+        concurrently. foreground: also while a serial command owns the terminal (it can
+        garble full-screen programs such as vim or less)."""
+        self.show_progress = enabled
+        self.progress_foreground = foreground
+        return self
+
+    def set_usage(self, enabled: bool = True):
+        """Add CPU time, peak memory, block I/O and context switch columns to the results
+        table, to tell CPU-bound tasks from I/O-bound ones when tuning set_parallel/set_capacity."""
+        self.show_usage = enabled
+        return self
+
+    def set_fullscreen(self, enabled: bool = True):
+        """Draw the menus on the terminal's alternate screen, rows positioned absolutely,
+        and give the user's screen and scrollback back on exit. Task output and results
+        go to the normal screen; persistent mode then redraws only the menu rows that
+        changed instead of clearing the screen and scrollback."""
+        self.fullscreen = enabled
+        return self
+
+    def _progress(self, tasks):
+        if not self.show_progress or not sys.stdout.isatty():
+            return None
+        return progress.Progress(tasks, self.history, foreground=self.progress_foreground)
+
+    def set_parallel(self, max_workers: int = None):
+        """Run selected tasks concurrently on a pool of max_workers (default: CPU count)."""
+        self.max_workers = max_workers or os.cpu_count() or 1
+        return self
+
+    def _parallel_limit(self, tasks):
+        """Worker count for running the given selection. 1 means run one after another."""
+        # Modals draw popups and read keys, so they can't share the terminal (unless preset)
+        if len(tasks) < 2 or any(isinstance(getattr(t, 'cmd', None), Modal) and t.cmd.preset_values is None for t in tasks):
+            return 1
+        return max(1, min(self._max_workers_for(tasks), len(tasks)))
+
+    def _max_workers_for(self, tasks):
+        return self.max_workers
+
+    def _log_skipped(self, task, failed):
+        self.logs.append(TaskLog(getattr(task, 'section', ''), str(task), STATUS_SKIPPED,
+                                 STATUS_SKIPPED, False, f'{failed} failed', 0.0))
+        tracker = progress.current()
+        if tracker is not None:
+            tracker.finished(task)
+
+    def run_graph(self, tasks, workers, **kwargs):
+        """Run tasks in dependency order; a failure skips only its downstream tasks."""
+        prev = self.isolate_failures
+        self.isolate_failures = True
+        try:
+            with self._output(workers) as mux:
+                res = run_graph(tasks, workers, should_stop=cancel_requested, on_skip=self._log_skipped,
+                                task_kwargs=kwargs, capacity=self.capacity)
+                self._print_failed_output(mux)
+                return res
+        finally:
+            self.isolate_failures = prev
+
+    def _output(self, workers):
+        """Capture and tag output while more than one task may run at a time."""
+        if workers > 1 and active_mux() is None:
+            return OutputMux(self.output_lines)
+        return _NoMux()
+
+    def _print_failed_output(self, mux):
+        """Repeat the buffered tail of each failed task, since concurrent output interleaves."""
+        for log in self.logs:
+            if not log[4] and log[2] not in (STATUS_SKIPPED, STATUS_RETRIED, STATUS_CANCELLED):
+                _print_tail(log[1], mux.tail(log[1])[-self.failed_tail_lines:])
+
     def run_tasks(self, select_func, **kwargs):
+        with full_screen(self.fullscreen):
+            return self._run_menu(select_func, **kwargs)
+
+    def _run_menu(self, select_func, **kwargs):
         res = 0
         while True:
             sys.stdout.write(Style.RESET_ALL)
@@ -241,47 +636,106 @@ class TaskManager:
                 if self.persistent:
                     if self._rebuild_fn:
                         self._rebuild_fn()
-                    sys.stdout.write('\x1b[H\x1b[2J\x1b[3J')
-                    sys.stdout.flush()
+                    if not in_full_screen():
+                        sys.stdout.write('\x1b[H\x1b[2J\x1b[3J')
+                        sys.stdout.flush()
                     continue
                 break
 
             if not isinstance(tasks, list):
                 tasks = [tasks]
 
-            start = time.perf_counter()
-
-            task_cancelled = False
-            for task in tasks:
-                res = task(**kwargs)
-                if res == TASK_CANCELLED:
-                    task_cancelled = True
-                    break  # User cancelled, go back to menu
-                if res != 0:
-                    if self.logs:
-                        _print_table(self.logs)
-                    return res
+            res, task_cancelled, elapsed = self._execute(tasks, **kwargs)
+            if task_cancelled and self.logs and cancel_requested():
+                # Ctrl+C: show what ran and what was stopped, then back to the menu
+                main_screen()
+                _print_table(self.logs, elapsed, self.show_usage)
+            if res != 0 and not task_cancelled:
+                if self.logs:
+                    main_screen()
+                    _print_table(self.logs, elapsed, self.show_usage)
+                return res
 
             # Only print results table if task wasn't cancelled (skip in persistent mode)
             if not task_cancelled and self.logs and not self.persistent:
-                _print_table(self.logs)
+                main_screen()
+                _print_table(self.logs, elapsed, self.show_usage)
 
             # Only exit if only_once is set AND task completed (not cancelled)
             if self.only_once and not task_cancelled:
                 break
 
             # Persistent mode: rebuild and clear screen for fresh redraw
+            # (in full screen the menu comes back on the alternate screen instead)
             if self.persistent and not task_cancelled:
                 if self._rebuild_fn:
                     self._rebuild_fn()
-                sys.stdout.write('\x1b[H\x1b[2J\x1b[3J')
-                sys.stdout.flush()
+                if not in_full_screen():
+                    sys.stdout.write('\x1b[H\x1b[2J\x1b[3J')
+                    sys.stdout.flush()
 
         return res
 
-    def __call__(self, *args: Any, **kwds: Any) -> Any:
+    def _execute(self, tasks, **kwargs):
+        """Run one selection of tasks. Returns (res, cancelled, elapsed);
+        elapsed is only set when tasks may have overlapped (for the table's total line)."""
+        start = time.perf_counter()
+        res = 0
+        task_cancelled = False
+        workers = self._parallel_limit(tasks)
+        elapsed = None
+        # Ctrl+C stops the running commands (and starts no more) instead of the launcher
+        with progress.tracking(self._progress(tasks)), cancellable():
+            if has_dependencies(tasks):
+                main_screen()
+                res = self.run_graph(tasks, workers, **kwargs)
+                elapsed = time.perf_counter() - start
+            elif workers > 1:
+                main_screen()
+                with self._output(workers) as mux:
+                    res = run_graph(tasks, workers, should_stop=lambda: self.is_error_occurred or cancel_requested(),
+                                    task_kwargs=kwargs, capacity=self.capacity)
+                    self._print_failed_output(mux)
+                elapsed = time.perf_counter() - start
+            else:
+                for task in tasks:
+                    res = task(**kwargs)
+                    if res == TASK_CANCELLED:
+                        task_cancelled = True
+                        break  # User cancelled, go back to menu
+                    if res != 0 or cancel_requested():
+                        break
+            if cancel_requested():
+                task_cancelled = True
+        return res, task_cancelled, elapsed
+
+    def run_headless(self, tasks, **kwargs):
+        """Run tasks without a menu or raw terminal mode (see lib/cli.py).
+        Returns the exit status: 0 if every task ran and succeeded, 1 otherwise."""
+        self.logs = []
+        self.is_error_occurred = False
+        res, _, _ = self._execute(tasks, **kwargs)
+        ran = {log.title for log in self.logs}
+        failed = res not in (0, None) or any(not log.is_success and log.status != STATUS_RETRIED for log in self.logs)
+        # Tasks that never logged were skipped after an earlier failure
+        missing = any(str(t) not in ran for t in tasks if not isinstance(t, MultiTask))
+        return 1 if failed or missing else 0
+
+    def __call__(self, *args, **kwds):
         print('task manager call')
 
+class _NoMux:
+    """Stand-in for OutputMux when output goes straight to the terminal."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def tail(self, tag):
+        return []
+
+
 class SingleTaskManager(TaskManager):
     def __init__(self):
         super().__init__()
@@ -322,17 +776,38 @@ class Section:
 
         m = SectionedTaskManager()
         m.add_section(build)
+
+    parallel: for multi sections, run the selected tasks concurrently on up to
+    this many workers (overrides TaskManager.set_parallel for this section)
+    provider: callable() -> list of Tasks, run in the background once the
+    section is added to a SectionedTaskManager; the tab is usable right away
+    and its tasks are appended when they arrive (e.g. one Task per container)
+    timeout, retries, retry_on, backoff: defaults for the section's tasks
+    that don't set their own (see Task)
     """
-    def __init__(self, name: str, multi: bool = False, on_submit=None):
+    def __init__(self, name: str, multi: bool = False, on_submit=None, parallel: int = None, provider=None,
+                 timeout=None, retries=None, retry_on=None, backoff=None):
         self.name = name
         self.multi = multi
         self.on_submit = on_submit  # callback(selected_tasks) for multi sections
+        self.parallel = parallel
+        self.provider = provider
+        self.policy = {'timeout': timeout, 'retries': retries,
+                       'retry_on': set(retry_on) if retry_on else None, 'backoff': backoff}
         self.tasks = {}  # {task_title: Task}
         self._separator_count = 0
 
+    def _apply_policy(self, task):
+        for sub in task.tasks if isinstance(task, MultiTask) else [task]:
+            if isinstance(sub, Task):
+                for name, value in self.policy.items():
+                    if getattr(sub, name) is None:
+                        setattr(sub, name, value)
+
     def add(self, task):
         """Add a task to this section. Returns self for chaining."""
         task.section = self.name
+        self._apply_policy(task)
         key = str(task)
         # Handle separators (empty title) with unique keys
         if key == '':
@@ -369,12 +844,16 @@ class Modal:
         stress.add(Task('Server', modal))
     """
 
-    def __init__(self, name: str, min_width: int = None):
+    def __init__(self, name: str, min_width: int = None, cache_ttl: float = 30):
         self.name = name
         self.steps = []  # List of (title, items) tuples
         self._command = None  # Command template or callable
         self.last_selections = {}  # Store selections after completion
+        self.command_started = None  # perf_counter() when the command of the last call started
         self.min_width = min_width
+        # Dynamic step items per (step, previous selections), loaded in the background
+        self._cache = AsyncCache(ttl=cache_ttl)
+        self.preset_values = None  # {step_title: label} to run without popups (see preset)
 
     def add_step(self, title: str, items: dict) -> 'Modal':
         """Add a selection step. Returns self for chaining."""
@@ -384,6 +863,9 @@ class Modal:
     def add_dynamic_step(self, title: str, items_fn: callable) -> 'Modal':
         """Add a dynamic selection step where items depend on previous selections.
         items_fn: callable(selections: dict) -> dict
+        items_fn runs on a background thread; its result is reused for the same
+        previous selections for cache_ttl seconds, and is prefetched while the
+        matching item of the previous step is highlighted.
         Returns self for chaining.
         """
         self.steps.append((title, items_fn, True))  # (title, items_fn, is_dynamic)
@@ -399,20 +881,92 @@ class Modal:
         self._command = cmd
         return self
 
+    def preset(self, values: dict) -> 'Modal':
+        """Answer the steps from values ({step_title: item label}) instead of showing
+        popups, e.g. for headless runs. None goes back to asking. Returns self for chaining."""
+        self.preset_values = dict(values) if values is not None else None
+        return self
+
+    def resolve_preset(self):
+        """Selections {step_title: value} for preset_values.
+        Raises ValueError naming the step and its choices if a value is missing or unknown."""
+        return self.resolve_labels(self.preset_values)
+
+    def resolve_labels(self, values: dict, steps: int = None):
+        """Selections {step_title: value} for the first steps (default: all) answered by
+        values ({step_title: item label}). Raises ValueError like resolve_preset."""
+        selections = {}
+        for step_index, (title, items_or_fn, is_dynamic) in enumerate(self.steps[:steps]):
+            items = self.step_items(step_index, selections)
+            t = type(items)
+            labels = list(items.keys()) if t is dict else list(items)
+            wanted = values.get(title)
+            match = next((label for label in labels if str(label) == str(wanted)), None) if wanted is not None else None
+            if match is None:
+                choices = ', '.join(str(label) for label in labels)
+                problem = 'needs a value' if wanted is None else f'has no item {wanted!r}'
+                raise ValueError(f"{self.name}: step '{title}' {problem} (choices: {choices})")
+            selections[title] = items[match] if t is dict else match
+        return selections
+
     def __call__(self, **kwargs) -> int:
         """Execute the modal flow. Handles state management internally."""
+        self.command_started = None
         if not self.steps:
             return 0
 
-        import re
-        def strip_ansi(text):
-            return re.sub(r'\x1b\[[0-9;]*m', '', text)
+        if self.preset_values is not None:
+            selections = self.resolve_preset()
+        else:
+            # One raw-input session across all popups of the flow
+            with raw_session():
+                selections = self._select()
+        if selections is None:
+            return TASK_CANCELLED
+        main_screen()
+        self.command_started = time.perf_counter()
+
+        # All steps completed - save selections for result table
+        self.last_selections = selections.copy()
+        return self.run_command(selections)
+
+    def run_command(self, selections: dict) -> int:
+        """Run the command for selections ({step_title: value}) and return its exit code."""
+        if self._command is None:
+            return 0
+
+        if callable(self._command):
+            result = self._command(selections)
+            if isinstance(result, str):
+                return run_shell_command(result)
+            return result if result is not None else 0
+        else:
+            # String template with {StepTitle} placeholders
+            cmd = self._command
+            for title, value in selections.items():
+                cmd = cmd.replace('{' + title + '}', str(value))
+            return run_shell_command(cmd)
 
+    def step_items(self, step_index, selections):
+        """Items of a step for the given previous selections (waits for a dynamic step to load)."""
+        title, items_or_fn, is_dynamic = self.steps[step_index]
+        return self._load_step(step_index, selections).result() if is_dynamic else items_or_fn
+
+    def _load_step(self, step_index, selections, prefetch=False):
+        """Result of a dynamic step's items for the given previous selections."""
+        items_fn = self.steps[step_index][1]
+        key = (step_index, tuple((k, repr(v)) for k, v in selections.items()))
+        if prefetch:
+            return self._cache.prefetch(key, items_fn, dict(selections))
+        return self._cache.get(key, items_fn, dict(selections))
+
+    def _select(self):
+        """Show the step popups. Returns {step_title: value}, or None if cancelled."""
         def calc_popup_width(title, items):
             t = type(items)
             lst = list(items.keys()) if t is dict else list(items) if t is set else items
-            max_item_len = max(len(str(item)) for item in lst)
-            title_len = len(title)
+            max_item_len = max(display_width(str(item)) for item in lst)
+            title_len = display_width(title)
             inner_width = max(max_item_len + 4, title_len + 2)
             if self.min_width is not None:
                 inner_width = max(inner_width, self.min_width)
@@ -420,7 +974,7 @@ class Modal:
 
         # Save original menu state for ESC handling
         original_menu = get_last_menu_render()
-        original_bg_width = max(len(strip_ansi(line)) for line in original_menu) if original_menu else 40
+        original_bg_width = max(display_width(line) for line in original_menu) if original_menu else 40
 
         # Track background states for each step (for going back)
         # backgrounds[i] = background to use for step i
@@ -439,8 +993,7 @@ class Modal:
 
         while step_index < len(self.steps):
             title, items_or_fn, is_dynamic = self.steps[step_index]
-            items = items_or_fn(selections) if is_dynamic else items_or_fn
-            popup_width = calc_popup_width(title, items)
+            items = self._load_step(step_index, selections) if is_dynamic else items_or_fn
 
             # Calculate absolute column position (share 2 chars with previous pane's right border)
             if step_index == 0:
@@ -450,15 +1003,18 @@ class Modal:
                 # Subsequent popups: share 2 chars with previous popup's right border
                 popup_col = popup_right_edges[step_index - 1] - 2
 
-            # Track this popup's right edge (for next popup)
-            if step_index >= len(popup_right_edges):
-                popup_right_edges.append(popup_col + popup_width)
-
             row_offset = step_index
 
             is_first_step = (step_index == 0)
             is_last_step = (step_index == len(self.steps) - 1)
 
+            # Start loading the next dynamic step for whatever is highlighted here
+            on_highlight = None
+            if not is_last_step and self.steps[step_index + 1][2]:
+                def on_highlight(key, items=items, title=title, next_index=step_index + 1):
+                    values = items.result() if isinstance(items, Result) else items
+                    self._load_step(next_index, dict(selections, **{title: values[key]}), prefetch=True)
+
             # Set the background for this step
             set_last_menu_render(backgrounds[step_index])
 
@@ -473,24 +1029,27 @@ class Modal:
                 row_offset=row_offset,
                 popup_col=popup_col,
                 initial_index=cursor_positions[step_index],  # Restore cursor position
+                on_highlight=on_highlight,
             )
+            if is_dynamic:
+                # Esc while loading leaves the one-row placeholder on screen
+                items = items.result() if items.done() and not items.exception() else [None]
 
             if selected_key is None:
                 # ESC pressed
                 if is_first_step:
+                    if in_full_screen():
+                        # ESC on first step - back to the menu, rewriting the rows the popup covered
+                        screen_renderer().render(original_menu)
+                        return None
                     # ESC on first step - clear screen including scrollback and return cancelled
                     sys.stdout.write('\x1b[H\x1b[2J\x1b[3J')
                     sys.stdout.flush()
-                    return TASK_CANCELLED
+                    return None
                 else:
                     # ESC on subsequent step - go back to previous step
-                    # Calculate actual display height (background may have been extended by popup)
-                    bg_height = len(backgrounds[step_index])
-                    banner_height = len(get_banner_lines())
-                    menu_height = bg_height - banner_height
-                    popup_height = 4 + len(items)  # title + separator + top/bottom borders + items
-                    popup_row = banner_height + max(1, (menu_height - popup_height) // 2) + row_offset
-                    current_height = max(bg_height, popup_row + popup_height)
+                    # Display height as drawn (the popup may extend below the background)
+                    current_height = len(get_last_menu_render())
 
                     step_index -= 1
                     # Remove the selection for the step we're going back to
@@ -502,8 +1061,11 @@ class Modal:
                         backgrounds.pop()
                     while len(popup_right_edges) > step_index:
                         popup_right_edges.pop()
-                    # Move cursor up by current display height to get back to menu start
                     bg = backgrounds[step_index]
+                    if in_full_screen():
+                        screen_renderer().render(bg)
+                        continue
+                    # Move cursor up by current display height to get back to menu start
                     sys.stdout.write(f'\x1b[{current_height}A')
                     # Clear from cursor down and redraw
                     sys.stdout.write('\x1b[J')
@@ -512,6 +1074,9 @@ class Modal:
                     sys.stdout.flush()
                     continue
 
+            # Track this popup's right edge (for next popup)
+            popup_right_edges.append(popup_col + calc_popup_width(title, items))
+
             # Store selection and cursor position
             selections[title] = items[selected_key]
             # Save cursor position (find index of selected key)
@@ -525,24 +1090,7 @@ class Modal:
 
             step_index += 1
 
-        # All steps completed - save selections for result table
-        self.last_selections = selections.copy()
-
-        # Execute command
-        if self._command is None:
-            return 0
-
-        if callable(self._command):
-            result = self._command(selections)
-            if isinstance(result, str):
-                return run_shell_command(result)
-            return result if result is not None else 0
-        else:
-            # String template with {StepTitle} placeholders
-            cmd = self._command
-            for title, value in selections.items():
-                cmd = cmd.replace('{' + title + '}', str(value))
-            return run_shell_command(cmd)
+        return selections
 
     def __str__(self):
         return self.name
@@ -570,22 +1118,60 @@ class SectionedTaskManager(TaskManager):
     def __init__(self):
         super().__init__()
         self._sections = []
+        self._index = SearchIndex()  # type-to-filter index of task titles, built as sections are added
+        self._loading = {}  # {section_idx: Result} of sections whose provider hasn't been applied
+        self._empty_text = {}  # {section_name: placeholder text} for sections still loading
+        self._layout = MenuLayout()  # measured sections, kept up to date as they are added
 
     def add_section(self, section: Section):
         """Add a Section object to the manager."""
         self._sections.append(section)
+        self._layout = self._layout.add(section.name, section.tasks, section.multi)
+        self._index.add_section(len(self._sections) - 1, list(section.tasks.keys()))
         for task in section.tasks.values():
             if task is None:  # Skip separators
                 continue
             task.set_tm(self)
             self.list[str(task)] = task
+        if section.provider is not None:
+            future = run_async(section.provider)
+            self._loading[len(self._sections) - 1] = future
+            self._empty_text[section.name] = 'loading…'
+            future.add_done_callback(lambda _: raw_session().wake())
         return self
 
     def clear_sections(self):
         """Remove all sections and tasks. Used with set_persistent() to rebuild UI."""
         self._sections = []
+        self._layout = MenuLayout()
+        self._index.clear()
+        self._loading = {}
+        self._empty_text = {}
         self.list = {}
 
+    def _refresh(self):
+        """Apply banner fields and section providers that have finished."""
+        changed = super()._refresh()
+        for section_idx, future in list(self._loading.items()):
+            if not future.done():
+                continue
+            del self._loading[section_idx]
+            section = self._sections[section_idx]
+            self._empty_text.pop(section.name, None)
+            if future.exception() is not None:
+                self._empty_text[section.name] = f'failed: {future.exception()}'
+            else:
+                start = len(section.tasks)
+                for task in future.result() or []:
+                    section.add(task)
+                    if task is not None:
+                        task.set_tm(self)
+                        self.list[str(task)] = task
+                self._index.add_section(section_idx, list(section.tasks.keys())[start:], start=start)
+                self._layout = self._layout.replace(section_idx)
+            changed = True
+        return changed
+
     def _build_sections_dict(self):
         """Build sections dict for sectioned_select."""
         return {sec.name: sec.tasks for sec in self._sections}
@@ -594,28 +1180,33 @@ class SectionedTaskManager(TaskManager):
         """Build per-section multi mode map."""
         return {sec.name: sec.multi for sec in self._sections}
 
+    def _max_workers_for(self, tasks):
+        """Use the section's own parallel setting when the whole selection comes from it."""
+        names = {getattr(t, 'section', None) for t in tasks}
+        if len(names) == 1:
+            for sec in self._sections:
+                if sec.name in names and sec.parallel is not None:
+                    return sec.parallel
+        return self.max_workers
+
+    def _menu_layout(self):
+        """The MenuLayout of the sections, re-measuring any changed since they were added."""
+        self._layout = self._layout.sync(self._build_sections_dict(), self._build_multi_map())
+        return self._layout
+
     def get_menu_width(self):
         """Calculate menu width based on sections (excluding banner)."""
-        sections = self._build_sections_dict()
-        section_names = list(sections.keys())
-        multi_map = self._build_multi_map()
-        any_multi = any(multi_map.values())
-
-        max_item_len = 0
-        for sec_items in sections.values():
-            t = type(sec_items)
-            lst = list(sec_items.keys()) if t is dict else list(sec_items) if t is set else sec_items
-            for item in lst:
-                if len(str(item)) > max_item_len:
-                    max_item_len = len(str(item))
-
-        tab_width = sum(len(name) + 2 for name in section_names) + (len(section_names) - 1) * 3 + 4
-        item_width = max_item_len + (10 if any_multi else 6)
-        return max(item_width, tab_width)
+        return self._menu_layout().width
 
     def __call__(self, **kwargs):
+        if len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+            from .cli import dispatch
+            sys.exit(dispatch(self, sys.argv[1:], **kwargs))
+
         def sectioned_selector(flat_list):
-            result = sectioned_select(self._build_sections_dict(), multi=self._build_multi_map())
+            self._refresh()
+            result = sectioned_select(self._build_sections_dict(), multi=self._build_multi_map(), index=self._index,
+                                      refresh=self._refresh, empty_text=self._empty_text, layout=self._menu_layout())
             # If multi-select returned a list and the section has on_submit, call it
             if isinstance(result, list):
                 sec = self._sections[get_last_section_index()]
@@ -636,10 +1227,14 @@ class SectionedMultiTaskManager(TaskManager):
     def __init__(self):
         super().__init__()
         self._sections = []
+        self._index = SearchIndex()  # type-to-filter index of task titles, built as sections are added
+        self._layout = MenuLayout()
 
     def add_section(self, section: Section):
         """Add a Section object to the manager."""
         self._sections.append(section)
+        self._layout = self._layout.add(section.name, section.tasks, True)
+        self._index.add_section(len(self._sections) - 1, list(section.tasks.keys()))
         for task in section.tasks.values():
             if task is None:  # Skip separators
                 continue
@@ -651,6 +1246,13 @@ class SectionedMultiTaskManager(TaskManager):
         return {sec.name: sec.tasks for sec in self._sections}
 
     def __call__(self, **kwargs):
+        if len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+            from .cli import dispatch
+            sys.exit(dispatch(self, sys.argv[1:], **kwargs))
+
         def sectioned_selector(flat_list):
-            return sectioned_select(self._build_sections_dict(), multi=True)
+            self._refresh()
+            self._layout = self._layout.sync(self._build_sections_dict(), True)
+            return sectioned_select(self._build_sections_dict(), multi=True, index=self._index, refresh=self._refresh,
+                                    layout=self._layout)
         return self.run_tasks(sectioned_selector, **kwargs)
\ No newline at end of file
@@ -0,0 +1,400 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import os
+import sys
+import codecs
+import threading
+
+# Key codes. Control keys keep their ASCII value, printable keys are ord(ch);
+# navigation keys live above the Unicode range so they never collide with text.
+KEY_TAB = 9
+KEY_ENTER = 13
+KEY_LF = 10
+KEY_SPACE = 32
+KEY_ESC = 27
+KEY_CTRL_C = 3
+KEY_BACKSPACE = 127
+KEY_UP = 0x110000
+KEY_DOWN = 0x110001
+KEY_RIGHT = 0x110002
+KEY_LEFT = 0x110003
+KEY_HOME = 0x110004
+KEY_END = 0x110005
+KEY_SHIFT_TAB = 0x110006
+KEY_PGUP = 0x110007
+KEY_PGDN = 0x110008
+KEY_INSERT = 0x110009
+KEY_DELETE = 0x11000A
+KEY_REFRESH = 0x11000B  # not a key: RawInput.wake() was called (background data arrived)
+KEY_RESIZE = 0x11000C  # not a key: the terminal was resized (SIGWINCH)
+
+# Seconds to wait after ESC for the rest of an escape sequence. Terminals send
+# a whole sequence in one write, so this only matters on slow links.
+ESC_TIMEOUT = 0.025
+
+# Final byte of "ESC [ ... X" and "ESC O X" sequences -> key
+# (modifier parameters as in "ESC [ 1 ; 5 A" are accepted and dropped)
+_CSI_KEYS = {
+    'A': KEY_UP,
+    'B': KEY_DOWN,
+    'C': KEY_RIGHT,
+    'D': KEY_LEFT,
+    'H': KEY_HOME,
+    'F': KEY_END,
+    'Z': KEY_SHIFT_TAB,
+}
+_SS3_KEYS = dict(_CSI_KEYS, M=KEY_ENTER)
+
+# "ESC [ n ~" sequences -> key (both the xterm and the rxvt/linux console numbering)
+_TILDE_KEYS = {
+    '1': KEY_HOME,
+    '2': KEY_INSERT,
+    '3': KEY_DELETE,
+    '4': KEY_END,
+    '5': KEY_PGUP,
+    '6': KEY_PGDN,
+    '7': KEY_HOME,
+    '8': KEY_END,
+}
+
+# Windows console scan codes (after a '\x00' / '\xe0' prefix) -> key
+_SCAN_KEYS = {
+    72: KEY_UP,
+    80: KEY_DOWN,
+    77: KEY_RIGHT,
+    75: KEY_LEFT,
+    71: KEY_HOME,
+    79: KEY_END,
+    73: KEY_PGUP,
+    81: KEY_PGDN,
+    82: KEY_INSERT,
+    83: KEY_DELETE,
+    15: KEY_SHIFT_TAB,
+}
+
+_CONTROL_KEYS = {
+    '\r': KEY_ENTER,
+    '\n': KEY_LF,
+    '\x03': KEY_CTRL_C,
+    '\t': KEY_TAB,
+    '\x08': KEY_BACKSPACE,
+}
+
+_IGNORED = object()  # _parse result for complete sequences we have no key for
+
+
+def terminal_size() -> os.terminal_size:
+    """Same result as shutil.get_terminal_size() (COLUMNS/LINES, then the tty, then 80x24),
+    without importing shutil and the compression modules it pulls in."""
+    try:
+        size = os.get_terminal_size(sys.__stdout__.fileno())
+        columns, lines = size.columns, size.lines
+    except (AttributeError, ValueError, OSError):
+        columns, lines = 0, 0
+    try:
+        columns = int(os.environ['COLUMNS'])
+    except (KeyError, ValueError):
+        pass
+    try:
+        lines = int(os.environ['LINES'])
+    except (KeyError, ValueError):
+        pass
+    return os.terminal_size((columns or 80, lines or 24))
+
+
+class Terminal:
+    """
+    Size and capabilities of the terminal, looked up once instead of on every frame.
+
+    size: os.terminal_size, refreshed on SIGWINCH while a raw session is active
+          and whenever one starts
+    isatty: stdout is a terminal
+    alt_screen: the alternate screen buffer can be used (a tty that isn't TERM=dumb)
+    """
+
+    def __init__(self):
+        out = sys.__stdout__
+        try:
+            self.isatty = out.isatty()
+        except (AttributeError, ValueError):
+            self.isatty = False
+        self.alt_screen = self.isatty and os.environ.get('TERM', '') != 'dumb'
+        self.size = terminal_size()
+
+    def refresh(self) -> bool:
+        """Query the size again. Returns True if it changed."""
+        size = terminal_size()
+        changed = size != self.size
+        self.size = size
+        return changed
+
+
+_terminal = None
+
+
+def terminal() -> Terminal:
+    """The Terminal of this process (created on first use)."""
+    global _terminal
+    if _terminal is None:
+        _terminal = Terminal()
+    return _terminal
+
+
+def set_esc_timeout(seconds: float):
+    """Change how long a lone ESC waits for the rest of a sequence (default 25 ms)."""
+    global ESC_TIMEOUT
+    ESC_TIMEOUT = seconds
+
+
+class KeyDecoder:
+    """
+    Incremental key decoder: feed() raw input as it arrives, take keys with next().
+
+    Handles CSI (ESC [ ...), SS3 (ESC O x), "ESC [ n ~" keys, modified arrows,
+    Windows scan-code prefixes and UTF-8 text, including sequences and
+    multi-byte characters split across reads.
+    """
+
+    def __init__(self):
+        self._buf = ''
+        self._utf8 = codecs.getincrementaldecoder('utf-8')('replace')
+
+    def feed(self, data):
+        """Add bytes (or already decoded text) to the buffer."""
+        self._buf += self._utf8.decode(data) if isinstance(data, bytes) else data
+
+    def __bool__(self):
+        return bool(self._buf)
+
+    def next(self, flush: bool = False):
+        """Next complete key, or None.
+        flush: the sequence timed out; a pending ESC is returned as a plain ESC key.
+        """
+        while self._buf:
+            key = self._parse()
+            if key is None:
+                if not flush:
+                    return None
+                # Timed out: it was a real ESC; whatever follows is read as typed keys
+                self._buf = self._buf[1:]
+                return KEY_ESC
+            if key is not _IGNORED:
+                return key
+        return None
+
+    def _parse(self):
+        """Decode the key at the front of the buffer and consume it.
+        Returns None if more input is needed, _IGNORED for sequences without a key."""
+        buf = self._buf
+        ch = buf[0]
+        size, key = 1, None
+
+        if ch == '\x1b':
+            if len(buf) == 1:
+                return None
+            intro = buf[1]
+            if intro == '[':
+                # CSI: parameters 0x30-0x3f, intermediates 0x20-0x2f, final 0x40-0x7e
+                i = 2
+                if i < len(buf) and buf[i] == '[':  # linux console F1-F5: ESC [ [ A
+                    i += 1
+                while i < len(buf) and '\x20' <= buf[i] <= '\x3f':
+                    i += 1
+                if i == len(buf):
+                    return None
+                final = buf[i]
+                size = i + 1
+                if not '\x40' <= final <= '\x7e':
+                    key = KEY_ESC  # malformed: treat as ESC and re-read the rest
+                    size = 1
+                elif final == '~':
+                    key = _TILDE_KEYS.get(buf[2:i].split(';')[0], _IGNORED)
+                else:
+                    key = _CSI_KEYS.get(final, _IGNORED) if buf[2] != '[' else _IGNORED
+            elif intro == 'O':
+                if len(buf) == 2:
+                    return None
+                size, key = 3, _SS3_KEYS.get(buf[2], _IGNORED)
+            else:
+                # ESC followed by a normal key (ESC pressed twice, or Alt+key)
+                key = KEY_ESC
+        elif ch in '\x00\xe0' and sys.platform == 'win32':
+            if len(buf) == 1:
+                return None
+            size, key = 2, _SCAN_KEYS.get(ord(buf[1]), _IGNORED)
+        else:
+            key = _CONTROL_KEYS.get(ch, ord(ch))
+
+        self._buf = buf[size:]
+        return key
+
+
+class RawInput:
+    """
+    Keeps the terminal in raw input mode for a whole menu session instead of
+    switching modes around every key press.
+
+    Bytes are read in bulk into an internal buffer and parsed into keys, so key
+    repeats that arrive together are not lost between mode switches and can be
+    handled as a batch (see keys()). Entering is reentrant: nested sessions
+    (Modal -> popup_select) only switch the mode once.
+
+    Usage:
+        with raw_session() as term:
+            for key in term.keys():   # blocks for the first key, then drains what's queued
+                ...
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._saved = None  # (fd, tty attributes) to restore when the outermost session ends
+        self._decoder = KeyDecoder()
+        self._woken = threading.Event()
+        self._resized = threading.Event()
+        self._old_winch = None
+        self._wake_pipe = None  # (read fd, write fd), so wake() interrupts select()
+        if sys.platform != 'win32':
+            self._wake_pipe = os.pipe()
+            for fd in self._wake_pipe:
+                os.set_blocking(fd, False)
+
+    def __enter__(self):
+        if self._depth == 0 and sys.platform != 'win32' and sys.stdin.isatty():
+            import tty, termios
+            fd = sys.stdin.fileno()
+            saved = termios.tcgetattr(fd)
+            self._saved = (fd, saved)
+            tty.setraw(fd)
+            # Keep output processing so '\n' still returns the carriage while drawing
+            mode = termios.tcgetattr(fd)
+            mode[1] = saved[1]
+            termios.tcsetattr(fd, termios.TCSADRAIN, mode)
+        if self._depth == 0:
+            terminal().refresh()  # resized while no session was listening
+            self._watch_resize()
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0 and self._saved is not None:
+            import termios
+            fd, saved = self._saved
+            termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+            self._saved = None
+        if self._depth == 0 and self._old_winch is not None:
+            import signal
+            signal.signal(signal.SIGWINCH, self._old_winch)
+            self._old_winch = None
+        return False
+
+    def _watch_resize(self):
+        import signal
+        if not hasattr(signal, 'SIGWINCH') or threading.current_thread() is not threading.main_thread():
+            return
+        self._old_winch = signal.signal(signal.SIGWINCH, self._on_resize)
+
+    def _on_resize(self, *_):
+        if terminal().refresh():
+            self._resized.set()
+            self._interrupt()
+
+    # Waking ----------------------------------------------------------------
+
+    def wake(self):
+        """Make the reader return KEY_REFRESH (callable from any thread)."""
+        self._woken.set()
+        self._interrupt()
+
+    def _interrupt(self):
+        """Make a blocked select() in the reader return."""
+        if self._wake_pipe is not None:
+            try:
+                os.write(self._wake_pipe[1], b'.')
+            except BlockingIOError:
+                pass  # pipe full: a wake-up is already pending
+
+    # Reading ---------------------------------------------------------------
+
+    def _readable(self, timeout):
+        if sys.platform == 'win32':
+            import msvcrt, time
+            end = time.perf_counter() + (timeout or 0)
+            while not msvcrt.kbhit() and not self._woken.is_set():
+                if timeout is not None and time.perf_counter() >= end:
+                    return False
+                time.sleep(0.005)
+            return True
+        import select
+        return bool(select.select([sys.stdin.fileno(), self._wake_pipe[0]], [], [], timeout)[0])
+
+    def _fill(self, timeout=None):
+        """Read whatever is available into the buffer. Returns False on timeout."""
+        if not self._readable(timeout):
+            return False
+        if self._wake_pipe is not None:
+            try:
+                os.read(self._wake_pipe[0], 1024)
+            except BlockingIOError:
+                pass
+            import select
+            if not select.select([sys.stdin.fileno()], [], [], 0)[0]:
+                return True
+        if sys.platform == 'win32':
+            import msvcrt
+            while msvcrt.kbhit():
+                self._decoder.feed(msvcrt.getwch())
+            return True
+        self._decoder.feed(os.read(sys.stdin.fileno(), 1024))
+        return True
+
+    def read_key(self, timeout=None):
+        """Next key, waiting up to timeout seconds (None = forever). Returns None on timeout."""
+        while True:
+            key = self._decoder.next()
+            if key is not None:
+                return key
+            if self._resized.is_set():
+                self._resized.clear()
+                return KEY_RESIZE
+            if self._woken.is_set():
+                self._woken.clear()
+                return KEY_REFRESH
+            if self._decoder:
+                # Unfinished escape sequence: wait briefly for the rest of it
+                if not self._fill(ESC_TIMEOUT):
+                    return self._decoder.next(flush=True)
+                continue
+            if not self._fill(timeout):
+                return None
+
+    def pending(self):
+        """True if a key can be read without blocking."""
+        return bool(self._decoder) or self._woken.is_set() or self._resized.is_set() or self._readable(0)
+
+    def keys(self):
+        """Yield the next key (blocking), then every key already queued behind it.
+        Callers can handle the batch and redraw once; unconsumed keys stay buffered."""
+        yield self.read_key()
+        while self.pending():
+            key = self.read_key(0)
+            if key is None:
+                return
+            yield key
+
+
+_session = RawInput()
+
+
+def raw_session() -> RawInput:
+    """The shared raw-input session (use as a context manager)."""
+    return _session
+
+
+def get_key():
+    """Read one key (enters raw mode just for this read if no session is active)."""
+    with _session:
+        return _session.read_key()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# ooroogi@gmail.com
+# https://github.com/ooroogi/metis
+
+import functools
+import unicodedata
+
+ZWJ = '\u200d'
+
+# Control sequences that take no room on screen (colors, cursor moves)
+_ESCAPE = None
+
+
+def _escapes():
+    global _ESCAPE
+    if _ESCAPE is None:
+        import re
+        _ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]|\x1b\][^\x07]*\x07')
+    return _ESCAPE
+
+
+@functools.lru_cache(maxsize=4096)
+def char_width(ch: str) -> int:
+    """Columns a character takes in a terminal: 2 for wide East Asian characters
+    and emoji, 0 for combining marks, joiners and control characters, else 1."""
+    if ch.isascii():
+        return 1 if ch.isprintable() else 0
+    if unicodedata.combining(ch) or unicodedata.category(ch) in ('Mn', 'Me', 'Cf', 'Cc'):
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1
+
+
+@functools.lru_cache(maxsize=8192)
+def display_width(text: str) -> int:
+    """Columns text takes in a terminal, ignoring ANSI escapes. Cached per string,
+    since menus measure the same titles on every frame."""
+    if '\x1b' in text:
+        text = _escapes().sub('', text)
+    if text.isascii():
+        return len(text)
+    width = 0
+    joined = False
+    for ch in text:
+        if not joined:  # after a zero width joiner: part of the same emoji
+            width += char_width(ch)
+        joined = ch == ZWJ
+    return width
+
+
+def truncate(text: str, width: int, ellipsis: str = '') -> str:
+    """text cut to at most width columns (plain text), ending with ellipsis when cut.
+    A wide character that would straddle the edge is dropped."""
+    if display_width(text) <= width:
+        return text
+    width -= display_width(ellipsis)
+    if text.isascii():
+        return text[:max(0, width)] + ellipsis
+    used = 0
+    for i, ch in enumerate(text):
+        w = char_width(ch)
+        if used + w > width:
+            return text[:i] + ellipsis
+        used += w
+    return text + ellipsis
+
+
+def clip(line: str, width: int) -> str:
+    """line (with ANSI escapes) cut to width columns, keeping its escapes; a line
+    that was cut ends with a reset so its colors don't leak."""
+    if display_width(line) <= width:
+        return line
+    out = []
+    used = 0
+    pos = 0
+    for m in [*_escapes().finditer(line), None]:
+        for ch in line[pos:m.start() if m is not None else len(line)]:
+            w = char_width(ch)
+            if used + w > width:
+                out.append('\x1b[0m')
+                return ''.join(out)
+            used += w
+            out.append(ch)
+        if m is None:
+            break
+        out.append(m.group())
+        pos = m.end()
+    return ''.join(out)
+
+
+def ljust(text: str, width: int) -> str:
+    """text padded with spaces to width columns (f'{text:<{width}}' by display width)."""
+    return text + ' ' * max(0, width - display_width(text))
+
@@ -1,16 +1,20 @@
 #!/usr/bin/env python
 
-import sys, subprocess
-from pathlib import Path
+import time
+_startup = [('start', time.perf_counter())]  # (phase, perf_counter at its end) for --startup-profile
+
+import os, sys
 from lib.bootstrap import ensure_init
 ensure_init()
+_startup.append(('bootstrap', time.perf_counter()))
 from lib.task import *
 from lib.task import TASK_CANCELLED, Modal
+_startup.append(('import lib.task', time.perf_counter()))
 
 # Settings management
-script_dir = Path(__file__).parent
+script_dir = os.path.dirname(__file__) or '.'
 # Convert Windows path to MSYS/Git Bash format (C:/... -> /c/...)
-_posix_path = script_dir.as_posix()
+_posix_path = script_dir.replace('\\', '/')
 if len(_posix_path) >= 2 and _posix_path[1] == ':':
     script_dir_posix = '/' + _posix_path[0].lower() + _posix_path[2:]
 else:
@@ -18,10 +22,13 @@ else:
 
 def set_terminal_title(title):
     """Set the terminal window title."""
+    if not sys.stdout.isatty():
+        return  # keep the escape out of logs (and colorama's stripping wrapper)
     sys.stdout.write(f'\033]0;{title}\007')
     sys.stdout.flush()
 
 def get_git_branch(repo_dir):
+    import subprocess
     try:
         result = subprocess.run(
             ['git', '-C', str(repo_dir), 'rev-parse', '--abbrev-ref', 'HEAD'],
@@ -33,7 +40,28 @@ def get_git_branch(repo_dir):
         pass
     return ''
 
+def print_startup_profile():
+    """Print how long each startup phase took (up to the first menu frame) and exit."""
+    from lib.render import on_first_frame
+
+    def report():
+        _startup.append(('first frame', time.perf_counter()))
+        lines = ['', 'startup profile (ms)']
+        for (_, prev), (phase, end) in zip(_startup, _startup[1:]):
+            lines.append(f'  {phase:<16}{(end - prev) * 1000:8.1f}')
+        lines.append(f"  {'total':<16}{(_startup[-1][1] - _startup[0][1]) * 1000:8.1f}")
+        sys.stderr.write('\n'.join(lines) + '\n')
+        sys.exit(0)
+
+    on_first_frame(report)
+
 if __name__ == '__main__':
+    if sys.argv[1:2] and sys.argv[1] in ('client', 'attach', 'jobs'):
+        # Thin client of a running `metis daemon`: the daemon holds the sections
+        from lib.daemon import client_main
+        sys.exit(client_main(sys.argv[1:]))
+    if '--startup-profile' in sys.argv:
+        print_startup_profile()
     set_terminal_title('metis')
     m = SectionedTaskManager()
     m.set_only_once()
@@ -62,21 +90,21 @@ if __name__ == '__main__':
     # Build banner with info box matching menu width
     width = m.get_menu_width()
     inner = width - 2
-    branch = get_git_branch(script_dir)
     path_str = str(script_dir)
 
     # Truncate path if needed
     if len(path_str) > inner - 2:
         path_str = '..' + path_str[-(inner - 4):]
-    path_line = f'│ {path_str:<{inner - 2}} │'
-    branch_line = f'│ {branch:<{inner - 2}} │' if branch else None
+    path_line = f'│ {path_str:<{inner - 2}} │'.replace('{', '{{').replace('}', '}}')
+    # Branch is filled in by a background git call once the menu is up
+    branch_line = f'│ {{branch:<{inner - 2}.{inner - 2}}} │'
 
     art = r'''metis'''
-    box = f"┌{'─' * inner}┐" + '\n' + path_line
-    if branch_line:
-        box += '\n' + branch_line
+    box = f"┌{'─' * inner}┐" + '\n' + path_line + '\n' + branch_line
     box += '\n' + f"└{'─' * inner}┘"
     banner = art + '\n\n' + box
     m.set_banner(banner)
+    m.add_banner_field('branch', lambda: get_git_branch(script_dir))
+    _startup.append(('build menu', time.perf_counter()))
 
     m()
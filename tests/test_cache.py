@@ -0,0 +1,99 @@
+import json
+import os
+
+from lib.cache import TaskCache, input_files
+from lib.task import STATUS_CACHED, Task, TaskManager
+
+
+def _cache(tmp_path):
+    return TaskCache(tmp_path / 'cache.db')
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_first_check_misses_and_stored_stamp_hits(tmp_path):
+    _write(tmp_path / 'src' / 'a.txt', 'a')
+    cache = _cache(tmp_path)
+    inputs = [str(tmp_path / 'src' / '*.txt')]
+    stamp = cache.check('S/t', 'make', inputs)
+    assert stamp.saved is None
+    cache.store(stamp, 1.5)
+    again = cache.check('S/t', 'make', inputs)
+    assert again.saved == 1.5
+    assert again.fingerprint == stamp.fingerprint
+
+
+def test_changed_content_command_or_env_misses(tmp_path, monkeypatch):
+    src = tmp_path / 'a.txt'
+    _write(src, 'a')
+    cache = _cache(tmp_path)
+    inputs = [str(src)]
+    monkeypatch.setenv('CACHE_TEST_FLAG', '1')
+    cache.store(cache.check('S/t', 'make', inputs, ['CACHE_TEST_FLAG']), 1.0)
+    assert cache.check('S/t', 'make', inputs, ['CACHE_TEST_FLAG']).saved == 1.0
+
+    assert cache.check('S/t', 'make all', inputs, ['CACHE_TEST_FLAG']).saved is None
+    monkeypatch.setenv('CACHE_TEST_FLAG', '2')
+    assert cache.check('S/t', 'make', inputs, ['CACHE_TEST_FLAG']).saved is None
+    monkeypatch.setenv('CACHE_TEST_FLAG', '1')
+    _write(src, 'b')
+    assert cache.check('S/t', 'make', inputs, ['CACHE_TEST_FLAG']).saved is None
+
+
+def test_new_input_file_misses(tmp_path):
+    _write(tmp_path / 'a.txt', 'a')
+    cache = _cache(tmp_path)
+    inputs = [str(tmp_path / '**' / '*.txt')]
+    cache.store(cache.check('S/t', 'make', inputs), 1.0)
+    _write(tmp_path / 'sub' / 'b.txt', 'b')
+    assert cache.check('S/t', 'make', inputs).saved is None
+
+
+def test_touched_file_with_same_content_still_hits_and_refreshes_mtime(tmp_path):
+    src = tmp_path / 'a.txt'
+    _write(src, 'a')
+    cache = _cache(tmp_path)
+    cache.store(cache.check('S/t', 'make', [str(src)]), 1.0)
+    st = os.stat(src)
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    stamp = cache.check('S/t', 'make', [str(src)])
+    assert stamp.saved == 1.0
+    # The new mtime was stored, so the next check skips hashing
+    assert cache._load('S/t')[1] == json.dumps(stamp.files)
+
+
+def test_keys_are_independent(tmp_path):
+    _write(tmp_path / 'a.txt', 'a')
+    cache = _cache(tmp_path)
+    inputs = [str(tmp_path / 'a.txt')]
+    cache.store(cache.check('S/one', 'make', inputs), 1.0)
+    assert cache.check('S/two', 'make', inputs).saved is None
+
+
+def test_input_files_globs_recursively_and_skips_directories(tmp_path):
+    _write(tmp_path / 'a.txt', 'a')
+    _write(tmp_path / 'd' / 'e' / 'b.txt', 'b')
+    (tmp_path / 'dir.txt').mkdir()
+    pattern = str(tmp_path / '**' / '*.txt')
+    assert input_files([pattern, pattern]) == [str(tmp_path / 'a.txt'), str(tmp_path / 'd' / 'e' / 'b.txt')]
+
+
+def test_task_with_unchanged_inputs_is_logged_as_cached(tmp_path):
+    src = tmp_path / 'a.txt'
+    _write(src, 'a')
+    out = tmp_path / 'runs'
+    tm = TaskManager()
+    tm.set_history(None)
+    tm.set_cache(_cache(tmp_path))
+    task = Task('gen', f'echo run >> {out}', inputs=[str(src)])
+    tm.add(task)
+    assert tm.run_headless([task]) == 0
+    assert tm.run_headless([task]) == 0
+    assert out.read_text() == 'run\n'
+    assert tm.logs[-1].status == STATUS_CACHED
+    _write(src, 'b')
+    assert tm.run_headless([task]) == 0
+    assert out.read_text() == 'run\nrun\n'
@@ -0,0 +1,79 @@
+import json
+
+from lib.cli import USAGE_ERROR, run_cli
+from lib.task import Modal, Section, SectionedTaskManager, Task
+
+
+def _manager(tmp_path):
+    tm = SectionedTaskManager()
+    tm.set_history(None)
+    tm.set_cache(None)
+    build = Section('Build')
+    build.add(Task('ok', 'echo built'))
+    build.add(Task('fail', 'exit 3'))
+    tm.add_section(build)
+    deploy = Section('Deploy')
+    modal = Modal('ship')
+    modal.add_step('Env', {'dev': 'dev', 'prod': 'prod'})
+    modal.set_command(f'echo {{Env}} > {tmp_path / "shipped"}')
+    deploy.add(Task('ship', modal))
+    tm.add_section(deploy)
+    return tm
+
+
+def _report(capfd, argv, tm):
+    status = run_cli(tm, argv)
+    out, err = capfd.readouterr()
+    return status, json.loads(out), err
+
+
+def test_json_report_of_a_successful_run(tmp_path, capfd):
+    status, report, err = _report(capfd, ['Build/ok', '--json'], _manager(tmp_path))
+    assert status == 0
+    assert report['status'] == 0
+    assert 'built' in err  # task output stays off stdout
+    row, = report['tasks']
+    assert row['section'] == 'Build'
+    assert row['title'] == 'ok'
+    assert row['status'] == 'ok'
+    assert row['attempt'] == 1
+    assert set(row) == {'section', 'title', 'status', 'seconds', 'saved_seconds', 'attempt',
+                        'wait_seconds', 'selections', 'usage'}
+
+
+def test_failure_exits_1_and_reports_tasks_not_run(tmp_path, capfd):
+    status, report, _ = _report(capfd, ['Build/fail', 'Build/ok', '--json'], _manager(tmp_path))
+    assert status == 1
+    assert report['status'] == 1
+    failed, not_run = report['tasks']
+    assert (failed['title'], failed['status']) == ('fail', 'failed')
+    assert (not_run['title'], not_run['status']) == ('ok', 'not run')
+    assert set(not_run) == set(failed)
+    assert not_run['attempt'] == 0
+    assert not_run['wait_seconds'] == 0
+
+
+def test_modal_steps_are_answered_with_set(tmp_path, capfd):
+    status, report, _ = _report(capfd, ['Deploy/ship', '--set', 'Env=prod', '--json'], _manager(tmp_path))
+    assert status == 0
+    assert report['tasks'][0]['selections'] == 'prod'
+    assert (tmp_path / 'shipped').read_text() == 'prod\n'
+
+
+def test_usage_errors_exit_2_before_anything_runs(tmp_path, capfd):
+    tm = _manager(tmp_path)
+    assert run_cli(tm, ['Build/okk']) == USAGE_ERROR
+    assert "did you mean: Build/ok" in capfd.readouterr().err
+    assert run_cli(tm, ['Deploy/ship', '--set', 'Env=qa']) == USAGE_ERROR
+    assert 'Env' in capfd.readouterr().err
+    assert run_cli(tm, ['Deploy/ship']) == USAGE_ERROR
+    assert run_cli(tm, ['Deploy/ship', '--set', 'Env']) == USAGE_ERROR
+    assert run_cli(tm, []) == USAGE_ERROR
+    assert not (tmp_path / 'shipped').exists()
+
+
+def test_list_shows_tasks_and_steps(tmp_path, capfd):
+    assert run_cli(_manager(tmp_path), ['--list']) == 0
+    out = capfd.readouterr().out
+    assert 'Build/ok' in out
+    assert '--set "Env=<dev|prod>"' in out
@@ -0,0 +1,67 @@
+from lib.history import History, _exit_code, _percentile
+from lib.task import Task, TaskManager
+
+
+def _history(tmp_path):
+    return History(tmp_path / 'history.db')
+
+
+def test_stats_of_successful_runs(tmp_path):
+    h = _history(tmp_path)
+    for i, duration in enumerate([5.0, 1.0, 3.0, 2.0, 4.0]):
+        h.record('Build', 'make', '', 0, 1000.0 + i, duration)
+    h.record('Build', 'make', '', 2, 2000.0, 99.0)
+    assert h.stats('make') == {'count': 5, 'p50': 3.0, 'p95': 5.0, 'max': 5.0, 'last': 4.0}
+    assert h.durations('make') == [5.0, 1.0, 3.0, 2.0, 4.0]
+    assert h.durations('make', success_only=False)[-1] == 99.0
+
+
+def test_stats_filter_by_selection_and_time(tmp_path):
+    h = _history(tmp_path)
+    h.record('Deploy', 'ship', 'dev', 0, 100.0, 1.0)
+    h.record('Deploy', 'ship', 'prod', 0, 200.0, 10.0)
+    h.record('Deploy', 'ship', 'prod', 0, 300.0, 20.0)
+    assert h.stats('ship', selections='dev')['p50'] == 1.0
+    assert h.stats('ship', selections='prod')['count'] == 2
+    assert h.durations('ship', since=200.0) == [10.0, 20.0]
+    assert h.durations('ship', until=300.0) == [1.0, 10.0]
+    assert h.stats('ship', selections='staging') is None
+    assert h.stats('unknown') is None
+
+
+def test_percentile_is_nearest_rank():
+    assert _percentile([], 50) is None
+    assert _percentile([7.0], 50) == 7.0
+    assert _percentile([1.0, 2.0], 50) == 1.0
+    assert _percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+    assert _percentile(list(range(1, 21)), 95) == 19
+
+
+def test_exit_code_of_task_results():
+    assert _exit_code(None) == 0
+    assert _exit_code(0) == 0
+    assert _exit_code(3) == 3
+    assert _exit_code(True) == 1
+    assert _exit_code('boom') == 1
+    assert _exit_code(object()) == 1
+
+
+def test_unusable_store_is_ignored(tmp_path):
+    h = History(tmp_path / 'missing' / 'history.db')
+    h.record('S', 't', '', 0, 1.0, 1.0)
+    assert h.durations('t') == []
+    assert h.stats('t') is None
+
+
+def test_task_runs_are_recorded(tmp_path):
+    tm = TaskManager()
+    tm.set_history(_history(tmp_path))
+    tm.set_cache(None)
+    ok, bad = Task('ok', 'true'), Task('bad', 'exit 3')
+    tm.add(ok)
+    tm.add(bad)
+    tm.run_headless([ok])
+    tm.run_headless([bad])
+    assert tm.history.stats('ok')['count'] == 1
+    assert tm.history.stats('bad') is None
+    assert len(tm.history.durations('bad', success_only=False)) == 1
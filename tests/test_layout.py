@@ -0,0 +1,55 @@
+from lib.layout import MenuLayout, _moves, is_separator, section_layout
+
+
+def test_is_separator():
+    assert is_separator('')
+    assert is_separator('\x00sep3')
+    assert not is_separator('build')
+
+
+def test_moves_skip_separators_and_wrap():
+    seps = (False, True, False, True)
+    assert _moves(seps, 1) == (2, 2, 0, 0)
+    assert _moves(seps, -1) == (2, 0, 0, 2)
+
+
+def test_moves_without_selectable_items_stay_put():
+    assert _moves((True, True), 1) == (0, 1)
+    assert _moves((True, True), -1) == (0, 1)
+
+
+def test_section_layout():
+    sec = section_layout('Build', {'make': 1, '\x00sep1': None, '中文字': 2})
+    assert sec.items == ('make', '\x00sep1', '中文字')
+    assert sec.selectable == (0, 2)
+    assert sec.next[0] == 2 and sec.prev[0] == 2
+    assert sec.width == 6  # '中文字' takes six columns
+
+
+def test_menu_width_covers_items_and_tabs():
+    layout = MenuLayout().add('A', ['abcdefghij'])
+    assert layout.width == 10 + 6
+    assert MenuLayout().add('A', ['abcdefghij'], multi=True).width == 10 + 11
+    wide = MenuLayout().add('A long section name', ['x'])
+    assert wide.width == len('A long section name') + 2 + 4
+
+
+def test_sync_measures_only_what_changed():
+    build, test = ['make'], ['pytest']
+    layout = MenuLayout().sync({'Build': build, 'Test': test})
+    assert layout.sync({'Build': build, 'Test': test}) is layout
+    test.append('tox')
+    synced = layout.sync({'Build': build, 'Test': test})
+    assert synced is not layout
+    assert synced.sections[0] is layout.sections[0]
+    assert synced.sections[1].items == ('pytest', 'tox')
+
+
+def test_layout_is_immutable():
+    layout = MenuLayout()
+    try:
+        layout.width = 3
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError('MenuLayout accepted an attribute change')
@@ -0,0 +1,188 @@
+import io
+import os
+import signal
+import threading
+import time
+
+from lib import process
+from lib.process import TIMEOUT_EXIT, OutputMux, shell_argv, time_limit
+from lib.task import MAX_BACKOFF, STATUS_CANCELLED, STATUS_RETRIED, STATUS_TIMEOUT, Task, TaskManager, _backoff_delay
+
+
+def test_mux_stops_reading_pipes_held_by_background_children(monkeypatch):
+    monkeypatch.setattr(process, 'DRAIN_GRACE', 0.2)
+    out = io.StringIO()
+    with OutputMux(out=out) as mux:
+        start = time.perf_counter()
+        res = mux.run(shell_argv('echo before; sleep 3 & echo after'), tag='bg')
+        took = time.perf_counter() - start
+        assert mux.tail('bg') == ['before', 'after']
+    assert res == 0
+    assert took < 2
+
+
+def test_mux_collects_all_output_of_a_finished_command():
+    out = io.StringIO()
+    with OutputMux(out=out) as mux:
+        res = mux.run(shell_argv('printf "one\\ntwo\\npartial"; exit 3'), tag='t')
+        assert mux.tail('t') == ['one', 'two', 'partial']
+    assert res == 3
+    assert 'partial\n' in out.getvalue()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_time_limit_kills_the_process_group(tmp_path):
+    pidfile = tmp_path / 'child.pid'
+    with time_limit(0.3) as limit:
+        start = time.perf_counter()
+        proc = process.spawn(shell_argv(f'sleep 30 & echo $! > {pidfile}; sleep 30'))
+        res = process.wait(proc, process.current_limit())
+        took = time.perf_counter() - start
+    assert res == TIMEOUT_EXIT
+    assert limit.expired
+    assert took < 5
+    assert not _alive(int(pidfile.read_text()))
+
+
+def test_no_time_limit_returns_the_exit_code():
+    with time_limit(None) as limit:
+        assert process.current_limit() is None
+        res = process.wait(process.spawn(shell_argv('exit 5')), process.current_limit())
+    assert res == 5
+    assert not limit.expired
+
+
+def _manager(*tasks):
+    tm = TaskManager()
+    tm.set_history(None)
+    tm.set_cache(None)
+    for task in tasks:
+        tm.add(task)
+    return tm
+
+
+def test_task_timeout_is_logged_and_fails_the_run():
+    task = Task('slow', 'sleep 30', timeout=0.3)
+    tm = _manager(task)
+    assert tm.run_headless([task]) == 1
+    log = tm.logs[-1]
+    assert log.status == STATUS_TIMEOUT
+    assert not log.is_success
+    assert log.duration.endswith('(timeout)')
+
+
+def test_failed_attempts_are_retried_until_success(tmp_path):
+    count = tmp_path / 'count'
+    # Fails twice, then succeeds
+    cmd = f'echo x >> {count}; test $(wc -l < {count}) -ge 3'
+    task = Task('flaky', cmd, retries=3, backoff=0.01)
+    tm = _manager(task)
+    assert tm.run_headless([task]) == 0
+    assert [(log.status, log.attempt) for log in tm.logs] == [(STATUS_RETRIED, 1), (STATUS_RETRIED, 2), ('', 3)]
+    assert tm.logs[-1].is_success
+    assert all(0 < log.wait <= 0.02 for log in tm.logs[:2])
+
+
+def test_retries_stop_at_the_limit_and_only_for_retry_on():
+    task = Task('always', 'exit 3', retries=2, backoff=0.01)
+    tm = _manager(task)
+    assert tm.run_headless([task]) == 1
+    assert [log.attempt for log in tm.logs] == [1, 2, 3]
+
+    task = Task('other', 'exit 2', retries=2, retry_on=[3], backoff=0.01)
+    tm = _manager(task)
+    assert tm.run_headless([task]) == 1
+    assert [log.attempt for log in tm.logs] == [1]
+
+
+def test_callables_are_retried():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        return 0 if len(calls) > 1 else 1
+
+    task = Task('callable', flaky, retries=1, backoff=0.01)
+    tm = _manager(task)
+    assert tm.run_headless([task]) == 0
+    assert len(calls) == 2
+
+
+def test_backoff_doubles_with_jitter_and_is_capped():
+    for attempt, delay in ((1, 1.0), (2, 2.0), (3, 4.0)):
+        for _ in range(20):
+            assert delay / 2 <= _backoff_delay(1.0, attempt) <= delay
+    assert _backoff_delay(10.0, 30) <= MAX_BACKOFF
+
+
+def _ctrl_c_when(ready, presses=1):
+    """Send SIGINT to this process once ready() holds (Ctrl+C on the terminal), presses times."""
+    def send():
+        deadline = time.monotonic() + 5
+        while not ready() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        for _ in range(presses):
+            time.sleep(0.1)
+            os.kill(os.getpid(), signal.SIGINT)
+    thread = threading.Thread(target=send)
+    thread.start()
+    return thread
+
+
+def test_ctrl_c_cancels_the_running_command_and_the_rest_of_the_run():
+    first, second = Task('long', 'sleep 30'), Task('next', 'true')
+    tm = _manager(first, second)
+    sender = _ctrl_c_when(lambda: process._running)
+    start = time.perf_counter()
+    assert tm.run_headless([first, second]) == 1
+    sender.join()
+    assert time.perf_counter() - start < 5
+    assert [(log.title, log.status) for log in tm.logs] == [('long', STATUS_CANCELLED)]
+    assert process.cancel_requested()
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
+
+
+def test_cancel_escalates_to_sigterm_for_commands_ignoring_sigint(monkeypatch):
+    monkeypatch.setattr(process, 'KILL_GRACE', 0.2)
+    task = Task('stubborn', "trap '' INT; sleep 30")
+    tm = _manager(task)
+    sender = _ctrl_c_when(lambda: process._running)
+    start = time.perf_counter()
+    assert tm.run_headless([task]) == 1
+    sender.join()
+    assert time.perf_counter() - start < 5
+    assert tm.logs[-1].status == STATUS_CANCELLED
+
+
+def test_ctrl_c_interrupts_a_callable_running_in_the_main_thread():
+    running = threading.Event()
+
+    def busy():
+        running.set()
+        time.sleep(30)
+        return 0
+
+    task = Task('busy', busy)
+    tm = _manager(task)
+    sender = _ctrl_c_when(running.is_set)
+    start = time.perf_counter()
+    assert tm.run_headless([task]) == 1
+    sender.join()
+    assert time.perf_counter() - start < 5
+    assert tm.logs[-1].status == STATUS_CANCELLED
+
+
+def test_a_new_run_clears_the_cancel_request():
+    with process.cancellable():
+        process._cancel.set()
+    task = Task('ok', 'true')
+    tm = _manager(task)
+    assert tm.run_headless([task]) == 0
+    assert not process.cancel_requested()
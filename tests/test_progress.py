@@ -0,0 +1,63 @@
+import io
+import re
+import threading
+
+from lib.progress import Progress
+
+
+class _Task:
+    def __init__(self, title):
+        self.title = title
+
+    def __str__(self):
+        return self.title
+
+
+class _PausingOut(io.StringIO):
+    """Output that holds the first scroll region release until `resume` is set (or a timeout)."""
+
+    def __init__(self):
+        super().__init__()
+        self.releasing = threading.Event()
+        self.resume = threading.Event()
+
+    def write(self, text):
+        if '\x1b[r' in text and not self.releasing.is_set():
+            self.releasing.set()
+            self.resume.wait(0.2)
+        return super().write(text)
+
+
+def _regions(text):
+    """Sequence of scroll region reservations ('+') and releases ('-')."""
+    return ''.join('+' if m.group(1) else '-' for m in re.finditer(r'\x1b\[(1;\d+)?r', text))
+
+
+def test_show_waits_for_a_hide_in_progress(monkeypatch):
+    monkeypatch.setenv('LINES', '24')
+    out = _PausingOut()
+    progress = Progress([_Task('a')], out=out, interval=60)
+    progress.show()
+    hiding = threading.Thread(target=progress.hide)
+    hiding.start()
+    out.releasing.wait(1)
+    showing = threading.Thread(target=lambda: (progress.show(), out.resume.set()))
+    showing.start()
+    hiding.join()
+    showing.join()
+    progress.hide()
+    assert progress._visible == 0
+    assert progress._thread is None
+    assert _regions(out.getvalue()) == '+-+-'
+
+
+def test_nested_show_draws_once():
+    out = io.StringIO()
+    progress = Progress([_Task('a')], out=out, interval=60)
+    progress.show()
+    progress.show()
+    progress.hide()
+    assert progress._thread is not None
+    progress.hide()
+    assert progress._thread is None
+    assert _regions(out.getvalue()) == '+-'
@@ -0,0 +1,101 @@
+import threading
+import time
+
+from lib import resources
+from lib.resources import Capacity
+from lib.scheduler import run_graph
+
+
+class _Task:
+    def __init__(self, title, cpus=1, memory=None, locks=None, seconds=0.0):
+        self.title = title
+        self.cpus = cpus
+        self.memory = memory
+        self.locks = locks or []
+        self.depends_on = []
+        self.seconds = seconds
+
+    def __call__(self):
+        time.sleep(self.seconds)
+        return 0
+
+    def __str__(self):
+        return self.title
+
+
+def test_cpu_slots_admit_until_full():
+    cap = Capacity(cpus=2, load_aware=False)
+    a, b, c = _Task('a'), _Task('b'), _Task('c')
+    assert cap.try_acquire(a)
+    assert cap.try_acquire(b)
+    assert not cap.try_acquire(c)
+    cap.release(a)
+    assert cap.try_acquire(c)
+
+
+def test_memory_budget():
+    cap = Capacity(cpus=8, memory=1000, load_aware=False)
+    big, small = _Task('big', memory=800), _Task('small', memory=300)
+    assert cap.try_acquire(big)
+    assert not cap.try_acquire(small)
+    cap.release(big)
+    assert cap.try_acquire(small)
+
+
+def test_locks_are_exclusive_by_name():
+    cap = Capacity(cpus=8, load_aware=False)
+    assert cap.try_acquire(_Task('a', locks=['db']))
+    assert not cap.try_acquire(_Task('b', locks=['db', 'docker']))
+    assert cap.try_acquire(_Task('c', locks=['docker']))
+
+
+def test_a_lone_task_is_admitted_whatever_it_asks_for():
+    cap = Capacity(cpus=2, memory=100, load_aware=False)
+    huge = _Task('huge', cpus=16, memory=10 ** 6)
+    assert cap.try_acquire(huge)
+    assert not cap.try_acquire(_Task('next'))
+    cap.release(huge)
+    assert cap.try_acquire(_Task('next'))
+
+
+def test_tasks_without_needs_always_start():
+    cap = Capacity(cpus=1, load_aware=False)
+    assert cap.try_acquire(_Task('a'))
+    group = _Task('group', cpus=0)
+    assert cap.try_acquire(group)
+    assert cap.try_acquire(group)
+
+
+def test_load_aware_counts_the_busier_of_load_and_slots(monkeypatch):
+    monkeypatch.setattr(resources, 'load_average', lambda: 3.5)
+    monkeypatch.setattr(resources, 'memory_available', lambda: 500)
+    cap = Capacity(cpus=4)
+    assert cap.try_acquire(_Task('a'))
+    assert not cap.try_acquire(_Task('b'))
+    monkeypatch.setattr(resources, 'load_average', lambda: 1.0)
+    assert cap.try_acquire(_Task('b'))
+    assert not cap.try_acquire(_Task('c', memory=600))
+    assert cap.try_acquire(_Task('c', memory=400))
+
+
+def test_scheduler_serializes_tasks_sharing_a_lock():
+    active, peak, overlap = [], [], []
+    lock = threading.Lock()
+
+    class _Tracked(_Task):
+        def __call__(self):
+            with lock:
+                active.append(self)
+                peak.append(sum(1 for t in active if 'db' in t.locks))
+                overlap.append(len(active))
+            time.sleep(self.seconds)
+            with lock:
+                active.remove(self)
+            return 0
+
+    tasks = [_Tracked(f'db{i}', locks=['db'], seconds=0.05) for i in range(3)]
+    tasks += [_Tracked(f'free{i}', seconds=0.05) for i in range(3)]
+    assert run_graph(tasks, 6, capacity=Capacity(cpus=float('inf'), load_aware=False)) == 0
+    assert len(peak) == 6
+    assert max(peak) == 1
+    assert max(overlap) > 1
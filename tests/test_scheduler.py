@@ -0,0 +1,78 @@
+import threading
+import time
+
+from lib.scheduler import build_graph, has_dependencies, run_graph
+
+
+class _Task:
+    def __init__(self, title, depends_on=(), result=0, seconds=0.0):
+        self.title = title
+        self.depends_on = list(depends_on)
+        self.result = result
+        self.seconds = seconds
+        self.ran = False
+
+    def __call__(self):
+        self.ran = True
+        time.sleep(self.seconds)
+        return self.result
+
+    def __str__(self):
+        return self.title
+
+
+def test_order_follows_dependencies_then_selection_order():
+    tasks = [_Task('a'), _Task('b', ['a']), _Task('c')]
+    order, upstream, downstream = build_graph(tasks)
+    assert order == [0, 2, 1]
+    assert upstream[1] == {0}
+    assert downstream[0] == {1}
+
+
+def test_dependencies_outside_the_selection_are_ignored():
+    tasks = [_Task('b', ['a']), _Task('c', ['b'])]
+    assert build_graph(tasks)[0] == [0, 1]
+    assert not has_dependencies([_Task('b', ['a'])])
+    assert has_dependencies(tasks)
+
+
+def test_cycle_is_an_error():
+    tasks = [_Task('a', ['b']), _Task('b', ['a']), _Task('c')]
+    try:
+        build_graph(tasks)
+    except ValueError as e:
+        assert str(e) == 'dependency cycle between: a, b'
+    else:
+        raise AssertionError('cycle not detected')
+
+
+def test_failure_skips_only_its_downstream():
+    a = _Task('a', result=3)
+    b = _Task('b', ['a'])
+    c = _Task('c', ['b'])
+    d = _Task('d')
+    skipped = []
+    res = run_graph([a, b, c, d], 2, on_skip=lambda task, failed: skipped.append((str(task), str(failed))))
+    assert res == 3
+    assert sorted(skipped) == [('b', 'a'), ('c', 'a')]
+    assert d.ran and not b.ran and not c.ran
+
+
+def test_workers_bound_concurrency():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    class Counted(_Task):
+        def __call__(self):
+            with lock:
+                running.append(self)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(self)
+            return 0
+
+    tasks = [Counted(f't{i}') for i in range(6)]
+    assert run_graph(tasks, 2) == 0
+    assert max(peak) == 2
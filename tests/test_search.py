@@ -0,0 +1,61 @@
+from lib.search import SearchIndex, SearchFilter
+
+
+def _index():
+    index = SearchIndex()
+    index.add_section(0, ['Deploy prod', 'Deploy dev', '', 'Build'])
+    index.add_section(1, ['cargo check', '\x00sep1', 'Debug build'], start=0)
+    return index
+
+
+def test_terms_match_substrings_case_insensitively():
+    index = _index()
+    assert index.keys(index.search('deploy')) == [(0, 0), (0, 1)]
+    assert index.keys(index.search('BUILD deb')) == [(1, 2)]
+    assert index.search('nothing') == []
+
+
+def test_separators_are_not_indexed():
+    index = _index()
+    assert len(index) == 5
+    assert (0, 2) not in index.keys(index.search(''))
+    assert (1, 1) not in index.keys(index.search(''))
+
+
+def test_candidates_limit_the_search():
+    index = _index()
+    deploy = index.search('dep')
+    assert index.search('dev', deploy) == index.search('deploy dev')
+    assert index.search('build', deploy) == []
+
+
+def test_filter_uses_trigrams_from_the_first_long_term():
+    index = _index()
+    calls = []
+    search = index.search
+
+    def spy(query, candidates=None):
+        calls.append((query, candidates))
+        return search(query, candidates)
+    index.search = spy
+
+    f = SearchFilter(index)
+    assert len(f.update('')) == 5
+    f.update('d')
+    f.update('de')
+    f.update('dep')
+    f.update('depl')
+    bases = {query: candidates for query, candidates in calls}
+    assert bases['d'] is None  # not the empty query's "everything"
+    assert bases['dep'] is None  # postings instead of a scan of 'de'
+    assert bases['depl'] == index.search('dep')
+
+
+def test_filter_backspace_reuses_earlier_results():
+    f = SearchFilter(_index())
+    dep = f.update('dep')
+    f.update('depl')
+    calls = []
+    f.index.search = lambda *args: calls.append(args)
+    assert f.update('dep') is dep
+    assert calls == []
@@ -0,0 +1,49 @@
+from lib.term import (KEY_DELETE, KEY_DOWN, KEY_END, KEY_ENTER, KEY_ESC, KEY_HOME, KEY_PGUP, KEY_RIGHT,
+                      KEY_SHIFT_TAB, KEY_UP, KeyDecoder)
+
+
+def _keys(*chunks, flush=False):
+    decoder = KeyDecoder()
+    keys = []
+    for chunk in chunks:
+        decoder.feed(chunk)
+        while True:
+            key = decoder.next()
+            if key is None:
+                break
+            keys.append(key)
+    if flush:
+        key = decoder.next(flush=True)
+        while key is not None:
+            keys.append(key)
+            key = decoder.next(flush=True)
+    return keys
+
+
+def test_csi_and_ss3_keys():
+    assert _keys(b'\x1b[A\x1b[B\x1bOC\x1b[Z') == [KEY_UP, KEY_DOWN, KEY_RIGHT, KEY_SHIFT_TAB]
+    assert _keys(b'\x1b[1;5A') == [KEY_UP]  # Ctrl+Up: modifiers are dropped
+
+
+def test_tilde_keys():
+    assert _keys(b'\x1b[1~\x1b[3~\x1b[4~\x1b[5~') == [KEY_HOME, KEY_DELETE, KEY_END, KEY_PGUP]
+    assert _keys(b'\x1b[3;2~') == [KEY_DELETE]
+
+
+def test_unknown_sequences_are_dropped():
+    assert _keys(b'\x1b[99x\x1b[A') == [KEY_UP]
+
+
+def test_sequences_split_across_reads():
+    assert _keys(b'\x1b', b'[', b'A') == [KEY_UP]
+    assert _keys('中'.encode()[:2], '中'.encode()[2:]) == [ord('中')]
+
+
+def test_text_and_control_keys():
+    assert _keys(b'a\r\t') == [ord('a'), KEY_ENTER, 9]
+
+
+def test_lone_esc_waits_for_a_timeout():
+    assert _keys(b'\x1b') == []
+    assert _keys(b'\x1b', flush=True) == [KEY_ESC]
+    assert _keys(b'\x1b\x1b', flush=True) == [KEY_ESC, KEY_ESC]
@@ -0,0 +1,34 @@
+from lib.width import char_width, clip, display_width, ljust, truncate
+
+
+def test_char_width():
+    assert char_width('a') == 1
+    assert char_width('中') == 2
+    assert char_width('́') == 0  # combining acute accent
+    assert char_width('\x07') == 0
+
+
+def test_display_width():
+    assert display_width('abc') == 3
+    assert display_width('中文 ok') == 7
+    assert display_width('é') == 1
+    assert display_width('\x1b[31mred\x1b[0m') == 3
+    assert display_width('👨‍👩‍👧') == 2  # one joined emoji
+
+
+def test_truncate():
+    assert truncate('abcdef', 10) == 'abcdef'
+    assert truncate('abcdef', 4, '…') == 'abc…'
+    assert truncate('中文字', 5, '…') == '中文…'
+    assert truncate('中文字', 3) == '中'  # a wide character never straddles the edge
+
+
+def test_clip_keeps_escapes_and_resets():
+    assert clip('abc', 5) == 'abc'
+    assert clip('\x1b[31mabcdef\x1b[0m', 3) == '\x1b[31mabc\x1b[0m'
+    assert display_width(clip('中文字', 5)) == 4
+
+
+def test_padding_by_columns():
+    assert ljust('中', 4) == '中  '
+    assert ljust('toolong', 3) == 'toolong'